@@ -61,6 +61,10 @@ def create_app(config_name="default"):
         except ImportError:
             print("Warning: flask-talisman not found, security headers disabled.")
 
+    # ── Profiling (opt-in) ────────────────────────────────────────────────────
+    from .profiler import init_profiler
+    init_profiler(app)
+
     # ── Database ──────────────────────────────────────────────────────────────
     from .extensions import db
     db.init_app(app)
@@ -71,11 +75,18 @@ def create_app(config_name="default"):
     from .database import init_db
     init_db(app)
 
+    from .replicas import init_replicas
+    init_replicas(app)
+
     # ── Blueprints ────────────────────────────────────────────────────────────
     from .auth import auth
     app.register_blueprint(auth)
     app.register_blueprint(api)
 
+    # ── Static assets (hashed dist/ build when present) ──────────────────────
+    from .assets import init_assets
+    init_assets(app)
+
     # ── Page Routes ───────────────────────────────────────────────────────────
     from .auth import login_required
 
@@ -84,6 +95,17 @@ def create_app(config_name="default"):
         import os
         return f"Status: Online | DB_URL_SET: {bool(os.environ.get('DATABASE_URL'))}"
 
+    @app.route("/metrics")
+    def metrics_endpoint():
+        from flask import request, Response
+        from .metrics import render_prometheus
+        from .shards import update_shard_gauges
+        token = app.config.get("METRICS_TOKEN")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return "Forbidden", 403
+        update_shard_gauges()
+        return Response(render_prometheus(), mimetype="text/plain; version=0.0.4")
+
     @app.errorhandler(Exception)
     def handle_exception(e):
         import os
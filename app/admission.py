@@ -0,0 +1,144 @@
+"""
+Admission control for LLM-backed endpoints
+==========================================
+A blocking LLM call holds a waitress thread for its whole duration, so the AI
+endpoints get a bounded slice of the server:
+
+- at most LLM_MAX_CONCURRENCY calls in flight across the process
+- at most one in-flight chat per user
+- at most LLM_QUEUE_SIZE requests waiting for a slot, each for at most
+  LLM_QUEUE_TIMEOUT seconds; a request whose estimated wait already exceeds
+  that deadline is rejected immediately
+
+Keep LLM_MAX_CONCURRENCY + LLM_QUEUE_SIZE below the waitress thread count so
+transaction and summary requests always find a free thread.
+"""
+import os
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from flask import g, jsonify
+
+from . import metrics
+
+
+class Overloaded(Exception):
+    def __init__(self, message: str, retry_after: float, status: int = 503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+metrics.describe("trackex_llm_inflight", "gauge", "LLM-backed requests currently holding a slot")
+metrics.describe("trackex_llm_queued", "gauge", "LLM-backed requests waiting for a slot")
+metrics.describe("trackex_llm_admission_rejected_total", "counter", "LLM-backed requests rejected by admission control")
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._inflight = 0
+        self._queued = 0
+        self._chat_users = set()
+        self._avg_seconds = 2.0  # EWMA of slot hold time, seeds the wait estimate
+
+    def _export(self):
+        metrics.set_gauge("trackex_llm_inflight", self._inflight)
+        metrics.set_gauge("trackex_llm_queued", self._queued)
+
+    def _reject(self, reason: str, message: str, retry_after: float, status: int = 503):
+        metrics.inc("trackex_llm_admission_rejected_total", reason=reason)
+        raise Overloaded(message, max(1, round(retry_after)), status)
+
+    def acquire(self, user_id, kind: str):
+        with self._cond:
+            if kind == "chat":
+                if user_id in self._chat_users:
+                    self._reject("user_busy", "You already have a chat request in progress.", 1, status=429)
+                # Claim the user before queueing so a second chat can't pass this check meanwhile
+                self._chat_users.add(user_id)
+            try:
+                if self._inflight >= self.max_concurrency:
+                    self._wait_for_slot()
+            except Overloaded:
+                if kind == "chat":
+                    self._chat_users.discard(user_id)
+                raise
+
+            self._inflight += 1
+            self._export()
+            return time.monotonic()
+
+    def _wait_for_slot(self):
+        """Queue until a slot frees up; call with the condition held."""
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", "The AI assistant is busy. Please try again shortly.", self._avg_seconds)
+        # Deadline-aware: don't queue a request that can't be served in time
+        est_wait = self._avg_seconds * (self._queued + 1) / self.max_concurrency
+        if est_wait > self.queue_timeout:
+            self._reject("deadline", "The AI assistant is busy. Please try again shortly.", est_wait)
+
+        self._queued += 1
+        self._export()
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            while self._inflight >= self.max_concurrency:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._reject("timeout", "The AI assistant is busy. Please try again shortly.", self._avg_seconds)
+                self._cond.wait(remaining)
+        finally:
+            self._queued -= 1
+            self._export()
+
+    def release(self, user_id, kind: str, started: float):
+        with self._cond:
+            self._inflight -= 1
+            if kind == "chat":
+                self._chat_users.discard(user_id)
+            self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started)
+            self._export()
+            self._cond.notify()
+
+
+controller = AdmissionController(
+    max_concurrency=int(os.environ.get("LLM_MAX_CONCURRENCY", "3")),
+    max_queue=int(os.environ.get("LLM_QUEUE_SIZE", "2")),
+    queue_timeout=float(os.environ.get("LLM_QUEUE_TIMEOUT", "5")),
+)
+
+
+@contextmanager
+def llm_slot(kind: str):
+    """Hold an LLM slot for the current user; raises Overloaded when none is available."""
+    user_id = g.user["id"] if g.user else None
+    started = controller.acquire(user_id, kind)
+    try:
+        yield
+    finally:
+        controller.release(user_id, kind, started)
+
+
+def overloaded_response(e: Overloaded):
+    resp = jsonify(error=str(e), retry_after=e.retry_after)
+    resp.status_code = e.status
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp
+
+
+def llm_admission(kind: str):
+    """Route decorator: run the view inside an LLM slot or answer 503/429 with Retry-After."""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            try:
+                with llm_slot(kind):
+                    return view(*args, **kwargs)
+            except Overloaded as e:
+                return overloaded_response(e)
+        return wrapped
+    return decorator
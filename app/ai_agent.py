@@ -8,180 +8,285 @@ management task requested.
 Features:
 - Supreme Tool Use: Executes complex JSON actions for data manipulation.
 - Full Context: Aware of every transaction, limit, and alert.
-- Groq Powered: Ultra-low latency via Llama 3.3.
+- Groq Powered: Ultra-low latency via Llama 3.3 (provider is pluggable, see llm.py).
 """
 import os
 import re
 import json
 import sys
-import requests as http
 from datetime import datetime
 
+from flask import g, has_request_context
+
+from .llm import get_provider, last_usage
+from .prompt_budget import PromptBuilder, encode_transactions, encode_limits
+from .intent import parse_intents, guess_category
+from .memory import search_memories, remember_from_message
+from .tools import TOOL_MARKER, MAX_TOOL_CALLS, tool_prompt, extract_tool_calls, run_tool
+from . import metrics
+
 from .models import (
     fetch_summary, set_limit, fetch_limits,
     check_category_limit_exceeded, fetch_all_transactions,
     get_detailed_analytics, get_expense_warnings, 
-    insert_transaction, delete_transaction
+    insert_transaction, delete_transaction, delete_latest_transaction, category_index,
+    check_category_limits_exceeded,
 )
+from .extensions import db
+from .money import to_paise, to_rupees, AmountOutOfRange, MAX_AMOUNT_PAISE
 
-# ── Groq Brain (Supreme Logic) ────────────────────────────────────────────────
+RECENT_TX_IN_PROMPT = 8  # older history is reachable through the data tools
+OFFLINE_REPLY = "⚠️ **System Alert**: The AI core is temporarily offline. Please try again in a moment."
 
-def _call_llm_brain(system_prompt: str, user_message: str) -> str | None:
-    """Uses Groq API for lightning fast, high-quality responses."""
-    groq_key = os.environ.get("GROQ_API_KEY", "").strip()
-    
-    if not groq_key:
-        sys.stderr.write("[AI Agent] Missing GROQ_API_KEY - set it in .env file\n")
-        return None
-        
-    model = os.environ.get("MODEL_NAME", "llama-3.3-70b-versatile")
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {groq_key}",
-        "Content-Type": "application/json"
-    }
-    body = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_message}
-        ],
-        "temperature": 0.2,  # Lower temperature for better JSON accuracy
-        "max_tokens": 1024
-    }
-    
-    try:
-        resp = http.post(url, headers=headers, json=body, timeout=30)
-        
-        if resp.status_code == 200:
-            try:
-                content = resp.json()["choices"][0]["message"]["content"].strip()
-                if not content:
-                    sys.stderr.write("[Groq] Empty response content\n")
-                    return None
-                return content
-            except (KeyError, IndexError, json.JSONDecodeError) as je:
-                sys.stderr.write(f"[Groq] Response parsing error: {str(je)}\n")
-                return None
-        
-        elif resp.status_code == 401:
-            sys.stderr.write("[Groq] Authentication failed - check GROQ_API_KEY\n")
-            return None
-        
-        elif resp.status_code == 429:
-            sys.stderr.write("[Groq] Rate limit exceeded\n")
-            return None
-        
-        else:
-            sys.stderr.write(f"[Groq] Error {resp.status_code}: {resp.text[:200]}\n")
-            return None
-            
-    except http.exceptions.Timeout:
-        sys.stderr.write("[Groq] Request timeout (30s)\n")
-        return None
-    except http.exceptions.ConnectionError as ce:
-        sys.stderr.write(f"[Groq] Connection error: {str(ce)}\n")
-        return None
-    except Exception as e:
-        sys.stderr.write(f"[Groq] Unexpected error: {str(e)}\n")
-        return None
+# ── LLM Brain (Supreme Logic) ─────────────────────────────────────────────────
+
+metrics.describe("trackex_llm_prompt_tokens_total", "counter", "Prompt tokens sent to the LLM")
+metrics.describe("trackex_llm_completion_tokens_total", "counter", "Completion tokens received from the LLM")
+metrics.describe("trackex_prompt_section_tokens_total", "counter", "Chat system prompt tokens by section, after trimming")
+
+def _call_llm_brain(system_prompt: str, user_message: str, kind: str = "chat") -> str | None:
+    """Routes the prompt through the configured LLM provider (Groq by default) and records token usage."""
+    reply = get_provider().complete(system_prompt, user_message)
+    usage = last_usage()
+    if usage:
+        metrics.inc("trackex_llm_prompt_tokens_total", usage["prompt_tokens"], kind=kind)
+        metrics.inc("trackex_llm_completion_tokens_total", usage["completion_tokens"], kind=kind)
+        if has_request_context():
+            total = g.setdefault("llm_usage", {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "estimated": False})
+            total["calls"] += 1
+            total["prompt_tokens"] += usage["prompt_tokens"]
+            total["completion_tokens"] += usage["completion_tokens"]
+            total["estimated"] = total["estimated"] or usage["estimated"]
+    return reply
 
 # ── The Action Layer (Local Execution) ───────────────────────────────────────
 
-def _perform_data_action(action_json: str) -> str:
-    """The 'Hand' of the AI — executes instructions on the database."""
-    try:
-        # Parse JSON safely
+def _canonical_category(name: str, tx_type: str = "expense") -> str:
+    """Match the model's category spelling onto the whitelist ('emi / loan' -> 'EMI / Loan', 'food' -> 'Food & Dining')."""
+    lookup = category_index().by_lower
+    key = str(name or "").strip().lower()
+    if key in lookup:
+        return lookup[key]
+    guessed = guess_category(key, tx_type)
+    if guessed:
+        return guessed
+    return "Other Income" if tx_type == "income" else "Other"
+
+def _validate_action(data) -> tuple:
+    """Normalise one action dict. Returns (action, None) or (None, error message)."""
+    if not isinstance(data, dict):
+        return None, "action must be a JSON object"
+    atype = str(data.get("type", "")).lower()
+
+    if atype == "add":
+        tx_type = str(data.get("tx_type", "expense")).lower()
+        if tx_type not in ("income", "expense"):
+            return None, f"type must be 'income' or 'expense', got '{tx_type}'"
         try:
-            data = json.loads(action_json)
-        except json.JSONDecodeError as je:
-            sys.stderr.write(f"[Action] JSON parse error: {str(je)} in '{action_json[:100]}'\n")
-            return f"❌ **Action Parse Failed**: Invalid command format. {str(je)}"
-        
-        atype = data.get("type", "").lower()
-        
-        # 1. ADD / INSERT
-        if atype == "add":
-            try:
-                tx_type = data.get("tx_type", "expense").lower()
-                amount = float(data.get("amount", 0))
-                category = data.get("category", "Other").title()
-                note = data.get("note", "")
-                date = data.get("date", datetime.now().strftime("%Y-%m-%d"))
-                
-
-                
-                insert_transaction(tx_type, category, amount, note, date)
-                
-                # Check for limit violations
-                warn = ""
-                if tx_type == "expense":
-                    try:
-                        violation = check_category_limit_exceeded(category)
-                        if violation:
-                            warn = f"\n\n🚨 **BUDGET ALERT**: You just crossed your ₹{violation.get('limit', 0)} limit for **{category}**!"
-                    except Exception as e:
-                        sys.stderr.write(f"[Action] Limit check failed: {str(e)}\n")
-                
-                return f"✅ **SUCCESS**: Logged {tx_type} of ₹{amount:,.2f} under **{category}**." + warn
-            
-            except ValueError as ve:
-                return f"❌ **Value Error**: Invalid amount or number format. {str(ve)}"
-            except Exception as e:
-                sys.stderr.write(f"[Action] Add transaction failed: {str(e)}\n")
-                return f"❌ **Add Failed**: {str(e)[:100]}"
-
-        # 2. DELETE / REMOVE
-        if atype == "delete":
-            try:
-                tx_id = data.get("id")
-                if tx_id:
-                    delete_transaction(tx_id)
-                    return f"🗑️ **SUCCESS**: Transaction #{tx_id} removed from records."
-                else:
-                    # Delete most recent
-                    txs = fetch_all_transactions(limit=1)
-                    if txs:
-                        t = txs[0]
-                        delete_transaction(t['id'])
-                        return f"🗑️ **SUCCESS**: Last transaction (₹{t['amount']} {t['category']}) deleted."
-                    return "❌ **Failed**: No transactions to delete."
-            except Exception as e:
-                sys.stderr.write(f"[Action] Delete failed: {str(e)}\n")
-                return f"❌ **Delete Failed**: {str(e)[:100]}"
-
-        # 3. SET BUDGET LIMIT
-        if atype == "limit":
+            amount_paise = to_paise(data.get("amount", 0))
+        except AmountOutOfRange:
+            return None, f"amount '{data.get('amount')}' is out of range"
+        except (TypeError, ValueError):
+            return None, f"invalid amount '{data.get('amount')}'"
+        if amount_paise <= 0 or amount_paise > MAX_AMOUNT_PAISE:
+            return None, f"amount ₹{to_rupees(amount_paise):,.2f} is out of range"
+        date = str(data.get("date") or datetime.now().strftime("%Y-%m-%d"))
+        try:
+            datetime.strptime(date, "%Y-%m-%d")
+        except ValueError:
+            return None, f"invalid date '{date}' (use YYYY-MM-DD)"
+        return {"type": "add", "tx_type": tx_type, "amount_paise": amount_paise, "date": date,
+                "category": _canonical_category(data.get("category", "Other"), tx_type),
+                "note": str(data.get("note", ""))[:500]}, None
+
+    if atype == "delete":
+        tx_id = data.get("id")
+        if tx_id is not None:
             try:
-                cat = data.get("category", "Other").title()
-                amt = float(data.get("amount", 0))
-                
-                if amt <= 0:
-                    return f"❌ **Invalid Limit**: Amount must be greater than 0."
-                
-                set_limit(cat, amt)
-                return f"🎯 **SUCCESS**: Monthly budget for **{cat}** locked at **₹{amt:,.0f}**."
-            except ValueError as ve:
-                return f"❌ **Value Error**: Invalid amount format. {str(ve)}"
-            except Exception as e:
-                sys.stderr.write(f"[Action] Set limit failed: {str(e)}\n")
-                return f"❌ **Limit Failed**: {str(e)[:100]}"
-
-        # 4. DATA QUERY / NAVIGATION
-        if atype == "query":
-            return "🖥️ **Dashboard Updated**: I've filtered the view as you requested."
-
-        return f"❌ **ERROR**: Unknown action type '{atype}'. Valid actions are: add, delete, limit, query."
-        
+                tx_id = int(tx_id)
+            except (TypeError, ValueError):
+                return None, f"invalid transaction id '{tx_id}'"
+        return {"type": "delete", "id": tx_id}, None
+
+    if atype == "limit":
+        try:
+            amount_paise = to_paise(data.get("amount", 0))
+        except AmountOutOfRange:
+            return None, f"limit amount '{data.get('amount')}' is out of range"
+        except (TypeError, ValueError):
+            return None, f"invalid limit amount '{data.get('amount')}'"
+        if amount_paise <= 0:
+            return None, "limit amount must be greater than 0"
+        return {"type": "limit", "category": _canonical_category(data.get("category", "Other")),
+                "amount_paise": amount_paise}, None
+
+    if atype == "query":
+        return {"type": "query"}, None
+
+    return None, f"unknown action type '{atype}'. Valid actions are: add, delete, limit, query"
+
+def _apply_action(action: dict) -> str:
+    """Stage one validated action in the current session (no commit) and describe it."""
+    atype = action["type"]
+
+    if atype == "add":
+        insert_transaction(action["tx_type"], action["category"], action["amount_paise"],
+                           action["note"], action["date"], commit=False)
+        return f"✅ **SUCCESS**: Logged {action['tx_type']} of ₹{to_rupees(action['amount_paise']):,.2f} under **{action['category']}**."
+
+    if atype == "delete":
+        if action["id"]:
+            if delete_transaction(action["id"], commit=False):
+                return f"🗑️ **SUCCESS**: Transaction #{action['id']} removed from records."
+            return f"❌ **Failed**: Transaction #{action['id']} not found."
+        # Delete most recent
+        deleted = delete_latest_transaction(commit=False)
+        if deleted:
+            category, amount_paise = deleted
+            return f"🗑️ **SUCCESS**: Last transaction (₹{to_rupees(amount_paise)} {category}) deleted."
+        return "❌ **Failed**: No transactions to delete."
+
+    if atype == "limit":
+        set_limit(action["category"], action["amount_paise"], commit=False)
+        return f"🎯 **SUCCESS**: Monthly budget for **{action['category']}** locked at **₹{to_rupees(action['amount_paise']):,.0f}**."
+
+    # DATA QUERY / NAVIGATION
+    return "🖥️ **Dashboard Updated**: I've filtered the view as you requested."
+
+def execute_actions(actions: list) -> str:
+    """The 'Hand' of the AI — validates every action first, then runs them all in one DB transaction."""
+    if not actions:
+        return "❌ **ERROR**: No action to execute."
+
+    validated, errors = [], []
+    for i, data in enumerate(actions, 1):
+        action, error = _validate_action(data)
+        if error:
+            errors.append(f"{i}. {error}" if len(actions) > 1 else error)
+        validated.append(action)
+    if errors:
+        return "❌ **Nothing Executed**: " + "; ".join(errors)
+
+    try:
+        results = [_apply_action(a) for a in validated]
+        db.session.commit()
     except Exception as e:
-        sys.stderr.write(f"[Action] Unexpected error: {str(e)}\n")
-        return f"❌ **EXECUTION FAILED**: {str(e)[:150]}"
+        db.session.rollback()
+        sys.stderr.write(f"[Action] Batch failed, rolled back: {str(e)}\n")
+        return f"❌ **EXECUTION FAILED**: Nothing was saved. {str(e)[:150]}"
+
+    # One batched limit check for every expense category touched
+    warn = ""
+    expense_cats = [a["category"] for a in validated if a["type"] == "add" and a["tx_type"] == "expense"]
+    if expense_cats:
+        try:
+            for violation in check_category_limits_exceeded(expense_cats):
+                warn += f"\n\n🚨 **BUDGET ALERT**: You just crossed your ₹{violation.get('limit', 0)} limit for **{violation['category']}**!"
+        except Exception as e:
+            sys.stderr.write(f"[Action] Limit check failed: {str(e)}\n")
+
+    if len(results) == 1:
+        return results[0] + warn
+    return "\n".join(f"{i}. {r}" for i, r in enumerate(results, 1)) + warn
+
+def _perform_data_action(action_json: str) -> str:
+    """Parses one [[ACTION]] payload — a single action object or a list of them — and executes it."""
+    try:
+        data = json.loads(action_json)
+    except json.JSONDecodeError as je:
+        sys.stderr.write(f"[Action] JSON parse error: {str(je)} in '{action_json[:100]}'\n")
+        return f"❌ **Action Parse Failed**: Invalid command format. {str(je)}"
+    return execute_actions(data if isinstance(data, list) else [data])
+
+def _compact_warning(w: dict) -> str:
+    if w.get("category") == "Overall":
+        return f"Overall: {w['type']} — balance ₹{w.get('balance', 0):.0f}"
+    return f"{w['category']}: {w['type']} — spent ₹{w.get('spent', 0):.0f} of ₹{w.get('limit', 0):.0f}"
+
+def _build_chat_prompt(s: dict, limits: dict, recent: list, warns: list, memories: list = ()) -> str:
+    """Assemble the chat system prompt within LLM_PROMPT_TOKEN_BUDGET and record per-section token counts."""
+    pb = PromptBuilder()
+    pb.add("role", """You are the **TrackEx Supreme AI**. You have TOTAL CONTROL over this website's financial data.
+You are not a chatbot; you are a Financial Operative.""")
+    pb.add("status", f"""COMMAND CENTER STATUS (all time):
+- Balance ₹{s.get('balance', 0):.2f} | Income ₹{s.get('income', 0):.2f} | Expense ₹{s.get('expense', 0):.2f}""", priority=1)
+    if memories:
+        pb.add("memory", header="What you remember about this user (respect these preferences):",
+               items=[f"- {m['key']}: {m['content']}" for m in memories], priority=2, min_items=1, droppable=True)
+    pb.add("warnings", header="Budget warnings this month:",
+           items=[_compact_warning(w) for w in warns] or ["None"], priority=3, min_items=1, droppable=True)
+    pb.add("limits", f"Monthly category limits: {encode_limits(limits) if limits else 'None set yet'}",
+           priority=4, droppable=True)
+    tx_header, tx_rows = encode_transactions(recent, datetime.now().strftime("%Y-%m-%d"))
+    if tx_rows:
+        pb.add("recent", header=f"Recent transactions, newest first — {tx_header}:", items=tx_rows,
+               priority=5, min_items=3, droppable=True)
+    else:
+        pb.add("recent", "Recent transactions: No transactions yet", priority=5, droppable=True)
+    pb.add("actions", """OPERATIONAL POWERS (You MUST use [[ACTION]] JSON to execute commands):
+1. ADD: [[ACTION]]{"type": "add", "tx_type": "expense", "amount": 250, "category": "Food & Dining", "note": "Burger"}[[ACTION]]
+2. DELETE: [[ACTION]]{"type": "delete"}[[ACTION]] (Deletes last) or [[ACTION]]{"type": "delete", "id": 12}[[ACTION]]
+3. LIMIT: [[ACTION]]{"type": "limit", "category": "Travel", "amount": 3000}[[ACTION]]
+4. QUERY: [[ACTION]]{"type": "query"}[[ACTION]] (Use when user asks to 'show', 'sort', 'filter', or 'list' things)""")
+    pb.add("tools", f"""DATA TOOLS (read-only, computed from the full database — only the recent log is shown above):
+{tool_prompt()}
+To use one, reply with ONLY [[TOOL]]{{"name": "category_total", "args": {{"category": "Transport", "month": "2026-03"}}}}[[TOOL]] (up to {MAX_TOOL_CALLS} tools). You will get the results back, then answer.""",
+           priority=2, droppable=True)
+    pb.add("rules", """RULES OF ENGAGEMENT:
+- If a user mentions money spent or earned, EXECUTE an 'add' command immediately.
+- If a user wants to 'undo' or 'remove', EXECUTE a 'delete' command.
+- Be authoritative, accurate, and lightning fast.
+- Use emojis and Bold text for all numbers and categories.
+- Always respond helpfully even if no data is available.
+- Put the [[ACTION]] at the very end of your message if you need to execute a command.
+- For several commands in one message, send ONE [[ACTION]] containing a JSON list: [[ACTION]][{...}, {...}][[ACTION]]
+- For questions about totals, periods, comparisons or limits, use a DATA TOOL instead of guessing.""")
+
+    prompt, stats = pb.build()
+    for name, tokens in stats["sections"].items():
+        metrics.inc("trackex_prompt_section_tokens_total", tokens, section=name)
+    if has_request_context():
+        g.llm_prompt = stats
+    return prompt
 
 # ── Public API ───────────────────────────────────────────────────────────────
 
-def handle_chat(message: str) -> str:
-    """Main chatbot handler with error handling."""
+metrics.describe("trackex_chat_fast_path_total", "counter", "Chat messages answered by the local intent parser (hit) or sent to the LLM (miss)")
+
+def try_fast_path(message: str) -> str | None:
+    """Executes simple commands locally; None means the message needs the LLM."""
+    try:
+        actions = parse_intents(message)
+    except Exception as e:
+        sys.stderr.write(f"[Chat] Intent parser failed: {str(e)}\n")
+        actions = None
+    if not actions:
+        metrics.inc("trackex_chat_fast_path_total", outcome="miss")
+        return None
+    metrics.inc("trackex_chat_fast_path_total", outcome="hit")
+    reply = execute_actions(actions)
+    remember_from_message(message)
+    return reply
+
+def handle_chat(message: str, fast_path: bool = True) -> str:
+    """Main chatbot handler; durable facts from the message are stored once it is answered."""
+    # 0. Simple commands never need the LLM
+    if fast_path:
+        reply = try_fast_path(message)
+        if reply is not None:
+            return reply
+
+    reply = _llm_reply(message)
+    remember_from_message(message)
+    return reply
+
+def _llm_reply(message: str) -> str:
+    """Answer one chat message through the LLM, with error handling."""
     try:
+        # Fail fast while the LLM circuit is open — no point building context
+        if not get_provider().available():
+            return OFFLINE_REPLY
+
         # 1. Gather all possible context for the brain
         try:
             s = fetch_summary()
@@ -196,7 +301,7 @@ def handle_chat(message: str) -> str:
             limits = {}
         
         try:
-            recent = fetch_all_transactions(limit=15)
+            recent = fetch_all_transactions(limit=RECENT_TX_IN_PROMPT)
         except Exception as db_err:
             sys.stderr.write(f"[Chat] fetch_all_transactions failed: {str(db_err)}\n")
             recent = []
@@ -206,56 +311,51 @@ def handle_chat(message: str) -> str:
         except Exception as db_err:
             sys.stderr.write(f"[Chat] get_expense_warnings failed: {str(db_err)}\n")
             warns = []
-        
-        # Build context strings safely
-        tx_list = [f"ID:{t['id']} | {t['date']} | {t['type']} | {t['category']} | ₹{t['amount']}" for t in recent] if recent else []
-        tx_str  = "\n".join(tx_list) if tx_list else "No transactions yet"
-        warn_str = "\n".join([f"⚠️ {w['message']}" for w in warns]) if warns else "Perfect. No budget warnings."
-        
-        system = f"""You are the **TrackEx Supreme AI**. You have TOTAL CONTROL over this website's financial data.
-You are not a chatbot; you are a Financial Operative. 
-
-COMMAND CENTER STATUS:
-- Current Balance: ₹{s.get('balance', 0):.2f}
-- Total Monthly Income: ₹{s.get('income', 0):.2f}
-- Total Monthly Expense: ₹{s.get('expense', 0):.2f}
-- Budget Overrides/Warnings: {warn_str}
-- Active Category Limits: {json.dumps(limits) if limits else 'None set yet'}
-- Recent Log Database:
-{tx_str}
-
-OPERATIONAL POWERS (You MUST use [[ACTION]] JSON to execute commands):
-1. ADD: [[ACTION]]{{"type": "add", "tx_type": "expense", "amount": 250, "category": "Food", "note": "Burger"}}[[ACTION]]
-2. DELETE: [[ACTION]]{{"type": "delete"}}[[ACTION]] (Deletes last) or [[ACTION]]{{"type": "delete", "id": 12}}[[ACTION]]
-3. LIMIT: [[ACTION]]{{"type": "limit", "category": "Travel", "amount": 3000}}[[ACTION]]
-4. QUERY: [[ACTION]]{{"type": "query"}}[[ACTION]] (Use when user asks to 'show', 'sort', 'filter', or 'list' things)
-
-RULES OF ENGAGEMENT:
-- If a user mentions money spent or earned, EXECUTE an 'add' command immediately.
-- If a user wants to 'undo' or 'remove', EXECUTE a 'delete' command.
-- Be authoritative, accurate, and lightning fast. 
-- Use emojis and Bold text for all numbers and categories.
-- Always respond helpfully even if no data is available.
-- Put the [[ACTION]] at the very end of your message if you need to execute a command.
-"""
+
+        try:
+            memories = search_memories(message)
+        except Exception as db_err:
+            sys.stderr.write(f"[Chat] search_memories failed: {str(db_err)}\n")
+            memories = []
+
+        # Build the prompt from measured sections; low-priority ones are trimmed to the token budget
+        system = _build_chat_prompt(s, limits, recent, warns, memories)
 
         llm_reply = _call_llm_brain(system, message)
         if not llm_reply:
-            return "⚠️ **System Alert**: The AI core is temporarily offline. Please try again in a moment."
+            return OFFLINE_REPLY
 
-        # Intercept and perform actions
+        # One tool round trip: run the requested read tools, send back only their results
+        if TOOL_MARKER in llm_reply:
+            calls = extract_tool_calls(llm_reply)
+            results = [run_tool(c) for c in calls]
+            followup = (f"{message}\n\nTOOL RESULTS (computed from the database):\n"
+                        f"{json.dumps(results, separators=(',', ':'), ensure_ascii=False)}\n"
+                        "Answer the user with these results. Do not call tools again.")
+            llm_reply = _call_llm_brain(system, followup)
+            if not llm_reply:
+                return OFFLINE_REPLY
+            llm_reply = llm_reply.split(TOOL_MARKER)[0].strip() or llm_reply.replace(TOOL_MARKER, "").strip()
+
+        # Intercept and perform actions — every [[ACTION]] block runs in one transaction
         if "[[ACTION]]" in llm_reply:
             try:
                 parts = llm_reply.split("[[ACTION]]")
                 if len(parts) >= 3:
                     dialogue = parts[0].strip()
-                    command  = parts[1].strip()
-                    
-                    execution_result = _perform_data_action(command)
+                    actions = []
+                    for command in parts[1::2]:
+                        parsed = json.loads(command.strip())
+                        actions.extend(parsed if isinstance(parsed, list) else [parsed])
+
+                    execution_result = execute_actions(actions)
                     return f"{dialogue}\n\n{execution_result}" if dialogue else execution_result
                 else:
                     # Malformed action format
                     return llm_reply.replace("[[ACTION]]", "").strip()
+            except json.JSONDecodeError as je:
+                sys.stderr.write(f"[Chat] Action JSON parse error: {str(je)}\n")
+                return f"{llm_reply.split('[[ACTION]]')[0].strip()}\n\n❌ **Action Parse Failed**: Invalid command format. {str(je)}".strip()
             except Exception as action_err:
                 sys.stderr.write(f"[Chat] Action execution failed: {str(action_err)}\n")
                 # Return the dialogue without executing the broken action
@@ -293,7 +393,7 @@ def get_ai_insights(month=None):
         msg = f"Spend: ₹{sumry.get('expense', 0)} | Income: ₹{sumry.get('income', 0)} | Proj: ₹{velocity.get('projected_expense', 0)}"
         sys_p = "Summarize this spending data in 2 short bullet points with emojis. Be direct and analytical."
         
-        llm = _call_llm_brain(sys_p, msg)
+        llm = _call_llm_brain(sys_p, msg, kind="insights")
         
         if llm:
             return {"insight": llm, "source": "Supreme AI"}
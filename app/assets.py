@@ -0,0 +1,70 @@
+"""
+Static asset pipeline (runtime side)
+====================================
+`python build_assets.py` writes hashed, minified, precompressed copies of the
+static files to static/dist/ plus a manifest. This module:
+
+- exposes `asset_url(filename)` to templates: the hashed dist URL when the
+  manifest has the file, otherwise the plain static URL (dev, or no build)
+- serves /static/dist/ itself, picking the .br/.gz variant the client
+  accepts, with `Cache-Control: public, max-age=31536000, immutable` since a
+  hashed name never changes content
+
+The manifest is ignored in debug mode so edited sources show up immediately.
+"""
+import os
+import sys
+import json
+import mimetypes
+from flask import request, send_from_directory, url_for
+
+DIST_SUBDIR = "dist"
+IMMUTABLE = "public, max-age=31536000, immutable"
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _load_manifest(app) -> dict:
+    path = os.path.join(app.static_folder, DIST_SUBDIR, "manifest.json")
+    if app.debug or not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        sys.stderr.write(f"[Assets] could not read {path}: {str(e)}\n")
+        return {}
+
+
+def init_assets(app):
+    manifest = _load_manifest(app)
+    dist_dir = os.path.join(app.static_folder, DIST_SUBDIR)
+
+    def asset_url(filename):
+        return url_for("static", filename=manifest.get(filename, filename))
+
+    app.jinja_env.globals["asset_url"] = asset_url
+
+    # More specific than /static/<path:filename>, so the router picks it first
+    @app.route(f"{app.static_url_path}/{DIST_SUBDIR}/<path:filename>", endpoint="static_dist")
+    def static_dist(filename):
+        # Plain 404s: the app-wide Exception handler would turn abort() into a 500
+        if filename.endswith((".gz", ".br")) or filename == "manifest.json":
+            return "Not Found", 404
+        if not os.path.isfile(os.path.join(dist_dir, filename)):
+            return "Not Found", 404
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        accepted = request.headers.get("Accept-Encoding", "")
+
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and os.path.isfile(os.path.join(dist_dir, filename + suffix)):
+                resp = send_from_directory(dist_dir, filename + suffix, mimetype=mimetype, max_age=31536000)
+                resp.headers["Content-Encoding"] = encoding
+                break
+        else:
+            resp = send_from_directory(dist_dir, filename, mimetype=mimetype, max_age=31536000)
+
+        resp.headers["Cache-Control"] = IMMUTABLE
+        resp.headers["Vary"] = "Accept-Encoding"
+        return resp
+
+    return manifest
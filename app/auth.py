@@ -7,6 +7,7 @@ from flask import Blueprint, flash, g, redirect, render_template, request, sessi
 from werkzeug.security import check_password_hash, generate_password_hash
 from .extensions import db
 from .models import User
+from .shards import place_user, shard_engine
 from app import limiter
 
 auth = Blueprint("auth", __name__, url_prefix="/auth")
@@ -93,6 +94,7 @@ def google_callback():
             user = User(username=username, google_id=google_id, email=email, password='')
             db.session.add(user)
             db.session.commit()
+            place_user(user)
 
     # Security: Regenerate session after login
     _regenerate_session()
@@ -125,6 +127,7 @@ def register():
                 new_user = User(username=username, password=generate_password_hash(password))
                 db.session.add(new_user)
                 db.session.commit()
+                place_user(new_user)
             except Exception as e:
                 db.session.rollback()
                 print(f"REGISTER ERROR: {e}")
@@ -169,7 +172,15 @@ def load_logged_in_user():
     else:
         user = User.query.get(user_id)
         if user:
-            g.user = {"id": user.id, "username": user.username, "email": user.email}
+            g.user = {"id": user.id, "username": user.username, "email": user.email,
+                      "shard_moves": user.shard_moves}
+            # Per-user tables are read and written on the user's shard (see shards.py)
+            g.db_shard = shard_engine(user.shard) if user.shard else None
+            if user.shard_target is not None and request.method not in ("GET", "HEAD", "OPTIONS"):
+                # rebalance_shards.py is moving this user's rows; reads keep working
+                response = jsonify(error="Your data is being moved, please try again in a few seconds.")
+                response.headers["Retry-After"] = "5"
+                return response, 503
         else:
             g.user = None
 
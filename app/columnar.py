@@ -0,0 +1,78 @@
+"""
+Columnar transaction payloads
+=============================
+Opt-in `format=columnar` for the transaction list endpoints. Instead of one
+object per row (every key name repeated, plus `user_id`), the payload is one
+array per field. The repetitive string fields (type, category, date, note)
+are dictionary-encoded and amounts are sent as integer paise:
+
+    {
+      "format": "columnar",
+      "count": 3,
+      "dicts":   {"type": ["expense", "income"], "category": ["Rent", "Salary"],
+                  "date": ["2026-06-02", "2026-06-01"], "note": [null, "june"]},
+      "scale":   {"amount": 100},
+      "columns": {"id": [9, 8, 7], "type": [0, 1, 0], "category": [0, 1, 0],
+                  "amount": [1200000, 5000000, 35050], "note": [0, 1, 0],
+                  "date": [0, 1, 1]}
+    }
+
+Codes index into `dicts[field]` and are only valid within one response;
+a field listed in `scale` is divided by its factor to get the display value.
+`decodeColumnar` in static/js/app.js turns this back into row objects.
+
+`json_response` serializes with orjson when it is installed (optional
+dependency), otherwise with the stdlib encoder in compact form.
+"""
+import json
+from flask import Response, request
+
+from .money import PAISE_PER_RUPEE
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+TX_FIELDS = ("id", "type", "category", "amount", "note", "date")
+DICT_FIELDS = ("type", "category", "date", "note")
+SCALES = {"amount": PAISE_PER_RUPEE}
+
+
+def wants_columnar() -> bool:
+    return request.args.get("format") == "columnar"
+
+
+def encode_columns(rows, fields=TX_FIELDS, dict_fields=DICT_FIELDS, scales=SCALES, labels=None) -> dict:
+    """Transpose row tuples (in `fields` order) into dictionary-encoded columns.
+
+    `labels` maps a dictionary field's raw values (e.g. category ids) to what
+    the client sees; it is applied once per distinct value.
+    """
+    labels = labels or {}
+    columns = {name: [] for name in fields}
+    dicts = {name: {} for name in dict_fields}
+    targets = [(columns[name], dicts.get(name)) for name in fields]
+
+    for row in rows:
+        for value, (column, codes) in zip(row, targets):
+            if codes is not None:
+                value = codes.setdefault(value, len(codes))
+            column.append(value)
+
+    return {
+        "format": "columnar",
+        "count": len(columns[fields[0]]),
+        "dicts": {name: [labels[name][v] for v in codes] if name in labels else list(codes)
+                  for name, codes in dicts.items()},
+        "scale": {name: factor for name, factor in scales.items() if name in columns},
+        "columns": columns,
+    }
+
+
+def json_response(payload, status: int = 200) -> Response:
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(",", ":"))
+    return Response(body, status=status, mimetype="application/json")
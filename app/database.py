@@ -1,13 +1,38 @@
 from .extensions import db
-import os
+from .migrations import run_migrations, target_engine  # registers the schema_* tables before create_all
 
 def init_db(app):
     """Initialize the database and create tables."""
     with app.app_context():
         # This will create all required tables in Supabase if they don't exist
-        db.create_all()
+        db.create_all(bind_key=None)  # primary only: replicas get the schema by replication, shards below
+        from .models import seed_categories
+        seed_categories()
+        upgrade_schema(app)
+        from .shards import init_shards
+        init_shards(app)
         print("Supabase database initialized and tables created.")
 
+def upgrade_schema(app):
+    """Migrations, partitions, missing indexes and search indexes for target_engine()."""
+    # create_all never alters existing tables; columns and backfills come from migrations
+    run_migrations()
+    from .partitions import ensure_partitions
+    ensure_partitions()
+    # create_all skips tables that already exist, so add any indexes they are missing
+    engine = target_engine()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+    init_search_indexes(app)
+
+def init_search_indexes(app):
+    """Full-text indexes live outside the ORM metadata; rerun after drop_all/create_all."""
+    from .memory import init_memory_index
+    from .search import init_transaction_search
+    init_memory_index(app)
+    init_transaction_search(app)
+
 def get_db():
     """Keep for backward compatibility if any raw SQL is still used."""
     return db.session
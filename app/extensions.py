@@ -1,3 +1,34 @@
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy.sql.util import find_tables
 
-db = SQLAlchemy()
+# Tables that only live on the primary (shard 0), whatever shard the user is on
+DIRECTORY_TABLES = frozenset({"users", "schema_migrations", "schema_backfills"})
+
+
+def _on_directory(mapper, clause):
+    if mapper is not None:
+        return getattr(mapper.persist_selectable, "name", None) in DIRECTORY_TABLES
+    if clause is None:
+        return False
+    return any(t.name in DIRECTORY_TABLES for t in find_tables(clause, include_aliases=True, include_crud=True))
+
+
+class RoutingSession(Session):
+    """Sends a sharded user's statements to `g.db_shard` (see shards.py) unless they
+    touch a directory table, and plain SELECTs to `g.db_replica` while a
+    @replica_read view has set one (see replicas.py); the rest use the normal bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            shard = g.get("db_shard")
+            if shard is not None and not _on_directory(mapper, clause):
+                return shard
+            replica = g.get("db_replica")
+            if replica is not None and not self._flushing and getattr(clause, "is_select", False):
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
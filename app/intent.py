@@ -0,0 +1,230 @@
+"""
+Local fast-path intent parser
+=============================
+Recognises the simple chat commands that make up most traffic —
+"spent 250 on food", "got salary 50000", "undo", "set food budget to 5000" —
+and turns them into the same action dicts the LLM emits inside [[ACTION]].
+
+`parse_intent` only answers when it is confident: exactly one amount, one
+known category, an unambiguous type and no date words it cannot resolve.
+Anything else returns None and the message goes to the LLM as before.
+"""
+import re
+from datetime import datetime, timedelta
+
+from .models import VALID_CATEGORIES
+
+# keyword -> category; longest keywords are matched first
+_EXPENSE_KEYWORDS = {
+    "Groceries": ["groceries", "grocery", "vegetables", "veggies", "fruits", "milk", "supermarket", "kirana"],
+    "Food & Dining": ["food", "lunch", "dinner", "breakfast", "restaurant", "swiggy", "zomato", "coffee",
+                      "tea", "snacks", "burger", "pizza", "biryani", "dining", "eating out"],
+    "Transport": ["transport", "uber", "ola", "cab", "taxi", "auto", "bus", "train", "metro", "petrol",
+                  "diesel", "fuel", "parking", "toll"],
+    "Rent": ["rent", "house rent"],
+    "Utilities": ["utilities", "electricity", "electricity bill", "water bill", "internet", "wifi", "broadband",
+                  "gas bill", "phone bill", "mobile recharge", "recharge"],
+    "Health": ["health", "doctor", "medicine", "medicines", "pharmacy", "hospital", "clinic", "dentist"],
+    "Entertainment": ["entertainment", "movie", "movies", "cinema", "concert", "games", "party"],
+    "Education": ["education", "course", "books", "tuition", "school fees", "college fees", "exam fees"],
+    "Shopping": ["shopping", "clothes", "shoes", "amazon", "flipkart", "myntra"],
+    "Travel": ["travel", "flight", "flights", "hotel", "trip", "vacation"],
+    "EMI / Loan": ["emi", "loan", "loan repayment"],
+    "Subscriptions": ["subscription", "subscriptions", "netflix", "spotify", "prime", "hotstar", "youtube premium"],
+}
+_INCOME_KEYWORDS = {
+    "Salary": ["salary", "paycheck", "pay check", "wages"],
+    "Freelance": ["freelance", "freelancing", "client payment", "gig"],
+    "Investment": ["investment", "dividend", "dividends", "interest", "returns"],
+    "Gift": ["gift", "gifted"],
+    "Rent Income": ["rent income", "rent received", "rental income", "rent from tenant"],
+    "Business": ["business", "sales"],
+    "Bonus": ["bonus", "incentive"],
+}
+
+_EXPENSE_VERBS = r"\b(spent|spend|spending|paid|pay|bought|buy|expense|expensed|cost|charged)\b"
+_INCOME_VERBS = r"\b(got|received|receive|earned|earn|income|credited|deposited|salary came)\b"
+
+_UNDO_RE = re.compile(r"^(undo|undo (that|last|it)|delete (the )?last( one| entry| transaction| expense)?|"
+                      r"remove (the )?last( one| entry| transaction| expense)?|oops,? undo)[.!]?$")
+_DELETE_ID_RE = re.compile(r"^(delete|remove) (transaction |entry |record )?#?(\d+)[.!]?$")
+_LIMIT_RE = re.compile(r"\b(limit|budget|cap)\b")
+_AMOUNT_RE = re.compile(r"(?<![\w.])(?:₹|rs\.?|inr)?\s?(\d{1,3}(?:,\d{2,3})+|\d+(?:\.\d+)?)\s?(k|lakh|lakhs|l)?(?![\w])",
+                        re.I)
+_ISO_DATE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2})\b")
+_WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+# date words _extract_date does not resolve; when any is left the message goes to the LLM
+_UNPARSED_DATE_RE = re.compile(
+    r"\b(last|previous|past|next|this|coming) (week|month|year|weekend)\b|\bago\b|\bweekend\b|"
+    r"\btomorrow\b|\b\d{1,2}(st|nd|rd|th)\b|\bdate\b|"
+    r"\b(january|february|march|april|may|june|july|august|september|october|november|december|"
+    r"jan|feb|mar|apr|jun|jul|aug|sep|sept|oct|nov|dec)\b")
+_MULTIPLIERS = {"k": 1000, "l": 100000, "lakh": 100000, "lakhs": 100000}
+
+assert all(c in VALID_CATEGORIES for c in list(_EXPENSE_KEYWORDS) + list(_INCOME_KEYWORDS))
+
+
+def _keyword_index(mapping: dict) -> list:
+    pairs = [(kw, cat) for cat, kws in mapping.items() for kw in kws]
+    pairs.sort(key=lambda p: len(p[0]), reverse=True)
+    return [(re.compile(rf"\b{re.escape(kw)}\b"), kw, cat) for kw, cat in pairs]
+
+
+_EXPENSE_INDEX = _keyword_index(_EXPENSE_KEYWORDS)
+_INCOME_INDEX = _keyword_index(_INCOME_KEYWORDS)
+
+
+def _find_category(text: str, index: list):
+    """(category, keyword) for the longest match, or (None, None) when keywords of
+    different categories match ("food, not transport")."""
+    found = None
+    for pattern, kw, cat in index:
+        m = pattern.search(text)
+        if not m:
+            continue
+        if found and found[0] != cat:
+            return None, None
+        found = found or (cat, kw)
+        # a shorter keyword inside this one ("bill" in "water bill") is the same mention
+        text = text[:m.start()] + " " * len(m.group(0)) + text[m.end():]
+    return found or (None, None)
+
+
+def _extract_date(text: str, today: datetime):
+    """Returns (YYYY-MM-DD, text without the date words); (None, text) when unsure of the date."""
+    iso = _ISO_DATE_RE.search(text)
+    if iso:
+        try:
+            datetime.strptime(iso.group(1), "%Y-%m-%d")
+            return iso.group(1), text.replace(iso.group(0), " ")
+        except ValueError:
+            return None, text
+    date, rest = today.strftime("%Y-%m-%d"), text
+    for phrase, days in (("day before yesterday", 2), ("yesterday", 1), ("today", 0)):
+        if phrase in text:
+            date, rest = (today - timedelta(days=days)).strftime("%Y-%m-%d"), text.replace(phrase, " ")
+            break
+    else:
+        for i, day in enumerate(_WEEKDAYS):
+            m = re.search(rf"\b(on |last )?{day}\b", text)
+            if m:
+                back = (today.weekday() - i) % 7 or 7
+                date, rest = (today - timedelta(days=back)).strftime("%Y-%m-%d"), text.replace(m.group(0), " ")
+                break
+    if _UNPARSED_DATE_RE.search(rest):
+        return None, text
+    return date, rest
+
+
+def _extract_amounts(text: str) -> list:
+    amounts = []
+    for m in _AMOUNT_RE.finditer(text):
+        value = float(m.group(1).replace(",", ""))
+        if m.group(2):
+            value *= _MULTIPLIERS[m.group(2).lower()]
+        amounts.append(value)
+    return amounts
+
+
+def _note_for(keyword: str, category: str) -> str:
+    """Keep the user's own word when it is more specific than the category name."""
+    if keyword and keyword.lower() != category.lower():
+        return keyword
+    return ""
+
+
+def guess_category(text: str, tx_type: str = "expense") -> str | None:
+    """Best keyword match for free text ('food' -> 'Food & Dining'), or None."""
+    index = _INCOME_INDEX if tx_type == "income" else _EXPENSE_INDEX
+    return _find_category(text.lower(), index)[0]
+
+
+_SPLIT_RE = re.compile(r"\s*(?:,|;|\band then\b|\band\b|\balso\b)\s*")
+
+
+def parse_intents(message: str, today: datetime | None = None) -> list | None:
+    """Like parse_intent, but also splits "spent 200 on food and 80 on transport".
+
+    Every part must parse on its own, otherwise the whole message goes to the LLM.
+    A later part without a verb inherits the type of the part before it, and a
+    part without date words takes the date of the nearest dated part.
+    """
+    single = parse_intent(message, today)
+    if single:
+        return [single]
+
+    parts = [p for p in _SPLIT_RE.split(message.strip()) if p]
+    if len(parts) < 2 or len(parts) > 10:
+        return None
+
+    today = today or datetime.now()
+    actions, last_verb, dated = [], "", []
+    for part in parts:
+        lowered = " ".join(part.lower().split())
+        if re.search(_EXPENSE_VERBS, lowered) or re.search(_INCOME_VERBS, lowered):
+            last_verb = ""
+        elif last_verb:
+            part = f"{last_verb} {part}"
+        action = parse_intent(part, today)
+        if not action or action["type"] != "add":
+            return None
+        verb = re.search(f"{_EXPENSE_VERBS}|{_INCOME_VERBS}", lowered)
+        if verb:
+            last_verb = verb.group(0)
+        dated.append(_extract_date(lowered, today)[1] != lowered)
+        actions.append(action)
+
+    if any(dated):
+        date = actions[dated.index(True)]["date"]
+        for action, own in zip(actions, dated):
+            if own:
+                date = action["date"]
+            else:
+                action["date"] = date
+    return actions
+
+
+def parse_intent(message: str, today: datetime | None = None) -> dict | None:
+    """Return an action dict ({"type": "add"|"delete"|"limit", ...}) or None when unsure."""
+    text = " ".join(message.lower().strip().split())
+    if not text or len(text) > 200 or "?" in text:
+        return None
+    today = today or datetime.now()
+
+    if _UNDO_RE.match(text):
+        return {"type": "delete"}
+    m = _DELETE_ID_RE.match(text)
+    if m:
+        return {"type": "delete", "id": int(m.group(3))}
+
+    date, rest = _extract_date(text, today)
+    if date is None:
+        return None
+    amounts = _extract_amounts(rest)
+    if len(amounts) != 1 or amounts[0] <= 0 or amounts[0] > 10000000:
+        return None
+    amount = amounts[0]
+
+    if _LIMIT_RE.search(rest):
+        category, _ = _find_category(rest, _EXPENSE_INDEX)
+        if not category:
+            return None
+        return {"type": "limit", "category": category, "amount": amount}
+
+    is_expense = bool(re.search(_EXPENSE_VERBS, rest))
+    is_income = bool(re.search(_INCOME_VERBS, rest))
+    income_cat, income_kw = _find_category(rest, _INCOME_INDEX)
+    expense_cat, expense_kw = _find_category(rest, _EXPENSE_INDEX)
+
+    # "received rent" is rent income, "paid rent" is rent
+    if is_income and not is_expense and (income_cat or expense_cat == "Rent"):
+        category = income_cat or "Rent Income"
+        return {"type": "add", "tx_type": "income", "amount": amount, "category": category,
+                "note": _note_for(income_kw, category), "date": date}
+    if not is_expense and not is_income and income_cat and not expense_cat:
+        return {"type": "add", "tx_type": "income", "amount": amount, "category": income_cat,
+                "note": _note_for(income_kw, income_cat), "date": date}
+    if (is_expense or not is_income) and expense_cat and not income_cat:
+        return {"type": "add", "tx_type": "expense", "amount": amount, "category": expense_cat,
+                "note": _note_for(expense_kw, expense_cat), "date": date}
+    return None
@@ -0,0 +1,434 @@
+"""
+LLM provider layer
+==================
+`handle_chat` and `get_ai_insights` talk to the model through a provider so the
+backend can be swapped without touching the agent:
+
+- groq    : Groq's OpenAI-compatible API (default)
+- openai  : any OpenAI-compatible base URL (LLM_BASE_URL), e.g. a local vLLM/Ollama
+- local   : deterministic rules, no network — for offline runs and benchmarks
+- replay  : serves stored completions by prompt hash (LLM_REPLAY_DIR)
+- record  : calls LLM_RECORD_UPSTREAM (default groq) and stores every completion
+
+Select with LLM_PROVIDER. Every provider returns the completion text, or None
+when no answer is available so callers can use their fallback responses.
+
+Network providers are wrapped in a circuit breaker (LLM_BREAKER_* settings):
+once the recent failure rate crosses the threshold, or the upstream answers
+429 with Retry-After, calls fail fast until a half-open probe succeeds.
+"""
+import os
+import re
+import sys
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+import requests as http
+
+from . import metrics
+from .prompt_budget import estimate_tokens
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+
+
+class LLMError(Exception):
+    """A failed completion. `retry_after` is in seconds when the upstream asked us to back off."""
+
+    def __init__(self, message: str, retry_after: float | None = None, transient: bool = True):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.transient = transient  # False for local misconfiguration (no key, no recording)
+
+
+_usage = threading.local()
+
+
+def _set_usage(prompt_tokens: int, completion_tokens: int, estimated: bool):
+    _usage.value = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "estimated": estimated}
+
+
+def last_usage() -> dict | None:
+    """Token usage of the last completion on this thread (reported by the API, else estimated)."""
+    return getattr(_usage, "value", None)
+
+
+class LLMProvider:
+    name = "base"
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        """Return the completion or raise LLMError."""
+        raise NotImplementedError
+
+    def available(self) -> bool:
+        """False when a call is known to fail fast right now (open circuit)."""
+        return True
+
+    def complete(self, system_prompt: str, user_message: str) -> str | None:
+        _usage.value = None
+        try:
+            completion = self.generate(system_prompt, user_message)
+            if last_usage() is None:
+                _set_usage(estimate_tokens(system_prompt) + estimate_tokens(user_message),
+                           estimate_tokens(completion), estimated=True)
+            return completion
+        except LLMError as e:
+            sys.stderr.write(f"[{self.name.title()}] {str(e)}\n")
+            return None
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ── OpenAI-compatible HTTP providers ─────────────────────────────────────────
+
+class OpenAICompatibleProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, base_url: str, api_key: str = "", model: str = "", timeout: float = 30):
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.model = model
+        self.timeout = timeout
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        body = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": 0.2,  # Lower temperature for better JSON accuracy
+            "max_tokens": 1024
+        }
+
+        try:
+            resp = http.post(self.url, headers=headers, json=body, timeout=self.timeout)
+        except http.exceptions.Timeout:
+            raise LLMError(f"Request timeout ({self.timeout:g}s)")
+        except http.exceptions.ConnectionError as ce:
+            raise LLMError(f"Connection error: {str(ce)}")
+        except Exception as e:
+            raise LLMError(f"Unexpected error: {str(e)}")
+
+        if resp.status_code == 200:
+            try:
+                payload = resp.json()
+                content = payload["choices"][0]["message"]["content"].strip()
+            except (KeyError, IndexError, ValueError) as je:
+                raise LLMError(f"Response parsing error: {str(je)}")
+            usage = payload.get("usage") or {}
+            if "prompt_tokens" in usage:
+                _set_usage(int(usage["prompt_tokens"]), int(usage.get("completion_tokens", 0)), estimated=False)
+            if not content:
+                raise LLMError("Empty response content")
+            return content
+
+        if resp.status_code == 401:
+            raise LLMError("Authentication failed - check the API key")
+        if resp.status_code == 429:
+            raise LLMError("Rate limit exceeded", retry_after=_parse_retry_after(resp.headers.get("Retry-After")))
+        raise LLMError(f"Error {resp.status_code}: {resp.text[:200]}",
+                       retry_after=_parse_retry_after(resp.headers.get("Retry-After")))
+
+
+class GroqProvider(OpenAICompatibleProvider):
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str, timeout: float = 30):
+        super().__init__(os.environ.get("LLM_BASE_URL", GROQ_BASE_URL), api_key, model, timeout)
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        if not self.api_key:
+            raise LLMError("Missing GROQ_API_KEY - set it in .env file", transient=False)
+        return super().generate(system_prompt, user_message)
+
+
+# ── Local deterministic provider ─────────────────────────────────────────────
+
+_AMOUNT_RE = re.compile(r"(?:₹|rs\.?\s*|inr\s*)?(\d+(?:,\d{3})*(?:\.\d+)?)", re.I)
+_INCOME_WORDS = ("salary", "got", "received", "earned", "income", "bonus", "freelance")
+_CATEGORY_WORDS = {
+    "food": "Food & Dining", "lunch": "Food & Dining", "dinner": "Food & Dining",
+    "grocer": "Groceries", "uber": "Transport", "bus": "Transport", "transport": "Transport",
+    "fuel": "Transport", "rent": "Rent", "movie": "Entertainment", "bill": "Utilities",
+    "doctor": "Health", "medicine": "Health", "shopping": "Shopping", "salary": "Salary",
+}
+
+
+class LocalRulesProvider(LLMProvider):
+    """Keyword rules that mimic the model's output format. No network, always deterministic."""
+    name = "local"
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        text = user_message.lower()
+
+        # Insights prompt: "Spend: ₹x | Income: ₹y | Proj: ₹z"
+        if "[[ACTION]]" not in system_prompt:
+            nums = [float(n) for n in re.findall(r"₹([\d.]+)", user_message)]
+            spend, income = (nums + [0, 0])[:2]
+            ratio = (spend / income * 100) if income else 0
+            return (f"- 📊 You have spent ₹{spend:,.2f} against ₹{income:,.2f} income ({ratio:.0f}%).\n"
+                    f"- 💡 {'Slow down on discretionary spending.' if ratio > 80 else 'You are on track this month.'}")
+
+        # Second leg of a tool round trip: phrase the computed results
+        if "TOOL RESULTS" in user_message:
+            payload = user_message.split("TOOL RESULTS (computed from the database):\n", 1)[-1].split("\n", 1)[0]
+            try:
+                results = json.loads(payload)
+            except json.JSONDecodeError:
+                return "I couldn't read the computed results."
+            lines = []
+            for r in results:
+                data = r.get("result")
+                if r.get("tool") == "category_total" and data:
+                    lines.append(f"**{data['category']}**: ₹{data['total']:,.2f} across {data['count']} "
+                                 f"transactions ({data['from']} → {data['to']}).")
+                else:
+                    lines.append(f"{r.get('tool')}: {json.dumps(data if data is not None else r.get('error'))}")
+            return "\n".join(lines)
+
+        if text.startswith(("how much", "what did i spend", "total")):
+            category = next((c for w, c in _CATEGORY_WORDS.items() if w in text), None)
+            if category:
+                return f'[[TOOL]]{json.dumps({"name": "category_total", "args": {"category": category}})}[[TOOL]]'
+
+        if any(w in text for w in ("undo", "delete last", "remove last")):
+            return 'Removing your last entry. [[ACTION]]{"type": "delete"}[[ACTION]]'
+
+        match = _AMOUNT_RE.search(text)
+        if not match:
+            return "I can log expenses and income for you — try \"spent 250 on food\"."
+
+        amount = float(match.group(1).replace(",", ""))
+        category = next((c for w, c in _CATEGORY_WORDS.items() if w in text), "Other")
+        if "limit" in text or "budget" in text:
+            return f'Setting your budget. [[ACTION]]{json.dumps({"type": "limit", "category": category, "amount": amount})}[[ACTION]]'
+
+        tx_type = "income" if any(w in text for w in _INCOME_WORDS) else "expense"
+        action = {"type": "add", "tx_type": tx_type, "amount": amount, "category": category, "note": ""}
+        return f"Logging that now. [[ACTION]]{json.dumps(action)}[[ACTION]]"
+
+
+# ── Record / replay ──────────────────────────────────────────────────────────
+
+def prompt_hash(system_prompt: str, user_message: str) -> str:
+    return hashlib.sha256(f"{system_prompt}\x00{user_message}".encode("utf-8")).hexdigest()
+
+
+class RecordReplayProvider(LLMProvider):
+    """Replays stored completions by prompt hash; in record mode fills the store from `upstream`."""
+
+    def __init__(self, store_dir: str, record: bool = False, upstream: LLMProvider | None = None):
+        self.store_dir = store_dir
+        self.record = record
+        self.upstream = upstream
+        self.name = "record" if record else "replay"
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        key = prompt_hash(system_prompt, user_message)
+        path = self._path(key)
+
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)["completion"]
+
+        if not self.upstream:
+            raise LLMError(f"No stored completion for {key[:12]}", transient=False)
+
+        completion = self.upstream.generate(system_prompt, user_message)
+        if self.record:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"system": system_prompt, "user": user_message, "completion": completion},
+                          f, ensure_ascii=False, indent=2)
+        return completion
+
+
+# ── Circuit breaker ──────────────────────────────────────────────────────────
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+metrics.describe("trackex_llm_circuit_state", "gauge", "LLM circuit breaker state (0=closed, 1=half-open, 2=open)")
+metrics.describe("trackex_llm_calls_total", "counter", "LLM calls by outcome (success, failure, rejected)")
+
+
+class CircuitBreakerProvider(LLMProvider):
+    """Fails fast while the wrapped provider is unhealthy.
+
+    Tracks outcomes over a sliding `window` seconds. The circuit opens when at
+    least `min_calls` calls were made and the failure rate reached
+    `failure_rate`, or immediately when the upstream sends Retry-After. After
+    `cooldown` seconds (or the Retry-After) a single probe call is let through;
+    its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, inner: LLMProvider, failure_rate: float = 0.5, min_calls: int = 5,
+                 window: float = 60, cooldown: float = 30):
+        self.inner = inner
+        self.name = inner.name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._outcomes = deque()  # (timestamp, ok)
+        self._state = CLOSED
+        self._open_until = 0.0
+        self._probing = False
+        self._export()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def available(self) -> bool:
+        with self._lock:
+            return not (self._state == OPEN and time.time() < self._open_until)
+
+    def _export(self):
+        metrics.set_gauge("trackex_llm_circuit_state", _STATE_VALUE[self._state], provider=self.name)
+
+    def _transition(self, state: str):
+        if state != self._state:
+            sys.stderr.write(f"[Breaker] {self.name}: {self._state} -> {state}\n")
+            self._state = state
+            self._export()
+
+    def _admit(self) -> bool:
+        with self._lock:
+            now = time.time()
+            if self._state == OPEN:
+                if now < self._open_until:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def _record(self, ok: bool, retry_after: float | None = None):
+        with self._lock:
+            now = time.time()
+            was_probe, self._probing = self._probing, False
+
+            if ok:
+                if was_probe or self._state == HALF_OPEN:
+                    self._outcomes.clear()
+                    self._transition(CLOSED)
+                self._outcomes.append((now, True))
+            else:
+                self._outcomes.append((now, False))
+
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            if ok:
+                return
+
+            failures = sum(1 for _, good in self._outcomes if not good)
+            tripped = (retry_after is not None or was_probe or
+                       (len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate))
+            if tripped:
+                self._open_until = now + (retry_after if retry_after is not None else self.cooldown)
+                self._transition(OPEN)
+
+    def generate(self, system_prompt: str, user_message: str) -> str:
+        if not self._admit():
+            metrics.inc("trackex_llm_calls_total", provider=self.name, outcome="rejected")
+            raise LLMError("Circuit open - skipping LLM call")
+        try:
+            result = self.inner.generate(system_prompt, user_message)
+        except LLMError as e:
+            if e.transient:
+                metrics.inc("trackex_llm_calls_total", provider=self.name, outcome="failure")
+                self._record(False, e.retry_after)
+            else:
+                with self._lock:
+                    self._probing = False
+            raise
+        except Exception as e:
+            metrics.inc("trackex_llm_calls_total", provider=self.name, outcome="failure")
+            self._record(False)
+            raise LLMError(f"Unexpected error: {str(e)}")
+        metrics.inc("trackex_llm_calls_total", provider=self.name, outcome="success")
+        self._record(True)
+        return result
+
+
+# ── Factory ──────────────────────────────────────────────────────────────────
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _build_raw(name: str) -> LLMProvider:
+    name = (name or "groq").lower()
+    model = os.environ.get("MODEL_NAME", "llama-3.3-70b-versatile")
+    timeout = float(os.environ.get("LLM_TIMEOUT", "30"))
+
+    if name == "groq":
+        return GroqProvider(os.environ.get("GROQ_API_KEY", "").strip(), model, timeout)
+    if name == "openai":
+        return OpenAICompatibleProvider(os.environ.get("LLM_BASE_URL", "http://127.0.0.1:8000/v1"),
+                                        os.environ.get("LLM_API_KEY", "").strip(), model, timeout)
+    if name == "local":
+        return LocalRulesProvider()
+    if name in ("replay", "record"):
+        store = os.environ.get("LLM_REPLAY_DIR", os.path.join("instance", "llm_replay"))
+        upstream_name = os.environ.get("LLM_RECORD_UPSTREAM" if name == "record" else "LLM_REPLAY_FALLBACK")
+        if name == "record":
+            upstream_name = upstream_name or "groq"
+        upstream = _build_raw(upstream_name) if upstream_name else None
+        return RecordReplayProvider(store, record=(name == "record"), upstream=upstream)
+    raise ValueError(f"Unknown LLM_PROVIDER '{name}'. Valid providers: groq, openai, local, replay, record.")
+
+
+def build_provider(name: str) -> LLMProvider:
+    """Build the named provider; anything that may touch the network gets a circuit breaker."""
+    provider = _build_raw(name)
+    if isinstance(provider, LocalRulesProvider):
+        return provider
+    return CircuitBreakerProvider(
+        provider,
+        failure_rate=float(os.environ.get("LLM_BREAKER_FAILURE_RATE", "0.5")),
+        min_calls=int(os.environ.get("LLM_BREAKER_MIN_CALLS", "5")),
+        window=float(os.environ.get("LLM_BREAKER_WINDOW", "60")),
+        cooldown=float(os.environ.get("LLM_BREAKER_COOLDOWN", "30")),
+    )
+
+
+def get_provider() -> LLMProvider:
+    """Process-wide provider chosen by LLM_PROVIDER."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = build_provider(os.environ.get("LLM_PROVIDER", "groq"))
+    return _provider
+
+
+def set_provider(provider: LLMProvider | None):
+    """Override the process-wide provider (None re-reads LLM_PROVIDER on next use)."""
+    global _provider
+    _provider = provider
@@ -0,0 +1,148 @@
+"""
+Long-term AI memory
+===================
+Durable facts the user tells the assistant ("call me Asha", "I get paid on the
+1st", "I'm saving for a bike") are extracted from each chat message once it has
+been answered and stored in `ai_memory` in one commit. Only the top-k memories relevant to the current message go
+into the chat prompt, looked up through a per-user full-text index:
+
+- SQLite:   an FTS5 table `ai_memory_fts` kept in sync by triggers; every row
+            carries an owner token (u<user_id>) so a lookup only walks that
+            user's postings, ranked with bm25
+- Postgres: a generated `search` tsvector column with a GIN index, ranked
+            with ts_rank
+- anything else (or SQLite built without FTS5): the k most recent memories
+
+Retrieval cost depends on k and the query terms, not on how many memories
+a user has accumulated.
+"""
+import re
+import sys
+from flask import current_app, g
+from sqlalchemy import text
+
+from .extensions import db
+from .migrations import target_engine
+from .models import AIMemory, store_ai_memories
+from .search import ensure_fts
+
+MEMORY_TOP_K = 5
+MAX_MEMORY_CHARS = 300
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "i", "me", "my", "you", "your", "is", "am", "are",
+    "was", "were", "be", "to", "of", "in", "on", "for", "at", "it", "this", "that", "what",
+    "how", "much", "many", "do", "did", "does", "can", "could", "should", "would", "will",
+    "please", "with", "from", "about", "so", "far", "have", "has", "had", "any", "some",
+    "show", "tell", "give", "get", "there", "here", "just", "all", "we", "us", "our",
+}
+
+# (key, pattern) — group 1 is the fact worth keeping
+_EXTRACTORS = [
+    ("name", re.compile(r"\b(?:my name is|call me)\s+([A-Za-z][A-Za-z'-]*(?:\s+(?-i:[A-Z])[A-Za-z'-]*)?)", re.I)),
+    ("income", re.compile(r"\b((?:my (?:salary|income|pay|stipend) is|i (?:earn|make|get paid)|i'm paid|i am paid)\b.+)", re.I)),
+    ("goal", re.compile(r"\b((?:my goal is|i(?:'m| am) saving (?:up )?for|i want to save|i plan to save)\b.+)", re.I)),
+    ("preference", re.compile(r"\b(i (?:prefer|like|love|hate|don't like|do not like|usually|always|never)\b.+)", re.I)),
+    ("preference", re.compile(r"\b((?:always|never)\s+(?:show|use|give|send|put|categori[sz]e|count|treat)\b.+)", re.I)),
+    ("profile", re.compile(r"\b(i(?:'m| am) an? (?:student|freelancer|employee|engineer|teacher|doctor|retiree|retired)\b.*|i live in\b.+|i work (?:at|as|in)\b.+)", re.I)),
+    ("note", re.compile(r"\b(?:please\s+)?remember\s+(?:that\s+)?(.+)", re.I)),  # after the specific keys
+]
+
+
+def _clean(fact: str) -> str:
+    fact = re.split(r"(?<=[.!?])\s|\n", fact.strip(), maxsplit=1)[0]
+    return fact.strip(" .,!?;:")[:MAX_MEMORY_CHARS]
+
+
+def extract_memories(message: str) -> list:
+    """[(key, content)] of durable facts stated in a chat message."""
+    found = []
+    for key, pattern in _EXTRACTORS:
+        match = pattern.search(message or "")
+        if match:
+            fact = _clean(match.group(1))
+            if len(fact) >= 2 and all(fact != f for _, f in found):
+                found.append((key, fact))
+    return found
+
+
+def remember_from_message(message: str) -> int:
+    """Store any durable facts from `message` in one commit; returns how many were found."""
+    facts = extract_memories(message)
+    if facts:
+        try:
+            store_ai_memories(facts)
+        except Exception as e:
+            db.session.rollback()
+            sys.stderr.write(f"[Memory] store failed: {str(e)}\n")
+    return len(facts)
+
+
+# ── Search index ──────────────────────────────────────────────────────────────
+
+_POSTGRES_DDL = [
+    "ALTER TABLE ai_memory ADD COLUMN IF NOT EXISTS search tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', key || ' ' || content)) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_ai_memory_search ON ai_memory USING GIN (search)",
+]
+
+
+def init_memory_index(app):
+    """Create the full-text index for ai_memory (idempotent). Call after create_all."""
+    mode = "recent"
+    try:
+        with target_engine().begin() as conn:
+            dialect = target_engine().dialect.name
+            if dialect == "sqlite":
+                ensure_fts(conn, "ai_memory_fts", "ai_memory",
+                           "'u' || {row}.user_id", "{row}.key || ' ' || {row}.content")
+                mode = "fts5"
+            elif dialect == "postgresql":
+                for stmt in _POSTGRES_DDL:
+                    conn.execute(text(stmt))
+                mode = "tsvector"
+    except Exception as e:
+        sys.stderr.write(f"[Memory] full-text index unavailable, using recent memories: {str(e)}\n")
+    app.extensions["memory_search"] = mode
+    return mode
+
+
+def _terms(message: str) -> list:
+    words = re.findall(r"[a-z][a-z0-9]+", (message or "").lower())
+    terms = []
+    for w in words:
+        if w not in _STOPWORDS and w not in terms:
+            terms.append(w)
+    return terms[:12]
+
+
+def _recent(user_id, k):
+    rows = AIMemory.query.filter_by(user_id=user_id)\
+        .order_by(AIMemory.created_at.desc(), AIMemory.id.desc()).limit(k).all()
+    return [{"key": r.key, "content": r.content} for r in rows]
+
+
+def search_memories(message: str, k: int = MEMORY_TOP_K) -> list:
+    """Top-k memories for the current user ranked by relevance to `message`.
+
+    Falls back to the k most recent memories when nothing matches.
+    """
+    user_id = g.user["id"]
+    mode = current_app.extensions.get("memory_search", "recent")
+    terms = _terms(message)
+    rows = []
+    if terms and mode == "fts5":
+        query = f"owner:u{int(user_id)} AND body:(" + " OR ".join(f'"{t}"' for t in terms) + ")"
+        rows = db.session.execute(text(
+            "SELECT m.key, m.content FROM ai_memory_fts JOIN ai_memory m ON m.id = ai_memory_fts.rowid "
+            "WHERE ai_memory_fts MATCH :q ORDER BY bm25(ai_memory_fts, 0.0, 1.0) LIMIT :k"
+        ), {"q": query, "k": k}).all()
+    elif terms and mode == "tsvector":
+        rows = db.session.execute(text(
+            "SELECT key, content FROM ai_memory, to_tsquery('english', :q) query "
+            "WHERE user_id = :uid AND search @@ query ORDER BY ts_rank(search, query) DESC LIMIT :k"
+        ), {"q": " | ".join(f"{t}:*" for t in terms), "uid": user_id, "k": k}).all()
+
+    if rows:
+        return [{"key": key, "content": content} for key, content in rows]
+    return _recent(user_id, k)
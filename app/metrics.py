@@ -0,0 +1,60 @@
+"""
+In-process metrics
+==================
+A tiny thread-safe registry of counters and gauges, rendered in the
+Prometheus text format at /metrics. Values are per process.
+"""
+import threading
+
+_lock = threading.Lock()
+_counters = {}   # (name, labels) -> float
+_gauges = {}     # (name, labels) -> float
+_help = {}       # name -> (type, help text)
+
+
+def _key(name: str, labels: dict | None):
+    return name, tuple(sorted((labels or {}).items()))
+
+
+def describe(name: str, kind: str, text: str):
+    _help[name] = (kind, text)
+
+
+def inc(name: str, value: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name: str, value: float, **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def snapshot() -> dict:
+    """Flat {'name{label="x"}': value} view, handy for JSON debugging."""
+    with _lock:
+        items = list(_counters.items()) + list(_gauges.items())
+    return {_series(name, labels): value for (name, labels), value in items}
+
+
+def _series(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def render_prometheus() -> str:
+    with _lock:
+        series = [(k, v, "counter") for k, v in _counters.items()] + [(k, v, "gauge") for k, v in _gauges.items()]
+
+    lines, seen = [], set()
+    for (name, labels), value, kind in sorted(series, key=lambda s: s[0]):
+        if name not in seen:
+            seen.add(name)
+            kind, text = _help.get(name, (kind, ""))
+            if text:
+                lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{_series(name, labels)} {value:g}")
+    return "\n".join(lines) + "\n"
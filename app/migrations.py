@@ -0,0 +1,333 @@
+"""
+Schema migrations
+=================
+`db.create_all()` only creates missing tables; it never alters one that
+already exists. Every change to an existing table is therefore a numbered
+migration in `MIGRATIONS`. Applied versions are recorded in
+`schema_migrations`, and `run_migrations()` (called by `init_db` on every
+boot, or by `migrate_db.py` as a deploy step) applies the pending ones in
+order, each once.
+
+Steps are plain SQL that works on SQLite and Postgres (or branches on the
+dialect, like migration 4) and run against `target_engine()`, so the same
+list migrates every user shard too. Each migration is idempotent: a fresh
+database already has the latest schema from create_all, so its migrations
+run as no-ops and are simply recorded. Migrations are not
+wrapped in one transaction (a backfill commits batch by batch), so a crash
+part-way is recovered by running the same migration again.
+
+Data backfills go through `backfill()`. Rows are updated in primary-key
+ranges of BACKFILL_CHUNK, each range in its own short transaction that also
+advances a checkpoint row in `schema_backfills`. No lock on the table is held
+longer than one batch, and a restarted backfill resumes after the last
+committed batch instead of rescanning from the start.
+"""
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+
+from sqlalchemy import inspect, text
+
+from .extensions import db
+
+BACKFILL_CHUNK = int(os.environ.get("BACKFILL_CHUNK", "5000"))
+BACKFILL_PAUSE = float(os.environ.get("BACKFILL_PAUSE", "0"))  # seconds between batches
+PROGRESS_EVERY = 20  # batches between progress lines
+
+_PG_LOCK_KEY = 0x7472656B  # pg_advisory_lock key shared by every process migrating this database
+
+schema_migrations = db.Table(
+    "schema_migrations",
+    db.Column("version", db.Integer, primary_key=True, autoincrement=False),
+    db.Column("name", db.String(100), nullable=False),
+    db.Column("applied_at", db.DateTime, nullable=False),
+)
+
+schema_backfills = db.Table(
+    "schema_backfills",
+    db.Column("name", db.String(100), primary_key=True),  # "table.column"
+    db.Column("last_id", db.BigInteger, nullable=False),
+    db.Column("rows_done", db.BigInteger, nullable=False, default=0),
+    db.Column("updated_at", db.DateTime, nullable=False),
+)
+
+MIGRATIONS = []
+
+_target = ContextVar("migration_target", default=None)
+
+
+def target_engine():
+    """The engine schema steps run against: db.engine, or a shard's inside on_engine()."""
+    return _target.get() or db.engine
+
+
+@contextmanager
+def on_engine(engine):
+    """Point migrations, partitions and search indexes at `engine` (see shards.py)."""
+    token = _target.set(engine)
+    try:
+        yield
+    finally:
+        _target.reset(token)
+
+
+def migration(version, name):
+    """Register `fn` as schema version `version`; versions must be unique and increasing."""
+    def register(fn):
+        assert not MIGRATIONS or version > MIGRATIONS[-1][0], "migration versions must increase"
+        MIGRATIONS.append((version, name, fn))
+        return fn
+    return register
+
+
+# ── Steps ─────────────────────────────────────────────────────────────────────
+
+def add_column(table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column is already there."""
+    if column in {c["name"] for c in inspect(target_engine()).get_columns(table)}:
+        return False
+    with target_engine().begin() as conn:
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    print(f"Added column {table}.{column}.")
+    return True
+
+
+def drop_index(name):
+    with target_engine().begin() as conn:
+        conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+def derive_column(table, column, source, value_sql):
+    """Postgres trigger that fills `table.column` from the legacy `source` column on writes that leave it unset.
+
+    `value_sql` is a template over `{row}`. Rows an older instance inserts
+    without `column`, or updates by `source` alone, get it derived in the
+    database. The BEFORE ROW trigger on a partitioned `transactions` is
+    passed on to every partition (Postgres 13+). SQLite runs a single
+    instance, so there is no rolling deploy to cover and the backfill alone
+    suffices; an AFTER trigger there would also race the full-text mirror
+    triggers (search.py) over the same row.
+    """
+    if target_engine().dialect.name != "postgresql":
+        return
+    name = f"derive_{table}_{column}"
+    value = value_sql.format(row="NEW")
+    with target_engine().begin() as conn:
+        conn.execute(text(
+            f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ BEGIN "
+            f"IF NEW.{column} IS NULL THEN NEW.{column} := {value}; "
+            f"ELSIF TG_OP = 'UPDATE' THEN "
+            f"IF NEW.{source} IS DISTINCT FROM OLD.{source} AND NEW.{column} IS NOT DISTINCT FROM OLD.{column} "
+            f"THEN NEW.{column} := {value}; END IF; "
+            f"END IF; RETURN NEW; END $$ LANGUAGE plpgsql"))
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {name} ON {table}"))
+        conn.execute(text(f"CREATE TRIGGER {name} BEFORE INSERT OR UPDATE ON {table} "
+                          f"FOR EACH ROW EXECUTE FUNCTION {name}()"))
+
+
+def backfill(table, column, value_sql, chunk_size=None):
+    """Set `table.column = value_sql` wherever it is still NULL; returns the rows changed.
+
+    Walks the table in primary-key ranges of `chunk_size` rows. Each range is
+    one transaction that updates the rows and moves the checkpoint past them.
+    The walk stops at the id that was highest when it began. Rows inserted
+    later are written with the column set by current code, or get it from
+    a `derive_column` trigger when an older instance writes them on
+    Postgres; create the trigger before the backfill so no row falls
+    between the two.
+    """
+    chunk_size = chunk_size or BACKFILL_CHUNK
+    name = f"{table}.{column}"
+    with target_engine().begin() as conn:
+        checkpoint = conn.execute(
+            text("SELECT last_id, rows_done FROM schema_backfills WHERE name = :name"), {"name": name}
+        ).first()
+        first, last = conn.execute(text(f"SELECT MIN(id) - 1, MAX(id) FROM {table}")).first()
+        if last is None:
+            return 0
+        if checkpoint is None:
+            after, done = first, 0
+            conn.execute(schema_backfills.insert().values(
+                name=name, last_id=after, rows_done=0, updated_at=datetime.utcnow()))
+        else:
+            after, done = checkpoint
+            print(f"Resuming backfill of {name} after id {after}.")
+
+    batches = 0
+    while after < last:
+        with target_engine().begin() as conn:
+            upto = conn.execute(text(
+                f"SELECT MAX(id) FROM (SELECT id FROM {table} WHERE id > :after AND id <= :last "
+                f"ORDER BY id LIMIT :n) AS chunk"
+            ), {"after": after, "last": last, "n": chunk_size}).scalar()
+            if upto is None:
+                break
+            done += conn.execute(text(
+                f"UPDATE {table} SET {column} = {value_sql} "
+                f"WHERE id > :after AND id <= :upto AND {column} IS NULL"
+            ), {"after": after, "upto": upto}).rowcount
+            conn.execute(schema_backfills.update().where(schema_backfills.c.name == name).values(
+                last_id=upto, rows_done=done, updated_at=datetime.utcnow()))
+        after = upto
+        batches += 1
+        if batches % PROGRESS_EVERY == 0:
+            print(f"Backfilling {name}: {done} rows, id {after} of {last}.")
+        if BACKFILL_PAUSE:
+            time.sleep(BACKFILL_PAUSE)
+
+    with target_engine().begin() as conn:
+        conn.execute(schema_backfills.delete().where(schema_backfills.c.name == name))
+    if done:
+        print(f"Backfilled {done} {name} values.")
+    return done
+
+
+# ── Migrations ────────────────────────────────────────────────────────────────
+
+@migration(1, "user profile columns")
+def _user_profile_columns():
+    add_column("users", "full_name", "VARCHAR(100)")
+    add_column("users", "bio", "TEXT")
+    add_column("users", "phone", "VARCHAR(20)")
+    add_column("users", "avatar_url", "VARCHAR(255)")
+    add_column("users", "currency", "VARCHAR(10) DEFAULT 'INR'")
+    add_column("users", "created_at", "TIMESTAMP")
+
+
+@migration(2, "integer paise money columns")
+def _money_paise_columns():
+    add_column("transactions", "amount_paise", "BIGINT")
+    add_column("limits", "monthly_limit_paise", "BIGINT")
+    backfill("transactions", "amount_paise", "CAST(ROUND(amount * 100) AS BIGINT)")
+    backfill("limits", "monthly_limit_paise", "CAST(ROUND(monthly_limit * 100) AS BIGINT)")
+
+
+_CATEGORY_ID_SQL = "(SELECT categories.id FROM categories WHERE categories.name = {row}.category)"
+
+
+def _backfill_category_ids():
+    from .models import category_index, seed_categories
+    # Names outside the seed whitelist get their own rows, so no row is left without an id
+    with target_engine().connect() as conn:
+        legacy = conn.execute(text(
+            "SELECT category, MIN(type) FROM transactions WHERE category_id IS NULL GROUP BY category "
+            "UNION SELECT category, 'expense' FROM limits WHERE category_id IS NULL"
+        )).all()
+    known = category_index().valid
+    unknown = {name: kind for name, kind in legacy if name not in known}
+    if unknown:
+        seed_categories(extra=sorted(unknown.items()))
+
+    for table in ("transactions", "limits"):
+        backfill(table, "category_id", _CATEGORY_ID_SQL.format(row=table))
+
+
+@migration(3, "category dimension ids")
+def _category_dimension_ids():
+    add_column("transactions", "category_id", "SMALLINT REFERENCES categories(id)")
+    add_column("limits", "category_id", "SMALLINT REFERENCES categories(id)")
+    _backfill_category_ids()
+    drop_index("ix_transactions_user_category_date")  # replaced by ix_transactions_user_category_id_date
+
+
+@migration(4, "hot/cold transaction storage")
+def _transaction_storage():
+    from .partitions import create_archive, partition_transactions
+    if target_engine().dialect.name == "postgresql":
+        partition_transactions()
+    elif target_engine().dialect.name == "sqlite":
+        create_archive()
+
+
+@migration(5, "user shard directory")
+def _user_shard_directory():
+    add_column("users", "shard", "SMALLINT")  # NULL: shard 0, where every user lived before sharding
+    add_column("users", "shard_target", "SMALLINT")  # set while rebalance_shards.py moves the user
+    add_column("users", "shard_moves", "INTEGER DEFAULT 0")
+
+
+@migration(6, "per-user sync sequence")
+def _per_user_sync_sequence():
+    # Old rows keep seq NULL and are never replayed: their cursors no longer
+    # parse, so every client takes one full snapshot. upgrade_schema then
+    # creates ux_change_log_user_seq, and create_all the sync_sequences table.
+    add_column("change_log", "seq", "BIGINT")
+    drop_index("ix_change_log_user_seq")  # (user_id, id): the id is no longer the cursor
+
+
+@migration(7, "derive paise from legacy amounts")
+def _derive_paise():
+    # Old instances still running through a rolling deploy insert and update
+    # `amount` alone. The triggers cover their writes from here on; the
+    # second backfill catches rows they wrote after migration 2's pass (and
+    # is all SQLite needs, see derive_column).
+    for table, column, source in (("transactions", "amount_paise", "amount"),
+                                  ("limits", "monthly_limit_paise", "monthly_limit")):
+        derive_column(table, column, source, f"CAST(ROUND({{row}}.{source} * 100) AS BIGINT)")
+        backfill(table, column, f"CAST(ROUND({source} * 100) AS BIGINT)")
+
+
+@migration(8, "derive category ids from legacy names")
+def _derive_category_ids():
+    # As migration 7, for the category name old instances write without an id
+    for table in ("transactions", "limits"):
+        derive_column(table, "category_id", "category", _CATEGORY_ID_SQL)
+    _backfill_category_ids()
+
+
+@migration(9, "monotonic transaction ids")
+def _monotonic_transaction_ids():
+    # Postgres sequences never go back; SQLite reused max(id) + 1, see use_autoincrement
+    from .partitions import use_autoincrement
+    if target_engine().dialect.name == "sqlite":
+        use_autoincrement()
+
+
+# ── Runner ────────────────────────────────────────────────────────────────────
+
+@contextmanager
+def _migration_lock():
+    """Serialize concurrent boots on Postgres; SQLite has a single writer anyway."""
+    if target_engine().dialect.name != "postgresql":
+        yield
+        return
+    with target_engine().connect() as conn:
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _PG_LOCK_KEY})
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _PG_LOCK_KEY})
+            conn.commit()
+
+
+def applied_versions():
+    with target_engine().connect() as conn:
+        return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(target=None):
+    """Apply pending migrations up to `target` (default: all). Returns the versions applied."""
+    applied = []
+    with _migration_lock():
+        done = applied_versions()  # re-read: another process may have migrated while we waited
+        for version, name, fn in MIGRATIONS:
+            if version in done or (target is not None and version > target):
+                continue
+            print(f"Applying migration {version:04d} {name}...")
+            fn()
+            with target_engine().begin() as conn:
+                conn.execute(schema_migrations.insert().values(
+                    version=version, name=name, applied_at=datetime.utcnow()))
+            applied.append(version)
+    return applied
+
+
+def migration_status():
+    """[(version, name, applied_at or None)] plus in-flight backfill checkpoints."""
+    with target_engine().connect() as conn:
+        applied = dict(conn.execute(text("SELECT version, applied_at FROM schema_migrations")).all())
+        backfills = conn.execute(text("SELECT name, last_id, rows_done, updated_at FROM schema_backfills")).all()
+    return [(version, name, applied.get(version)) for version, name, _ in MIGRATIONS], backfills
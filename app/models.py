@@ -1,6 +1,24 @@
+import os
 from datetime import datetime
 from .extensions import db
-from flask import g
+from sqlalchemy import delete, Column, MetaData, Table
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+from flask import g, current_app
+from .columnar import encode_columns
+from .money import to_rupees
+from . import txcache
+
+# Seed rows for the `categories` table, in id order. At runtime the table is
+# the whitelist (see category_index); /api/categories serves it to the frontend.
+INCOME_CATEGORIES = ['Salary', 'Freelance', 'Investment', 'Gift', 'Rent Income', 'Business', 'Bonus', 'Other Income']
+EXPENSE_CATEGORIES = [
+    'Groceries', 'Food & Dining', 'Transport', 'Rent', 'Utilities',
+    'Health', 'Entertainment', 'Education', 'Shopping', 'Travel',
+    'EMI / Loan', 'Subscriptions', 'Other'
+]
+VALID_CATEGORIES = INCOME_CATEGORIES + EXPENSE_CATEGORIES
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -15,28 +33,55 @@ class User(db.Model):
     avatar_url = db.Column(db.String(255))
     currency = db.Column(db.String(10), default='INR')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Shard directory (see shards.py); meaningful on shard 0 only
+    shard = db.Column(db.SmallInteger)
+    shard_target = db.Column(db.SmallInteger)
+    shard_moves = db.Column(db.Integer, default=0)
     
     transactions = db.relationship('Transaction', backref='user', lazy=True)
     limits = db.relationship('Limit', backref='user', lazy=True)
     memories = db.relationship('AIMemory', backref='user', lazy=True)
 
+class Category(db.Model):
+    """Category dimension. Transactions and limits reference it by small-int id;
+    ids are assigned explicitly (seed order, then max + 1)."""
+    __tablename__ = 'categories'
+    id = db.Column(db.SmallInteger, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(50), unique=True, nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # 'income' or 'expense'
+
 class Transaction(db.Model):
     __tablename__ = 'transactions'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     type = db.Column(db.String(10), nullable=False) # 'income' or 'expense'
-    category = db.Column(db.String(50), nullable=False)
-    amount = db.Column(db.Float, nullable=False)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey('categories.id'))
+    amount_paise = db.Column(db.BigInteger)  # integer minor units, see money.py
+    # Pre-paise / pre-dimension columns: still written so instances on older
+    # releases stay correct during a rolling deploy, never read.
+    legacy_amount = db.Column('amount', db.Float, nullable=False)
+    legacy_category = db.Column('category', db.String(50), nullable=False)
     note = db.Column(db.Text, default='')
     date = db.Column(db.String(20), nullable=False) # Stored as string for now to match current logic
+    __table_args__ = (
+        # Every per-user query filters on a date range or month prefix
+        db.Index('ix_transactions_user_date', 'user_id', 'date'),
+        db.Index('ix_transactions_user_category_id_date', 'user_id', 'category_id', 'date'),
+        db.Index('ix_transactions_user_type_date', 'user_id', 'type', 'date'),
+        # SQLite: never reuse an id, one may still live in transactions_archive (see partitions.py)
+        {"sqlite_autoincrement": True},
+    )
 
 class Limit(db.Model):
     __tablename__ = 'limits'
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-    monthly_limit = db.Column(db.Float, nullable=False)
-    __table_args__ = (db.UniqueConstraint('user_id', 'category', name='_user_category_uc'),)
+    category_id = db.Column(db.SmallInteger, db.ForeignKey('categories.id'))
+    monthly_limit_paise = db.Column(db.BigInteger)
+    # see Transaction.legacy_amount
+    legacy_monthly_limit = db.Column('monthly_limit', db.Float, nullable=False)
+    legacy_category = db.Column('category', db.String(50), nullable=False)
+    __table_args__ = (db.Index('ux_limits_user_category_id', 'user_id', 'category_id', unique=True),)
 
 class AIMemory(db.Model):
     __tablename__ = 'ai_memory'
@@ -45,162 +90,426 @@ class AIMemory(db.Model):
     key = db.Column(db.String(50), nullable=False)
     content = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    __table_args__ = (db.UniqueConstraint('user_id', 'key', 'content', name='_user_key_content_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', 'content', name='_user_key_content_uc'),
+        db.Index('ix_ai_memory_user_created', 'user_id', 'created_at'),
+    )
+
+class ChangeLog(db.Model):
+    """Append-only log of transaction/limit writes. `seq` is the user's sync sequence
+    (see _next_seq); rows with op='delete' are the tombstones clients replay from /api/sync."""
+    __tablename__ = 'change_log'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    seq = db.Column(db.BigInteger)  # NULL on rows logged before per-user sequences
+    entity = db.Column(db.String(20), nullable=False)  # 'transaction' or 'limit'
+    entity_key = db.Column(db.String(50), nullable=False)  # transaction id or limit category
+    op = db.Column(db.String(10), nullable=False)  # 'upsert' or 'delete'
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.Index('ux_change_log_user_seq', 'user_id', 'seq', unique=True),)
+
+class SyncSequence(db.Model):
+    """Last ChangeLog.seq handed out per user; lives on the user's shard with their log."""
+    __tablename__ = 'sync_sequences'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True, autoincrement=False)
+    seq = db.Column(db.BigInteger, nullable=False, default=0)
+
+# ── Category dimension ──────────────────────────────────────────────────────────
+
+class CategoryIndex:
+    """In-process copy of the (small, rarely changing) categories table."""
+
+    def __init__(self, rows):
+        rows = sorted(rows)
+        self.names = {cid: name for cid, name, _ in rows}
+        self.ids = {name: cid for cid, name, _ in rows}
+        self.kinds = {name: kind for _, name, kind in rows}
+        self.ordered = [name for _, name, _ in rows]
+        self.valid = frozenset(self.ordered)
+        self.by_lower = {name.lower(): name for name in self.ordered}
+
+def category_index():
+    """The current app's CategoryIndex, loaded on first use."""
+    index = current_app.extensions.get("categories")
+    if index is None:
+        index = CategoryIndex(db.session.query(Category.id, Category.name, Category.kind).all())
+        current_app.extensions["categories"] = index
+    return index
+
+def seed_categories(extra=()):
+    """Insert any missing seed categories (plus `extra` (name, kind) pairs) and reload the index."""
+    existing = {name for (name,) in db.session.query(Category.name).all()}
+    next_id = (db.session.query(db.func.max(Category.id)).scalar() or 0) + 1
+    seeds = [(name, 'income') for name in INCOME_CATEGORIES] + [(name, 'expense') for name in EXPENSE_CATEGORIES]
+    for name, kind in seeds + list(extra):
+        if name not in existing:
+            db.session.add(Category(id=next_id, name=name, kind=kind))
+            existing.add(name)
+            next_id += 1
+    db.session.commit()
+    current_app.extensions["categories"] = None
+
+# ── Hot/cold storage (see partitions.py) ────────────────────────────────────────
+
+HOT_MONTHS = int(os.environ.get("HOT_MONTHS", "3"))  # the current month and the ones before it
+
+def hot_since():
+    """First day of the oldest hot month, e.g. '2026-08-01' in October with HOT_MONTHS=3."""
+    now = datetime.now()
+    y, m = divmod(now.year * 12 + now.month - HOT_MONTHS, 12)
+    return f"{y:04d}-{m + 1:02d}-01"
+
+# SQLite keeps closed months in transactions_archive and reads all time through
+# the transactions_all view. Both are created by a migration, not create_all.
+_storage = MetaData()
+TX_STORAGE_COLUMNS = [c.name for c in Transaction.__table__.columns]
+archived_transactions = Table("transactions_archive", _storage,
+                              *[Column(c.name, c.type) for c in Transaction.__table__.columns])
+_transactions_all = Table("transactions_all", _storage,
+                          *[Column(c.name, c.type) for c in Transaction.__table__.columns])
+AllTransactions = aliased(Transaction, _transactions_all, adapt_on_names=True)
+
+def _archives():
+    return db.session.get_bind().dialect.name == "sqlite"
+
+def _user_has_archive():
+    """Whether the current user has archived rows; one indexed probe per request."""
+    if "tx_archived" not in g:
+        g.tx_archived = db.session.query(archived_transactions.c.id)\
+            .filter(archived_transactions.c.user_id == g.user["id"]).first() is not None
+    return g.tx_archived
+
+def tx_source(date_from=None):
+    """Entity to read transactions dated `date_from` or later from (None: all time).
+
+    Postgres partitions `transactions` itself, so that is always the answer. On
+    SQLite a range starting before the hot window needs the hot+archive view,
+    unless the user has nothing archived.
+    """
+    if not _archives() or (date_from and date_from >= hot_since()) or not _user_has_archive():
+        return Transaction
+    return AllTransactions
+
+def _tx_tables():
+    """Every table a transaction row can live in, for writes by id or filter."""
+    return [Transaction.__table__, archived_transactions] if _archives() else [Transaction.__table__]
 
 # ── helper functions (converted to ORM) ──────────────────────────────────────────────
 
-def fetch_all_transactions(limit=None, tx_type=None, month=None):
-    user_id = g.user["id"]
-    query = Transaction.query.filter_by(user_id=user_id)
+def _month_range(month):
+    """'2026-03' -> ('2026-03-01', '2026-03-31'); string bounds work for YYYY-MM-DD dates."""
+    return f"{month}-01", f"{month}-31"
+
+def _in_month(T, month):
+    """Range condition rather than LIKE, so Postgres can prune to one partition."""
+    start, end = _month_range(month)
+    return db.and_(T.date >= start, T.date <= end)
+
+def fetch_transaction_rows(limit=None, tx_type=None, month=None):
+    """Like fetch_all_transactions, but as plain row tuples in columnar.TX_FIELDS order.
+
+    A Core select of the needed columns, so no ORM objects are hydrated.
+    """
+    T = tx_source(f"{month}-01" if month else None)
+    stmt = _tx_select(T).where(T.user_id == g.user["id"])
 
     if tx_type in ("income", "expense"):
-        query = query.filter_by(type=tx_type)
+        stmt = stmt.where(T.type == tx_type)
 
     if month: # e.g. "2026-02"
-        query = query.filter(Transaction.date.like(f"{month}%"))
+        stmt = stmt.where(_in_month(T, month))
 
-    query = query.order_by(Transaction.date.desc(), Transaction.id.desc())
+    stmt = stmt.order_by(T.date.desc(), T.id.desc())
 
     if limit:
-        query = query.limit(limit)
+        stmt = stmt.limit(limit)
+
+    return db.session.execute(stmt).all()
+
+def fetch_all_transactions(limit=None, tx_type=None, month=None):
+    user_id = g.user["id"]
+    return [_tx_dict(r, user_id) for r in fetch_transaction_rows(limit=limit, tx_type=tx_type, month=month)]
+
+def tx_columns(rows):
+    """Columnar encoding of fetch_transaction_rows/_tx_select rows, with category names."""
+    return encode_columns(rows, labels={"category": category_index().names})
 
-    results = query.all()
-    return [{
+def _tx_select(T=Transaction):
+    return db.select(T.id, T.type, T.category_id, T.amount_paise, T.note, T.date)
+
+def _tx_dict(r, user_id):
+    return {
         "id": r.id,
-        "user_id": r.user_id,
+        "user_id": user_id,
         "type": r.type,
-        "category": r.category,
-        "amount": r.amount,
+        "category": category_index().names[r.category_id],
+        "amount": to_rupees(r.amount_paise),
         "note": r.note,
         "date": r.date
-    } for r in results]
+    }
 
 def fetch_summary(month=None):
     user_id = g.user["id"]
+    cols = txcache.user_columns(f"{month}-01") if month else None
+    if cols is not None:
+        lo, hi = cols.month_span(month)
+        income, expense = cols.totals(lo, hi)
+        cat_rows = sorted(cols.expense_by_category(lo, hi).items(), key=lambda r: (-r[1], r[0]))
+    else:
+        income, expense, cat_rows = _summary_totals(user_id, month)
+    trend = _trend(user_id, cols)
+
+    return {
+        "income": to_rupees(income),
+        "expense": to_rupees(expense),
+        "balance": to_rupees(income - expense),
+        "categories": [{"category": category_index().names[cid], "total": to_rupees(total)}
+                       for cid, total in cat_rows],
+        "trend": trend,
+    }
+
+def _summary_totals(user_id, month):
+    """(income, expense, [(category_id, expense)] largest first) in SQL, for a month or all time."""
+    T = tx_source(f"{month}-01" if month else None)
     
     # Base filters
-    income_query = db.session.query(db.func.sum(Transaction.amount)).filter_by(user_id=user_id, type='income')
-    expense_query = db.session.query(db.func.sum(Transaction.amount)).filter_by(user_id=user_id, type='expense')
-    cat_query = db.session.query(Transaction.category, db.func.sum(Transaction.amount).label('total')).filter_by(user_id=user_id, type='expense')
+    income_query = db.session.query(db.func.sum(T.amount_paise)).filter(T.user_id == user_id, T.type == 'income')
+    expense_query = db.session.query(db.func.sum(T.amount_paise)).filter(T.user_id == user_id, T.type == 'expense')
+    cat_query = db.session.query(T.category_id, db.func.sum(T.amount_paise).label('total')).filter(T.user_id == user_id, T.type == 'expense')
 
     if month:
-        income_query = income_query.filter(Transaction.date.like(f"{month}%"))
-        expense_query = expense_query.filter(Transaction.date.like(f"{month}%"))
-        cat_query = cat_query.filter(Transaction.date.like(f"{month}%"))
+        income_query = income_query.filter(_in_month(T, month))
+        expense_query = expense_query.filter(_in_month(T, month))
+        cat_query = cat_query.filter(_in_month(T, month))
 
-    income = income_query.scalar() or 0
-    expense = expense_query.scalar() or 0
-    
-    cat_rows = cat_query.group_by(Transaction.category).order_by(db.desc('total')).all()
-    
-    # Monthly trend (last 6 months)
-    trend_dict = {}
-    all_trans = Transaction.query.filter_by(user_id=user_id).all()
-    
-    for trans in all_trans:
-        month_key = trans.date[:7] if len(trans.date) >= 7 else trans.date
-        if month_key not in trend_dict:
-            trend_dict[month_key] = {"income": 0, "expense": 0}
-        
-        if trans.type == 'income':
-            trend_dict[month_key]['income'] += trans.amount
-        else:
-            trend_dict[month_key]['expense'] += trans.amount
+    income = int(income_query.scalar() or 0)
+    expense = int(expense_query.scalar() or 0)
     
-    sorted_months = sorted(trend_dict.keys(), reverse=True)[:6]
-    trend = [{"month": m, "income": float(trend_dict[m]['income']), "expense": float(trend_dict[m]['expense'])} 
-             for m in sorted(sorted_months)]
+    cat_rows = cat_query.group_by(T.category_id).order_by(db.desc('total'), T.category_id).all()
+    return income, expense, [(r.category_id, r.total) for r in cat_rows]
 
-    return {
-        "income": float(income),
-        "expense": float(expense),
-        "balance": float(income - expense),
-        "categories": [{"category": r.category, "total": float(r.total)} for r in cat_rows],
-        "trend": trend,
-    }
+def _trend(user_id, cols=None):
+    """Income and expense for the last 6 months with data, oldest first."""
+    cols = cols or txcache.user_columns(txcache.window_start())
+    months = cols.by_month() if cols is not None else {}
+    if len(months) >= 6:
+        # the cache holds every row since its window start, so its newest six months are the newest six
+        return [{"month": m, "income": to_rupees(months[m][0]), "expense": to_rupees(months[m][1])}
+                for m in sorted(months)[-6:]]
+
+    # Monthly trend (last 6 months with data), summed in SQL over just those months
+    recent = fetch_available_months()[:6]
+    trend_rows = []
+    if recent:
+        since = f"{recent[-1]}-01"
+        TT = tx_source(since)
+        month_key = db.func.substr(TT.date, 1, 7)
+        trend_rows = db.session.query(
+            month_key.label('month'),
+            db.func.sum(db.case((TT.type == 'income', TT.amount_paise), else_=0)).label('income'),
+            db.func.sum(db.case((TT.type == 'expense', TT.amount_paise), else_=0)).label('expense')
+        ).filter(TT.user_id == user_id, TT.date >= since).group_by(month_key).order_by(db.desc('month')).all()
+    return [{"month": r.month, "income": to_rupees(r.income), "expense": to_rupees(r.expense)}
+            for r in reversed(trend_rows)]
+
+def _insert(table):
+    """Dialect INSERT construct with ON CONFLICT support for the current bind."""
+    if db.session.get_bind().dialect.name == "postgresql":
+        return pg_insert(table)
+    return sqlite_insert(table)
 
-def insert_transaction(tx_type, category, amount, note, date):
+def _upsert(table, rows, keys, update):
+    """One `INSERT ... ON CONFLICT (keys) DO UPDATE` statement for `rows`.
+
+    `keys` must match a unique constraint or index on `table`; on conflict the
+    `update` columns are overwritten with the incoming values. The app runs on
+    SQLite or Postgres only (see config.py), and both share this syntax.
+    """
+    stmt = _insert(table).values(rows)
+    return stmt.on_conflict_do_update(index_elements=keys, set_={c: stmt.excluded[c] for c in update})
+
+def _next_seq(count=1):
+    """Reserve `count` sync sequence numbers for the current user; returns the first.
+
+    The counter row stays locked until the caller's transaction ends, so one
+    user's writes commit in sequence order: a reader that sees seq n has every
+    change numbered below n as well. A shared serial gives no such guarantee.
+    """
+    table = SyncSequence.__table__
+    stmt = _insert(table).values(user_id=g.user["id"], seq=count)
+    stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_={"seq": table.c.seq + count})
+    return db.session.execute(stmt.returning(table.c.seq)).scalar() - count + 1
+
+def _log_change(entity, entity_key, op):
+    """Record a write in the caller's transaction so the log commits (or rolls back) with it."""
+    db.session.add(ChangeLog(user_id=g.user["id"], seq=_next_seq(), entity=entity,
+                             entity_key=str(entity_key), op=op))
+    txcache.invalidate()
+
+def insert_transaction(tx_type, category, amount_paise, note, date, commit=True):
     user_id = g.user["id"]
     new_tx = Transaction(
         user_id=user_id,
         type=tx_type,
-        category=category,
-        amount=amount,
+        category_id=category_index().ids[category],
+        legacy_category=category,
+        amount_paise=amount_paise,
+        legacy_amount=to_rupees(amount_paise),
         note=note,
         date=date
     )
     db.session.add(new_tx)
-    db.session.commit()
+    db.session.flush()  # assigns new_tx.id for the change log
+    _log_change("transaction", new_tx.id, "upsert")
+    if commit:
+        db.session.commit()
+
+def delete_transaction(tx_id, commit=True):
+    return bool(delete_transactions(ids=[tx_id], commit=commit))
 
-def delete_transaction(tx_id):
+def delete_transactions(ids=None, month=None, category=None, commit=True):
+    """Delete the user's transactions matching every given criterion; returns the deleted ids.
+
+    One `DELETE ... RETURNING id` per storage table (see _tx_tables); the
+    tombstones for /api/sync are written in the same transaction. At least one
+    criterion is required.
+    """
+    if ids is None and not month and not category:
+        raise ValueError("refusing to delete without ids or a filter")
+    deleted = []
+    for table in _tx_tables():
+        query = delete(table).where(table.c.user_id == g.user["id"])
+        if ids is not None:
+            query = query.where(table.c.id.in_(ids))
+        if month:
+            query = query.where(_in_month(table.c, month))
+        if category:
+            query = query.where(table.c.category_id == category_index().ids[category])
+        deleted += [tx_id for (tx_id,) in db.session.execute(query.returning(table.c.id))]
+    if deleted:
+        user_id, first = g.user["id"], _next_seq(len(deleted))
+        db.session.execute(ChangeLog.__table__.insert(), [
+            {"user_id": user_id, "seq": first + i, "entity": "transaction", "entity_key": str(tx_id), "op": "delete"}
+            for i, tx_id in enumerate(deleted)])
+        txcache.invalidate()
+    if commit:
+        db.session.commit()
+    return deleted
+
+def delete_latest_transaction(commit=True):
+    """Delete the user's most recent transaction in one statement; returns (category, amount_paise) or None."""
     user_id = g.user["id"]
-    tx = Transaction.query.filter_by(id=tx_id, user_id=user_id).first()
-    if tx:
-        db.session.delete(tx)
+    T = tx_source()
+    latest = db.session.query(T.id).filter(T.user_id == user_id)\
+        .order_by(T.date.desc(), T.id.desc()).limit(1).scalar_subquery()
+    for table in _tx_tables():
+        row = db.session.execute(delete(table).where(table.c.user_id == user_id, table.c.id == latest)
+                                 .returning(table.c.id, table.c.category_id, table.c.amount_paise)).first()
+        if row is not None:
+            break
+    else:
+        return None
+    _log_change("transaction", row.id, "delete")
+    if commit:
         db.session.commit()
+    return category_index().names[row.category_id], row.amount_paise
 
 def fetch_available_months():
+    """Months with any transaction, newest first; DISTINCT in SQL off the (user_id, date) index."""
+    T = tx_source()
+    month = db.func.substr(T.date, 1, 7)
+    rows = db.session.query(month).filter(T.user_id == g.user["id"]).distinct().order_by(month.desc()).all()
+    return [m for (m,) in rows if m and len(m) == 7]
+
+def set_limit(category, limit_paise, commit=True):
+    set_limits({category: limit_paise}, commit=commit)
+
+def set_limits(limits_paise, commit=True):
+    """Create or overwrite several of the user's limits ({category: paise}) in one upsert."""
+    if not limits_paise:
+        return
     user_id = g.user["id"]
-    # Use Python to extract months from dates, works universally
-    rows = db.session.query(Transaction.date).filter_by(user_id=user_id).all()
-    months = set()
-    for row in rows:
-        if row.date and len(row.date) >= 7:
-            month = row.date[:7]
-            months.add(month)
-    return sorted(list(months), reverse=True)
-
-def set_limit(category, limit_amount):
-    user_id = g.user["id"]
-    limit_obj = Limit.query.filter_by(user_id=user_id, category=category).first()
-    if limit_obj:
-        limit_obj.monthly_limit = limit_amount
-    else:
-        limit_obj = Limit(user_id=user_id, category=category, monthly_limit=limit_amount)
-        db.session.add(limit_obj)
-    db.session.commit()
+    ids = category_index().ids
+    rows = [{"user_id": user_id, "category_id": ids[category], "category": category,
+             "monthly_limit_paise": paise, "monthly_limit": to_rupees(paise)}
+            for category, paise in limits_paise.items()]
+    db.session.execute(_upsert(Limit.__table__, rows, ["user_id", "category_id"],
+                               ["monthly_limit_paise", "monthly_limit", "category"]))
+    for category in limits_paise:
+        _log_change("limit", category, "upsert")
+    if commit:
+        db.session.commit()
 
 def fetch_limits():
-    user_id = g.user["id"]
-    rows = Limit.query.filter_by(user_id=user_id).all()
-    return {r.category: r.monthly_limit for r in rows}
+    return {category: to_rupees(paise) for category, paise in _limits_paise().items()}
+
+def _category_ids(categories):
+    ids = category_index().ids
+    return [ids[c] for c in categories if c in ids]
+
+def _limits_paise(categories=None):
+    query = db.session.query(Limit.category_id, Limit.monthly_limit_paise).filter_by(user_id=g.user["id"])
+    if categories is not None:
+        query = query.filter(Limit.category_id.in_(_category_ids(categories)))
+    names = category_index().names
+    return {names[cid]: int(paise) for cid, paise in query.all()}
+
+def _spent_paise(categories, month):
+    """Expense totals per category for one month, in paise, from one grouped sum."""
+    names = category_index().names
+    cols = txcache.user_columns(f"{month}-01")
+    if cols is not None:
+        wanted = set(_category_ids(categories))
+        return {names[cid]: total for cid, total in cols.expense_by_category(*cols.month_span(month)).items()
+                if cid in wanted}
+    T = tx_source(f"{month}-01")
+    rows = db.session.query(T.category_id, db.func.sum(T.amount_paise))\
+        .filter(T.user_id == g.user["id"], T.type == 'expense', _in_month(T, month))\
+        .filter(T.category_id.in_(_category_ids(categories)))\
+        .group_by(T.category_id).all()
+    return {names[cid]: int(total or 0) for cid, total in rows}
+
+def _violation(category, limit, spent):
+    return {"category": category, "limit": to_rupees(limit), "spent": to_rupees(spent),
+            "exceeded_by": to_rupees(spent - limit)}
 
 def check_category_limit_exceeded(category, month=None):
+    violations = check_category_limits_exceeded([category], month)
+    return violations[0] if violations else None
+
+def check_category_limits_exceeded(categories, month=None):
+    """Limit violations for `categories`: one limits query plus one grouped sum."""
     if not month:
         month = datetime.now().strftime("%Y-%m")
-    
-    user_id = g.user["id"]
-    limit_obj = Limit.query.filter_by(user_id=user_id, category=category).first()
-    
-    if not limit_obj:
-        return None
-    
-    limit = limit_obj.monthly_limit
-    
-    spent = db.session.query(db.func.sum(Transaction.amount))\
-        .filter_by(user_id=user_id, category=category, type='expense')\
-        .filter(Transaction.date.like(f"{month}%")).scalar() or 0
-    
-    if spent > limit:
-        return {"category": category, "limit": limit, "spent": float(spent), "exceeded_by": float(spent - limit)}
-    
-    return None
+    categories = list(set(categories))
+    if not categories:
+        return []
 
-def store_ai_memory(key, content):
-    user_id = g.user["id"]
-    memory = AIMemory.query.filter_by(user_id=user_id, key=key, content=content).first()
-    if not memory:
-        memory = AIMemory(user_id=user_id, key=key, content=content)
-        db.session.add(memory)
-        db.session.commit()
+    limits = _limits_paise(categories)
+    if not limits:
+        return []
+
+    spent = _spent_paise(limits.keys(), month)
+    return [_violation(category, limits[category], total)
+            for category, total in spent.items() if total > limits[category]]
 
-def fetch_ai_memory(key=None):
+def store_ai_memories(facts):
+    """Save [(key, content)] facts in one statement; restating one the user already has just refreshes its created_at."""
+    now = datetime.utcnow()
+    rows = [{"user_id": g.user["id"], "key": key, "content": content, "created_at": now} for key, content in facts]
+    db.session.execute(_upsert(AIMemory.__table__, rows, ["user_id", "key", "content"], ["created_at"]))
+    db.session.commit()
+
+def fetch_ai_memory(key=None, limit=50):
+    """Newest memories first, capped at `limit`; use memory.search_memories for prompt context."""
     user_id = g.user["id"]
+    query = AIMemory.query.filter_by(user_id=user_id)
+    if key:
+        query = query.filter_by(key=key)
+    rows = query.order_by(AIMemory.created_at.desc(), AIMemory.id.desc()).limit(limit).all()
     if key:
-        rows = AIMemory.query.filter_by(user_id=user_id, key=key).all()
         return [r.content for r in rows]
-    
-    rows = AIMemory.query.filter_by(user_id=user_id).all()
+
     result = {}
     for r in rows:
         if r.key not in result:
@@ -208,68 +517,214 @@ def fetch_ai_memory(key=None):
         result[r.key].append(r.content)
     return result
 
-def get_detailed_analytics(month=None):
+def fetch_changes_since(since="", columnar=False):
+    """Transactions and limits written after the client's sync cursor.
+
+    Returns {"cursor", "seq", "full", "transactions": {"upserts", "deletes"}, "limits": {...}}.
+    The cursor is "<user_id>:<seq>" ("<user_id>-<moves>:<seq>" once the user has
+    moved shard, since each shard keeps its own change log); an empty, foreign
+    or unknown cursor, including the old "<user_id>.<change_log id>" form, gets
+    a full snapshot. Clients pass the returned `cursor` as `since` next time.
+    With `columnar`, transaction upserts use the columnar encoding (see columnar.py).
+    """
+    user_id = g.user["id"]
+    moves = g.user.get("shard_moves")
+    owner = f"{user_id}-{moves}" if moves else str(user_id)
+
+    def upserts(rows):
+        return tx_columns(rows) if columnar else [_tx_dict(r, user_id) for r in rows]
+
+    cursor_owner, _, since = str(since or "").partition(":")
+    since = int(since) if cursor_owner == owner and since.isdigit() else None
+    # Read the sequence before the data: anything written in between is re-sent next time
+    seq = db.session.query(SyncSequence.seq).filter(SyncSequence.user_id == user_id).scalar() or 0
+    if since is None or since > seq:
+        return {
+            "cursor": f"{owner}:{seq}", "seq": seq, "full": True,
+            "transactions": {"upserts": upserts(fetch_transaction_rows()), "deletes": []},
+            "limits": {"upserts": fetch_limits(), "deletes": []},
+        }
+
+    latest = {}  # (entity, key) -> last op
+    rows = ChangeLog.query.filter(ChangeLog.user_id == user_id, ChangeLog.seq > since, ChangeLog.seq <= seq)\
+        .order_by(ChangeLog.seq).all()
+    for r in rows:
+        latest[(r.entity, r.entity_key)] = r.op
+
+    tx_ids = [int(k) for (e, k), op in latest.items() if e == "transaction" and op == "upsert"]
+    categories = [k for (e, k), op in latest.items() if e == "limit" and op == "upsert"]
+    T = tx_source()
+    txs = db.session.execute(_tx_select(T).where(T.user_id == user_id, T.id.in_(tx_ids))
+                             .order_by(T.date.desc(), T.id.desc())).all() if tx_ids else []
+    limits = db.session.query(Limit.category_id, Limit.monthly_limit_paise)\
+        .filter(Limit.user_id == user_id, Limit.category_id.in_(_category_ids(categories))).all() if categories else []
+    names = category_index().names
+
+    found_ids = {t.id for t in txs}
+    found_cats = {names[l.category_id] for l in limits}
+    return {
+        "cursor": f"{owner}:{seq}", "seq": seq, "full": False,
+        "transactions": {
+            "upserts": upserts(txs),
+            # tombstones, plus upserts whose row is already gone again
+            "deletes": [int(k) for (e, k), op in latest.items()
+                        if e == "transaction" and (op == "delete" or int(k) not in found_ids)],
+        },
+        "limits": {
+            "upserts": {names[l.category_id]: to_rupees(l.monthly_limit_paise) for l in limits},
+            "deletes": [k for (e, k), op in latest.items()
+                        if e == "limit" and (op == "delete" or k not in found_cats)],
+        },
+    }
+
+def fetch_limit_status(month=None):
+    """Spend against every limit for a month: one limits query plus one grouped sum."""
     if not month:
         month = datetime.now().strftime("%Y-%m")
-    
-    user_id = g.user["id"]
-    summary = fetch_summary(month)
-    
-    # Daily breakdown
-    daily_rows = db.session.query(
-        Transaction.date,
-        db.func.sum(db.case((Transaction.type == 'income', Transaction.amount), else_=0)).label('income'),
-        db.func.sum(db.case((Transaction.type == 'expense', Transaction.amount), else_=0)).label('expense')
-    ).filter_by(user_id=user_id).filter(Transaction.date.like(f"{month}%"))\
-    .group_by(Transaction.date).order_by(Transaction.date).all()
-    
-    daily_breakdown = [{"date": r.date, "income": float(r.income), "expense": float(r.expense)} for r in daily_rows]
-    
-    engine_name = db.engine.name
-    if engine_name == 'sqlite':
-        weekly_rows = db.session.query(
-            db.func.strftime('%W', Transaction.date).label('week'),
-            db.func.sum(db.case((Transaction.type == 'income', Transaction.amount), else_=0)).label('income'),
-            db.func.sum(db.case((Transaction.type == 'expense', Transaction.amount), else_=0)).label('expense')
-        ).filter_by(user_id=user_id).filter(Transaction.date.like(f"{month}%"))\
-        .group_by(db.func.strftime('%W', Transaction.date)).order_by('week').all()
-    else:
-        weekly_rows = db.session.query(
-            db.func.strftime('%W', Transaction.date).label('week'),
-            db.func.sum(db.case((Transaction.type == 'income', Transaction.amount), else_=0)).label('income'),
-            db.func.sum(db.case((Transaction.type == 'expense', Transaction.amount), else_=0)).label('expense')
-        ).filter_by(user_id=user_id).filter(Transaction.date.like(f"{month}%"))\
-        .group_by(db.func.strftime('%W', Transaction.date)).order_by('week').all()
-        
-    weekly_breakdown = [{"week": r.week, "income": float(r.income), "expense": float(r.expense)} for r in weekly_rows]
-    
-    # Limit status
-    limits = fetch_limits()
+    limits = _limits_paise()
+    if not limits:
+        return []
+
+    spent_by_cat = _spent_paise(limits.keys(), month)
+
     limit_status = []
-    
     for category, limit in limits.items():
-        spent = db.session.query(db.func.sum(Transaction.amount))\
-            .filter_by(user_id=user_id, category=category, type='expense')\
-            .filter(Transaction.date.like(f"{month}%")).scalar() or 0
-        
+        spent = spent_by_cat.get(category, 0)
+
         status = "normal"
         if spent > limit:
             status = "exceeded"
-        elif spent > limit * 0.9:
+        elif spent * 10 > limit * 9:
             status = "critical"
-        elif spent > limit * 0.7:
+        elif spent * 10 > limit * 7:
             status = "warning"
-        
+
         limit_status.append({
             "category": category,
-            "limit": float(limit),
-            "spent": float(spent),
-            "remaining": float(max(0, limit - spent)),
+            "limit": to_rupees(limit),
+            "spent": to_rupees(spent),
+            "remaining": to_rupees(max(0, limit - spent)),
             "percentage": float((spent / limit * 100) if limit > 0 else 0),
             "status": status
         })
-    
+
     limit_status.sort(key=lambda x: x["spent"], reverse=True)
+    return limit_status
+
+# ── read tools for the AI agent (small, indexed queries) ─────────────────────────
+
+def fetch_category_total(category, date_from, date_to):
+    user_id = g.user["id"]
+    cols = txcache.user_columns(date_from)
+    span = cols.span(date_from, date_to) if cols is not None else None
+    if span is not None:
+        total, count = cols.category_total(category_index().ids.get(category), *span)
+    else:
+        T = tx_source(date_from)
+        total, count = db.session.query(db.func.sum(T.amount_paise), db.func.count(T.id))\
+            .filter(T.user_id == user_id, T.category_id == category_index().ids.get(category))\
+            .filter(T.date >= date_from, T.date <= date_to).one()
+    return {"category": category, "from": date_from, "to": date_to,
+            "total": to_rupees(total), "count": int(count or 0)}
+
+def fetch_top_expenses(n, date_from, date_to):
+    user_id = g.user["id"]
+    T = tx_source(date_from)
+    rows = db.session.query(T.id, T.date, T.category_id, T.amount_paise, T.note)\
+        .filter(T.user_id == user_id, T.type == 'expense')\
+        .filter(T.date >= date_from, T.date <= date_to)\
+        .order_by(T.amount_paise.desc()).limit(n).all()
+    names = category_index().names
+    return [{"id": r.id, "date": r.date, "category": names[r.category_id], "amount": to_rupees(r.amount_paise), "note": r.note or ""}
+            for r in rows]
+
+def compare_months(month_a, month_b):
+    """Income, expense and per-category spend for two months side by side."""
+    user_id = g.user["id"]
+    names = category_index().names
+    paise = {}
+    for month in (month_a, month_b):
+        cols = txcache.user_columns(f"{month}-01")
+        if cols is not None:
+            lo, hi = cols.month_span(month)
+            income = cols.totals(lo, hi)[0]
+            cats = {names[cid]: t for cid, t in sorted(cols.expense_by_category(lo, hi).items())}
+            paise[month] = {"income": income, "expense": sum(cats.values()), "categories": cats}
+            continue
+        T = tx_source(f"{month}-01")
+        rows = db.session.query(T.type, T.category_id, db.func.sum(T.amount_paise))\
+            .filter(T.user_id == user_id, _in_month(T, month))\
+            .group_by(T.type, T.category_id).all()
+        income = sum(int(t or 0) for typ, _, t in rows if typ == 'income')
+        cats = {names[cid]: int(t or 0) for typ, cid, t in rows if typ == 'expense'}
+        paise[month] = {"income": income, "expense": sum(cats.values()), "categories": cats}
+
+    result = {month: {"income": to_rupees(p["income"]), "expense": to_rupees(p["expense"]),
+                      "categories": {c: to_rupees(t) for c, t in p["categories"].items()}}
+              for month, p in paise.items()}
+    a, b = paise[month_a], paise[month_b]
+    result["change"] = {
+        "expense": to_rupees(b["expense"] - a["expense"]),
+        "income": to_rupees(b["income"] - a["income"]),
+        "categories": {c: to_rupees(b["categories"].get(c, 0) - a["categories"].get(c, 0))
+                       for c in sorted(set(a["categories"]) | set(b["categories"]))},
+    }
+    return result
+
+def _daily_weekly_rows(user_id, month):
+    """[(date, income, expense)] and [(week, income, expense)] for a month, summed in SQL."""
+    T = tx_source(f"{month}-01")
+    daily_rows = db.session.query(
+        T.date,
+        db.func.sum(db.case((T.type == 'income', T.amount_paise), else_=0)).label('income'),
+        db.func.sum(db.case((T.type == 'expense', T.amount_paise), else_=0)).label('expense')
+    ).filter(T.user_id == user_id, _in_month(T, month))\
+    .group_by(T.date).order_by(T.date).all()
+
+    engine_name = db.engine.name
+    if engine_name == 'sqlite':
+        weekly_rows = db.session.query(
+            db.func.strftime('%W', T.date).label('week'),
+            db.func.sum(db.case((T.type == 'income', T.amount_paise), else_=0)).label('income'),
+            db.func.sum(db.case((T.type == 'expense', T.amount_paise), else_=0)).label('expense')
+        ).filter(T.user_id == user_id, _in_month(T, month))\
+        .group_by(db.func.strftime('%W', T.date)).order_by('week').all()
+    else:
+        weekly_rows = db.session.query(
+            db.func.strftime('%W', T.date).label('week'),
+            db.func.sum(db.case((T.type == 'income', T.amount_paise), else_=0)).label('income'),
+            db.func.sum(db.case((T.type == 'expense', T.amount_paise), else_=0)).label('expense')
+        ).filter(T.user_id == user_id, _in_month(T, month))\
+        .group_by(db.func.strftime('%W', T.date)).order_by('week').all()
+    return [tuple(r) for r in daily_rows], [tuple(r) for r in weekly_rows]
+
+def get_detailed_analytics(month=None):
+    if not month:
+        month = datetime.now().strftime("%Y-%m")
+    
+    user_id = g.user["id"]
+    summary = fetch_summary(month)
+    
+    cols = txcache.user_columns(f"{month}-01")
+    if cols is not None:
+        daily_rows, weekly = [], {}
+        for ordinal, (income, expense) in cols.by_day(*cols.month_span(month)).items():
+            day = datetime.fromordinal(ordinal)
+            daily_rows.append((day.strftime("%Y-%m-%d"), income, expense))
+            week = weekly.setdefault(day.strftime("%W"), [0, 0])
+            week[0] += income
+            week[1] += expense
+        weekly_rows = [(w, income, expense) for w, (income, expense) in sorted(weekly.items())]
+    else:
+        daily_rows, weekly_rows = _daily_weekly_rows(user_id, month)
+
+    daily_breakdown = [{"date": d, "income": to_rupees(income), "expense": to_rupees(expense)}
+                       for d, income, expense in daily_rows]
+    weekly_breakdown = [{"week": w, "income": to_rupees(income), "expense": to_rupees(expense)}
+                        for w, income, expense in weekly_rows]
+    
+    # Limit status
+    limit_status = fetch_limit_status(month)
     
     days_elapsed = len(daily_breakdown)
     daily_avg_expense = summary["expense"] / days_elapsed if days_elapsed > 0 else 0
@@ -301,43 +756,46 @@ def get_detailed_analytics(month=None):
 
 def get_expense_warnings():
     month = datetime.now().strftime("%Y-%m")
-    user_id = g.user["id"]
     
     warnings = []
-    limits = fetch_limits()
+    limits = _limits_paise()
     summary = fetch_summary(month)
+    spent_by_cat = _spent_paise(limits.keys(), month) if limits else {}
     
-    for category, limit in limits.items():
-        spent = db.session.query(db.func.sum(Transaction.amount))\
-            .filter_by(user_id=user_id, category=category, type='expense')\
-            .filter(Transaction.date.like(f"{month}%")).scalar() or 0
+    for category, limit_paise in limits.items():
+        spent_paise = spent_by_cat.get(category, 0)
+        # Compare exact paise; rupee floats only for the response
+        limit, spent = to_rupees(limit_paise), to_rupees(spent_paise)
         
-        if spent > limit:
+        if spent_paise > limit_paise:
+            over = to_rupees(spent_paise - limit_paise)
             warnings.append({
                 "type": "exceeded",
                 "category": category,
                 "limit": limit,
-                "spent": float(spent),
-                "exceeded_by": float(spent - limit),
-                "message": f"⚠️ CRITICAL: {category} limit exceeded! Spent ₹{spent:.2f} of ₹{limit:.2f} limit (₹{spent-limit:.2f} over)"
+                "spent": spent,
+                "exceeded_by": over,
+                "message": f"⚠️ CRITICAL: {category} limit exceeded! Spent ₹{spent:.2f} of ₹{limit:.2f} limit (₹{over:.2f} over)"
             })
-        elif spent > limit * 0.9:
+        elif spent_paise * 10 > limit_paise * 9:
+            remaining = to_rupees(limit_paise - spent_paise)
             warnings.append({
                 "type": "critical",
                 "category": category,
                 "limit": limit,
-                "spent": float(spent),
-                "remaining": float(limit - spent),
-                "message": f"🔴 CRITICAL: {category} at 90%+! Spent ₹{spent:.2f} of ₹{limit:.2f} (₹{limit-spent:.2f} remaining)"
+                "spent": spent,
+                "remaining": remaining,
+                "message": f"🔴 CRITICAL: {category} at 90%+! Spent ₹{spent:.2f} of ₹{limit:.2f} (₹{remaining:.2f} remaining)"
             })
-        elif spent > limit * 0.75:
+        elif spent_paise * 4 > limit_paise * 3:
+            remaining = to_rupees(limit_paise - spent_paise)
             warnings.append({
                 "type": "warning",
                 "category": category,
                 "limit": limit,
-                "spent": float(spent),
-                "remaining": float(limit - spent),
-                "message": f"🟡 WARNING: {category} at 75%! Spent ₹{spent:.2f} of ₹{limit:.2f} (₹{limit-spent:.2f} remaining)"
+                "spent": spent,
+                "remaining": remaining,
+                "message": f"🟡 WARNING: {category} at 75%! Spent ₹{spent:.2f} of ₹{limit:.2f} (₹{remaining:.2f} remaining)"
             })
     
     if summary["balance"] < 0:
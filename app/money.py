@@ -0,0 +1,48 @@
+"""
+Money
+=====
+Amounts are stored and aggregated as integer paise (minor units), so sums
+and comparisons are exact. Rupees appear only at the edges: `to_paise` when
+parsing request/LLM input, `to_rupees` when building JSON or text.
+"""
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+PAISE_PER_RUPEE = 100
+MAX_AMOUNT_PAISE = 10_000_000 * PAISE_PER_RUPEE  # ₹1 crore, the per-entry cap
+_MAX_RUPEES = Decimal(MAX_AMOUNT_PAISE) / PAISE_PER_RUPEE
+
+
+class AmountOutOfRange(ValueError):
+    """A well-formed amount larger than MAX_AMOUNT_PAISE in magnitude."""
+
+
+def to_paise(value) -> int:
+    """Parse a rupee amount (str, int, float or Decimal) to paise, rounding half up.
+
+    Raises ValueError for anything that is not a finite number, and
+    AmountOutOfRange (a ValueError) beyond ±MAX_AMOUNT_PAISE.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"not an amount: {value!r}")
+    try:
+        rupees = Decimal(str(value).strip())
+    except (InvalidOperation, TypeError):
+        raise ValueError(f"not an amount: {value!r}")
+    if not rupees.is_finite():
+        raise ValueError(f"not an amount: {value!r}")
+    # checked before quantize, which raises InvalidOperation past the context precision
+    if abs(rupees) > _MAX_RUPEES:
+        raise AmountOutOfRange(f"amount out of range: {value!r}")
+    try:
+        return int((rupees * PAISE_PER_RUPEE).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+    except InvalidOperation:
+        raise ValueError(f"not an amount: {value!r}")
+
+
+def to_rupees(paise) -> float:
+    """Paise (int, or Decimal from a Postgres SUM) to rupees for JSON.
+
+    A single division of an exact integer, so the result prints with at most
+    two decimals.
+    """
+    return int(paise or 0) / PAISE_PER_RUPEE
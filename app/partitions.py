@@ -0,0 +1,264 @@
+"""
+Hot/cold transaction storage
+============================
+Dashboard reads are almost all for the current month; anything before the
+last HOT_MONTHS months (`models.hot_since`) is cold.
+
+- Postgres: `transactions` is range-partitioned by month on `date`, one
+  partition per month (`transactions_p202610`) plus `transactions_pdefault`
+  for dates outside them. Month-bounded queries prune to their partition;
+  all-time queries scan them all with no change to the SQL. Migration 4
+  converts the table once; `ensure_partitions` (every boot) keeps the next
+  PARTITION_AHEAD months created; `archive_closed_months` moves closed
+  partitions onto COLD_TABLESPACE when that is set.
+- SQLite: `archive_closed_months` moves the rows of closed months into
+  `transactions_archive` in BACKFILL_CHUNK batches. `transactions_all` is the
+  UNION ALL view that all-time reads go through (see models.tx_source).
+
+Schedule the job with `python archive_transactions.py`.
+"""
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.schema import CreateTable
+
+from .migrations import BACKFILL_CHUNK, PROGRESS_EVERY, target_engine
+from .models import Transaction, TX_STORAGE_COLUMNS, hot_since
+
+PARTITION_AHEAD = int(os.environ.get("PARTITION_AHEAD", "2"))  # future months created in advance
+COLD_TABLESPACE = os.environ.get("COLD_TABLESPACE")
+
+_MONTH = re.compile(r"\d{4}-(0[1-9]|1[0-2])")
+
+
+def _next_month(month):
+    y, m = map(int, month.split("-"))
+    return f"{y + m // 12:04d}-{m % 12 + 1:02d}"
+
+
+def _months_ahead(count):
+    month = datetime.now().strftime("%Y-%m")
+    months = [month]
+    for _ in range(count):
+        month = _next_month(month)
+        months.append(month)
+    return months
+
+
+def _partition_name(month):
+    return f"transactions_p{month.replace('-', '')}"
+
+
+def _bounds(month):
+    return f"'{month}-01'", f"'{_next_month(month)}-01'"
+
+
+# ── Postgres ──────────────────────────────────────────────────────────────────
+
+def _is_partitioned(conn):
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = 'transactions'"
+    )).first() is not None
+
+
+def _partitions(conn):
+    """{partition name: tablespace ('' for the default one)}"""
+    return dict(conn.execute(text(
+        "SELECT c.relname, coalesce(t.spcname, '') FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "LEFT JOIN pg_tablespace t ON t.oid = c.reltablespace WHERE p.relname = 'transactions'"
+    )).all())
+
+
+def partition_transactions():
+    """Rebuild `transactions` as a month-partitioned table (migration 4, Postgres only).
+
+    Copies the table once inside one transaction, so it holds an exclusive lock
+    for the length of the copy: run `migrate_db.py` in a quiet window for a
+    large table. Expects the SERIAL id create_all makes.
+    """
+    with target_engine().begin() as conn:
+        if _is_partitioned(conn):
+            return
+        conn.execute(text("LOCK TABLE transactions IN ACCESS EXCLUSIVE MODE"))
+        months = {m for (m,) in conn.execute(text("SELECT DISTINCT substr(date, 1, 7) FROM transactions"))
+                  if m and _MONTH.fullmatch(m)}
+        seq = conn.execute(text("SELECT pg_get_serial_sequence('transactions', 'id')")).scalar()
+
+        conn.execute(text("ALTER TABLE transactions RENAME TO transactions_unpartitioned"))
+        conn.execute(text("CREATE TABLE transactions (LIKE transactions_unpartitioned "
+                          "INCLUDING DEFAULTS INCLUDING GENERATED) PARTITION BY RANGE (date)"))
+        conn.execute(text("CREATE TABLE transactions_pdefault PARTITION OF transactions DEFAULT"))
+        for month in sorted(months | set(_months_ahead(PARTITION_AHEAD))):
+            lo, hi = _bounds(month)
+            conn.execute(text(f"CREATE TABLE {_partition_name(month)} PARTITION OF transactions "
+                              f"FOR VALUES FROM ({lo}) TO ({hi})"))
+
+        cols = ", ".join(TX_STORAGE_COLUMNS)
+        copied = conn.execute(text(f"INSERT INTO transactions ({cols}) "
+                                   f"SELECT {cols} FROM transactions_unpartitioned")).rowcount
+        if seq:
+            conn.execute(text(f"ALTER SEQUENCE {seq} OWNED BY transactions.id"))
+        conn.execute(text("DROP TABLE transactions_unpartitioned"))
+        # Unique keys on a partitioned table must include the partition key
+        conn.execute(text("ALTER TABLE transactions ADD PRIMARY KEY (id, date)"))
+    # Secondary indexes come back from the init_db index loop, the note index from search.py
+    print(f"Partitioned transactions by month: {copied} rows in {len(months)} months.")
+
+
+def create_month_partition(conn, month):
+    """Add the partition for `month`, moving in any rows the default partition holds for it."""
+    name, (lo, hi) = _partition_name(month), _bounds(month)
+    stray = conn.execute(text(f"SELECT 1 FROM transactions_pdefault WHERE date >= {lo} AND date < {hi} LIMIT 1")).first()
+    if stray is None:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF transactions "
+                          f"FOR VALUES FROM ({lo}) TO ({hi})"))
+        return
+    cols = ", ".join(TX_STORAGE_COLUMNS)
+    conn.execute(text(f"CREATE TABLE {name} (LIKE transactions INCLUDING DEFAULTS INCLUDING GENERATED)"))
+    conn.execute(text(f"INSERT INTO {name} ({cols}) SELECT {cols} FROM transactions_pdefault "
+                      f"WHERE date >= {lo} AND date < {hi}"))
+    conn.execute(text(f"DELETE FROM transactions_pdefault WHERE date >= {lo} AND date < {hi}"))
+    conn.execute(text(f"ALTER TABLE transactions ATTACH PARTITION {name} FOR VALUES FROM ({lo}) TO ({hi})"))
+
+
+def ensure_partitions(ahead=PARTITION_AHEAD):
+    """Create the partitions for this month and the next `ahead` (Postgres; a no-op elsewhere)."""
+    if target_engine().dialect.name != "postgresql":
+        return []
+    created = []
+    with target_engine().begin() as conn:
+        if not _is_partitioned(conn):
+            return []
+        existing = _partitions(conn)
+        for month in _months_ahead(ahead):
+            if _partition_name(month) not in existing:
+                create_month_partition(conn, month)
+                created.append(month)
+    return created
+
+
+def _move_partitions_to_cold():
+    """ALTER TABLE ... SET TABLESPACE for closed-month partitions not on COLD_TABLESPACE yet."""
+    if not COLD_TABLESPACE:
+        return []
+    cut = _partition_name(hot_since()[:7])
+    with target_engine().connect() as conn:
+        partitions = _partitions(conn)
+    moved = []
+    for name, tablespace in sorted(partitions.items()):
+        if name == "transactions_pdefault" or name >= cut or tablespace == COLD_TABLESPACE:
+            continue
+        with target_engine().begin() as conn:  # one partition per transaction: the rewrite locks only it
+            conn.execute(text(f"ALTER TABLE {name} SET TABLESPACE {COLD_TABLESPACE}"))
+        moved.append(name)
+    return moved
+
+
+# ── SQLite ────────────────────────────────────────────────────────────────────
+
+def create_archive():
+    """Create transactions_archive and the transactions_all view (migration 4, SQLite)."""
+    dialect = target_engine().dialect
+    defs = []
+    for c in Transaction.__table__.columns:
+        ddl = f"{c.name} {c.type.compile(dialect=dialect)}"
+        if c.primary_key:
+            ddl += " PRIMARY KEY"
+        elif not c.nullable:
+            ddl += " NOT NULL"
+        defs.append(ddl)
+    cols = ", ".join(TX_STORAGE_COLUMNS)
+    with target_engine().begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS transactions_archive ({', '.join(defs)})"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_transactions_archive_user_date "
+                          "ON transactions_archive (user_id, date)"))
+        conn.execute(text("DROP VIEW IF EXISTS transactions_all"))
+        conn.execute(text(f"CREATE VIEW transactions_all AS SELECT {cols} FROM transactions "
+                          f"UNION ALL SELECT {cols} FROM transactions_archive"))
+
+
+def use_autoincrement():
+    """Rebuild a plain-rowid transactions table with AUTOINCREMENT (migration 9, SQLite).
+
+    Without it SQLite hands out max(id) + 1, which can be the id of a row
+    already moved to transactions_archive once the newest hot rows are
+    deleted. Ids the old table already reused are renumbered, and the
+    sequence starts past both tables. Indexes and the
+    full-text mirror triggers are recreated by upgrade_schema afterwards.
+    """
+    with target_engine().begin() as conn:
+        ddl = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'transactions'")).scalar()
+        if "AUTOINCREMENT" not in ddl.upper():
+            cols = ", ".join(TX_STORAGE_COLUMNS)
+            scratch = MetaData()
+            for fk in Transaction.__table__.foreign_keys:  # referenced tables, for the FK clauses
+                fk.column.table.to_metadata(scratch)
+            rebuilt = Transaction.__table__.to_metadata(scratch, name="transactions_rebuilt")
+            conn.execute(text("DROP VIEW IF EXISTS transactions_all"))  # a rename checks views
+            conn.execute(CreateTable(rebuilt))
+            conn.execute(text(f"INSERT INTO transactions_rebuilt ({cols}) SELECT {cols} FROM transactions"))
+            conn.execute(text("DROP TABLE transactions"))
+            conn.execute(text("ALTER TABLE transactions_rebuilt RENAME TO transactions"))
+            # hot rows that already reused an archived id move past both tables
+            reused = conn.execute(text(
+                "UPDATE transactions SET id = id + (SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM transactions "
+                "UNION ALL SELECT MAX(id) FROM transactions_archive)) "
+                "WHERE id IN (SELECT id FROM transactions_archive)")).rowcount
+            print(f"Rebuilt transactions with AUTOINCREMENT ids ({reused} reused ids renumbered).")
+        top = conn.execute(text("SELECT MAX(id) FROM (SELECT MAX(id) AS id FROM transactions "
+                                "UNION ALL SELECT MAX(id) FROM transactions_archive)")).scalar() or 0
+        conn.execute(text("DELETE FROM sqlite_sequence WHERE name = 'transactions'"))
+        conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', :top)"), {"top": top})
+    create_archive()  # the transactions_all view
+
+
+def _archive_rows(chunk_size=None):
+    """Move hot rows dated before hot_since() into transactions_archive; returns the rows moved.
+
+    Walks the primary key in batches, each one INSERT ... SELECT plus DELETE
+    in a short transaction. `transactions` uses AUTOINCREMENT (migration 9),
+    so an archived id is never handed out again.
+    """
+    chunk_size = chunk_size or BACKFILL_CHUNK
+    cut = hot_since()
+    cols = ", ".join(TX_STORAGE_COLUMNS)
+    with target_engine().connect() as conn:
+        after, last = conn.execute(text("SELECT MIN(id) - 1, MAX(id) FROM transactions")).first()
+    moved = batches = 0
+    while last is not None:
+        window = {"after": after, "last": last, "cut": cut}
+        with target_engine().begin() as conn:
+            upto = conn.execute(text(
+                "SELECT MAX(id) FROM (SELECT id FROM transactions WHERE id > :after AND id <= :last "
+                "AND date < :cut ORDER BY id LIMIT :n) AS chunk"
+            ), {**window, "n": chunk_size}).scalar()
+            if upto is None:
+                break
+            rows = {**window, "upto": upto}
+            conn.execute(text(f"INSERT INTO transactions_archive ({cols}) SELECT {cols} FROM transactions "
+                              "WHERE id > :after AND id <= :upto AND date < :cut"), rows)
+            moved += conn.execute(text("DELETE FROM transactions "
+                                       "WHERE id > :after AND id <= :upto AND date < :cut"), rows).rowcount
+        after = upto
+        batches += 1
+        if batches % PROGRESS_EVERY == 0:
+            print(f"Archiving transactions before {cut}: {moved} rows, id {after} of {last}.")
+    return moved
+
+
+# ── Job ───────────────────────────────────────────────────────────────────────
+
+def archive_closed_months():
+    """Move closed months to cold storage; call periodically inside an app context."""
+    dialect = target_engine().dialect.name
+    if dialect == "postgresql":
+        created = ensure_partitions()
+        moved = _move_partitions_to_cold()
+        print(f"Partitions created: {created or 'none'}; moved to cold storage: {moved or 'none'}.")
+    elif dialect == "sqlite":
+        moved = _archive_rows()
+        print(f"Archived {moved} transactions dated before {hot_since()}.")
@@ -0,0 +1,112 @@
+"""
+Sampled request profiler
+========================
+Opt-in cProfile + tracemalloc capture for API requests. A request is profiled
+when it is picked by the sample rate, or when it carries the admin header
+with the configured token. Captures are written per endpoint:
+
+    <PROFILER_DIR>/<endpoint>/<timestamp>-<pid>.prof         (pstats)
+    <PROFILER_DIR>/<endpoint>/<timestamp>-<pid>.alloc.json   (top allocations)
+
+Only the newest PROFILER_KEEP captures are kept per endpoint. Use
+`python merge_profiles.py` to merge them into one report per endpoint.
+"""
+import os
+import sys
+import json
+import time
+import random
+import cProfile
+import threading
+import tracemalloc
+from flask import g, request
+
+# tracemalloc is process-wide, so only one request is captured at a time.
+_capture_lock = threading.Lock()
+
+MERGED_STEM = "merged"  # merge_profiles.py writes merged.prof next to the captures
+
+
+def _should_profile(app) -> bool:
+    token = app.config.get("PROFILER_TOKEN")
+    header = request.headers.get(app.config.get("PROFILER_HEADER", "X-TrackEx-Profile"))
+    if token and header and header == token:
+        return True
+    rate = app.config.get("PROFILER_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+def _endpoint_dir(app) -> str:
+    name = (request.endpoint or "unknown").replace(".", "_")
+    path = os.path.join(app.config["PROFILER_DIR"], name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _rotate(path: str, keep: int):
+    """Delete the oldest captures so that at most `keep` remain."""
+    stems = sorted({f.split(".")[0] for f in os.listdir(path) if f.endswith(".prof")} - {MERGED_STEM})
+    for stem in stems[:-keep] if keep > 0 else []:
+        for suffix in (".prof", ".alloc.json"):
+            try:
+                os.remove(os.path.join(path, stem + suffix))
+            except OSError:
+                pass
+
+
+def _top_allocations(snapshot, limit: int) -> list:
+    stats = snapshot.statistics("lineno")[:limit]
+    return [{
+        "location": f"{s.traceback[0].filename}:{s.traceback[0].lineno}",
+        "size": s.size,
+        "count": s.count,
+    } for s in stats]
+
+
+def init_profiler(app):
+    """Register request hooks when PROFILER_ENABLED is set."""
+    if not app.config.get("PROFILER_ENABLED"):
+        return
+
+    @app.before_request
+    def _start_profile():
+        g._profile = None
+        if not request.path.startswith("/api") or not _should_profile(app):
+            return
+        if not _capture_lock.acquire(blocking=False):
+            return  # another request is already being captured
+        tracemalloc.start(app.config.get("PROFILER_TRACE_DEPTH", 1))
+        profile = cProfile.Profile()
+        g._profile = (profile, time.perf_counter())
+        profile.enable()
+
+    @app.teardown_request
+    def _stop_profile(exc=None):
+        captured = g.pop("_profile", None)
+        if not captured:
+            return
+        profile, started = captured
+        try:
+            profile.disable()
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            path = _endpoint_dir(app)
+            stem = f"{time.strftime('%Y%m%d%H%M%S')}{int(time.time() * 1000) % 1000:03d}-{os.getpid()}"
+            profile.dump_stats(os.path.join(path, stem + ".prof"))
+            with open(os.path.join(path, stem + ".alloc.json"), "w") as f:
+                json.dump({
+                    "endpoint": request.endpoint,
+                    "path": request.path,
+                    "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "peak_bytes": peak,
+                    "top": _top_allocations(snapshot, app.config.get("PROFILER_TOP_ALLOCS", 25)),
+                }, f, indent=2)
+            _rotate(path, app.config.get("PROFILER_KEEP", 50))
+        except Exception as e:
+            sys.stderr.write(f"[Profiler] Capture failed: {str(e)}\n")
+        finally:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            _capture_lock.release()
@@ -0,0 +1,126 @@
+"""
+Prompt-size governor
+====================
+Builds the chat system prompt from named sections, measures each one in
+tokens, and trims the least important sections first until the prompt fits
+LLM_PROMPT_TOKEN_BUDGET. Also provides the compact encodings used for the
+bulky sections (tabular transactions with a category legend, one-line limits).
+
+Token counts use tiktoken when it is installed, otherwise a word/punctuation
+heuristic that tracks Llama-style tokenizers closely enough for budgeting.
+"""
+import os
+import re
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # optional dependency
+    _ENCODING = None
+
+_PIECE_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    # Words ~1 token, digits split in groups of 3, symbols/emoji ~1 each
+    return len(_PIECE_RE.findall(text))
+
+
+def default_budget() -> int:
+    return int(os.environ.get("LLM_PROMPT_TOKEN_BUDGET", "1200"))
+
+
+class Section:
+    """A prompt block. Higher `priority` numbers are trimmed first.
+
+    Sections with `items` lose items from the end (oldest/least important)
+    down to `min_items`; after that a `droppable` section is removed whole.
+    """
+
+    def __init__(self, name, text="", items=None, priority=0, min_items=0, droppable=False, header=""):
+        self.name = name
+        self.text = text
+        self.items = list(items or [])
+        self.header = header
+        self.priority = priority
+        self.min_items = min_items
+        self.droppable = droppable
+        self.dropped = False
+
+    def render(self) -> str:
+        if self.dropped:
+            return ""
+        if self.items or self.header:
+            body = "\n".join(self.items) if self.items else "(none)"
+            return f"{self.header}\n{body}" if self.header else body
+        return self.text
+
+
+class PromptBuilder:
+    def __init__(self, budget: int | None = None):
+        self.budget = budget if budget is not None else default_budget()
+        self.sections = []
+
+    def add(self, *args, **kwargs) -> Section:
+        section = Section(*args, **kwargs)
+        self.sections.append(section)
+        return section
+
+    def section_tokens(self) -> dict:
+        return {s.name: estimate_tokens(s.render()) for s in self.sections}
+
+    def render(self) -> str:
+        return "\n\n".join(r for r in (s.render() for s in self.sections) if r)
+
+    def build(self) -> tuple:
+        """Trim to budget. Returns (prompt, stats)."""
+        before = self.section_tokens()
+        total = estimate_tokens(self.render())
+
+        for section in sorted(self.sections, key=lambda s: s.priority, reverse=True):
+            if total <= self.budget or section.priority == 0:
+                break
+            while total > self.budget and len(section.items) > section.min_items:
+                section.items.pop()
+                total = estimate_tokens(self.render())
+            if total > self.budget and section.droppable:
+                section.dropped = True
+                total = estimate_tokens(self.render())
+
+        prompt = self.render()
+        return prompt, {
+            "budget": self.budget,
+            "tokens": estimate_tokens(prompt),
+            "sections_before": before,
+            "sections": self.section_tokens(),
+            "trimmed": [s.name for s in self.sections if before[s.name] != estimate_tokens(s.render())],
+        }
+
+
+# ── Compact encodings ────────────────────────────────────────────────────────
+
+def encode_transactions(transactions: list, today: str | None = None) -> tuple:
+    """Tabular rows plus a legend so each category name appears once.
+
+    Returns (header, rows): header like "id|date|t|cat|amt  (t: e=expense i=income; cat: 1=Food & Dining,...)"
+    and rows like "412|03-14|e|1|250". Dates in the current year drop the year.
+    """
+    year = (today or "")[:4]
+    codes = {}
+    rows = []
+    for t in transactions:
+        code = codes.setdefault(t["category"], len(codes) + 1)
+        date = t["date"][5:] if year and t["date"].startswith(year) else t["date"]
+        amount = f"{t['amount']:.2f}".rstrip("0").rstrip(".")
+        rows.append(f"{t['id']}|{date}|{t['type'][0]}|{code}|{amount}")
+    legend = ", ".join(f"{c}={name}" for name, c in codes.items())
+    header = f"id|date|t|cat|amt (t: e=expense i=income; cat: {legend})" if rows else ""
+    return header, rows
+
+
+def encode_limits(limits: dict) -> str:
+    return ", ".join(f"{cat} {amt:g}" for cat, amt in limits.items())
@@ -0,0 +1,65 @@
+"""
+Read replicas
+=============
+Optional. DATABASE_REPLICA_URLS (comma-separated) adds one SQLAlchemy bind
+per replica, `replica0`, `replica1`, ... (see config.py). Views decorated with
+`@replica_read` send their SELECTs to one replica picked at random; flushes,
+INSERT/UPDATE/DELETE and everything outside those views stay on the primary.
+
+Read-your-writes: a successful non-GET API request stamps `db_wrote_at` in
+the user's session cookie, and for REPLICA_STICKY_SECONDS afterwards that
+user's reads stay on the primary, so the dashboard refresh that follows an
+edit sees it.
+
+If a replica read fails with an OperationalError (down, unreachable), the
+view runs again on the primary.
+"""
+import sys
+import time
+import random
+from functools import wraps
+from flask import current_app, g, request, session
+from sqlalchemy.exc import OperationalError
+
+from .extensions import db
+
+
+def replica_keys():
+    return [key for key in current_app.config.get("SQLALCHEMY_BINDS") or {} if key.startswith("replica")]
+
+
+def _sticky():
+    """True while the user's last write may not have reached the replicas yet."""
+    wrote_at = session.get("db_wrote_at")
+    return wrote_at is not None and time.time() - wrote_at < current_app.config["REPLICA_STICKY_SECONDS"]
+
+
+def replica_read(view):
+    """Run a read-only view against a replica when one is configured."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        keys = replica_keys()
+        if not keys or _sticky():
+            return view(*args, **kwargs)
+        key = random.choice(keys)
+        g.db_replica = db.engines[key]
+        try:
+            return view(*args, **kwargs)
+        except OperationalError as e:
+            db.session.rollback()
+            sys.stderr.write(f"[Replica] {key} read failed, retrying on primary: {str(e)}\n")
+        finally:
+            g.db_replica = None
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def init_replicas(app):
+    if not any(key.startswith("replica") for key in app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+
+    @app.after_request
+    def stamp_writes(response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400 and g.get("user"):
+            session["db_wrote_at"] = time.time()
+        return response
@@ -2,34 +2,38 @@ from flask import Blueprint, request, jsonify, render_template, g
 from datetime import datetime
 from .extensions import db
 from sqlalchemy import func, case, desc
+from sqlalchemy.exc import OperationalError
 from .models import (
     fetch_all_transactions,
+    fetch_transaction_rows,
     fetch_summary,
     insert_transaction,
     delete_transaction,
+    delete_transactions,
     fetch_available_months,
     check_category_limit_exceeded,
     set_limit,
     fetch_limits,
     get_detailed_analytics,
     get_expense_warnings,
+    fetch_changes_since,
+    category_index,
+    tx_columns,
+    tx_source,
 )
-from .ai_agent import handle_chat, get_ai_insights
+from .ai_agent import handle_chat, get_ai_insights, try_fast_path
+from .admission import llm_admission, llm_slot, overloaded_response, Overloaded
+from .search import search_transactions, SEARCH_PAGE_SIZE
+from .columnar import wants_columnar, json_response
+from .money import to_paise, to_rupees, AmountOutOfRange
+from .replicas import replica_read
+from . import txcache
 from app import limiter, csrf
 import re
+import sys
 
 api = Blueprint("api", __name__, url_prefix="/api")
 
-# Valid category whitelist — MUST stay in sync with frontend CATEGORIES
-VALID_CATEGORIES = [
-    # Income
-    'Salary', 'Freelance', 'Investment', 'Gift', 'Rent Income', 'Business', 'Bonus', 'Other Income',
-    # Expense
-    'Groceries', 'Food & Dining', 'Transport', 'Rent', 'Utilities',
-    'Health', 'Entertainment', 'Education', 'Shopping', 'Travel',
-    'EMI / Loan', 'Subscriptions', 'Other'
-]
-
 def validate_date_format(date_str):
     """Validate date is in YYYY-MM-DD format."""
     try:
@@ -38,11 +42,29 @@ def validate_date_format(date_str):
     except ValueError:
         return False
 
+def invalid_category():
+    return jsonify(error=f"Invalid category. Valid categories: {', '.join(category_index().ordered)}"), 400
+
 @api.before_request
 def require_login():
     if g.user is None:
         return jsonify(error="Unauthorized"), 401
 
+@api.after_request
+def report_llm_usage(response):
+    """Log per-request LLM token usage and expose it in X-TrackEx-LLM-Tokens."""
+    usage = g.get("llm_usage")
+    if usage:
+        prompt = g.get("llm_prompt") or {}
+        sys.stderr.write(
+            f"[LLM] {request.endpoint} user={g.user['id']} calls={usage['calls']} "
+            f"prompt={usage['prompt_tokens']} completion={usage['completion_tokens']}"
+            f"{' (estimated)' if usage['estimated'] else ''}"
+            f"{' trimmed=' + ','.join(prompt['trimmed']) if prompt.get('trimmed') else ''}\n"
+        )
+        response.headers["X-TrackEx-LLM-Tokens"] = f"{usage['prompt_tokens']}+{usage['completion_tokens']}"
+    return response
+
 @api.post("/chat")
 @csrf.exempt
 @limiter.limit("20 per minute")
@@ -54,7 +76,16 @@ def chat():
     if len(message) > 2000:
         return jsonify(error="Message must be 2000 characters or less"), 400
 
-    reply = handle_chat(message)
+    # Simple commands are parsed locally and never take an LLM slot
+    reply = try_fast_path(message)
+    if reply is not None:
+        return jsonify(reply=reply, source="local")
+
+    try:
+        with llm_slot("chat"):
+            reply = handle_chat(message, fast_path=False)
+    except Overloaded as e:
+        return overloaded_response(e)
     return jsonify(reply=reply)
 
 # ── Transactions ───────────────────────────────────────────────────────────────
@@ -64,9 +95,52 @@ def get_transactions():
     tx_type = request.args.get("type")
     month   = request.args.get("month")
     limit   = request.args.get("limit", type=int)
+    if wants_columnar():
+        return json_response(tx_columns(fetch_transaction_rows(limit=limit, tx_type=tx_type, month=month)))
     return jsonify(fetch_all_transactions(limit=limit, tx_type=tx_type, month=month))
 
 
+@api.get("/transactions/search")
+def search_transactions_api():
+    args = request.args
+    tx_type  = args.get("type") or None
+    category = args.get("category") or None
+    date_from = args.get("from") or None
+    date_to   = args.get("to") or None
+
+    if tx_type and tx_type not in ("income", "expense"):
+        return jsonify(error="Type must be 'income' or 'expense'"), 400
+    if category and category not in category_index().valid:
+        return invalid_category()
+    for value in (date_from, date_to):
+        if value and not validate_date_format(value):
+            return jsonify(error="Invalid date format. Use YYYY-MM-DD"), 400
+    try:
+        min_amount = to_paise(args["min_amount"]) if args.get("min_amount") else None
+        max_amount = to_paise(args["max_amount"]) if args.get("max_amount") else None
+        limit = int(args.get("limit", SEARCH_PAGE_SIZE))
+    except ValueError:
+        return jsonify(error="min_amount, max_amount and limit must be numbers"), 400
+
+    try:
+        page = search_transactions(
+            q=args.get("q", "").strip()[:200], category=category, tx_type=tx_type,
+            min_amount=min_amount, max_amount=max_amount, date_from=date_from, date_to=date_to,
+            limit=limit, cursor=args.get("cursor") or None, columnar=wants_columnar(),
+        )
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return json_response(page) if wants_columnar() else jsonify(page)
+
+
+@api.get("/sync")
+def sync():
+    """Delta of transactions and limits since the client's last cursor (none = full snapshot)."""
+    if wants_columnar():
+        return json_response(fetch_changes_since(request.args.get("since", ""), columnar=True))
+    return jsonify(fetch_changes_since(request.args.get("since", "")))
+
+
 @api.post("/transactions")
 @csrf.exempt
 @limiter.limit("30 per minute")
@@ -85,16 +159,16 @@ def add_transaction():
     # — Validate category —
     if not category:
         return jsonify(error="Category is required"), 400
-    if category not in VALID_CATEGORIES:
-        return jsonify(error=f"Invalid category. Valid categories: {', '.join(VALID_CATEGORIES)}"), 400
+    if category not in category_index().valid:
+        return invalid_category()
 
     # — Validate amount —
     try:
-        amount = float(data.get("amount", 0))
-        if amount <= 0:
+        amount_paise = to_paise(data.get("amount", 0))
+        if amount_paise <= 0:
             raise ValueError
-        if amount > 10000000:  # 10 million max
-            return jsonify(error="Amount exceeds maximum allowed value"), 400
+    except AmountOutOfRange:
+        return jsonify(error="Amount exceeds maximum allowed value"), 400
     except (TypeError, ValueError):
         return jsonify(error="Amount must be a positive number"), 400
 
@@ -106,7 +180,7 @@ def add_transaction():
     if len(note) > 500:
         return jsonify(error="Note must be 500 characters or less"), 400
 
-    insert_transaction(tx_type, category, amount, note, date)
+    insert_transaction(tx_type, category, amount_paise, note, date)
 
     # — Check category limit —
     warning = None
@@ -126,9 +200,36 @@ def remove_transaction(tx_id):
     return jsonify(success=True)
 
 
+BULK_DELETE_MAX_IDS = 1000
+
+@api.delete("/transactions")
+@csrf.exempt
+@limiter.limit("10 per minute")
+def remove_transactions():
+    """Bulk delete by id list and/or filter: {"ids": [...]} or {"month": "YYYY-MM", "category": "..."}."""
+    data = request.get_json(silent=True) or {}
+    ids, month, category = data.get("ids"), data.get("month"), data.get("category")
+
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return jsonify(error="ids must be a list of integers"), 400
+        if len(ids) > BULK_DELETE_MAX_IDS:
+            return jsonify(error=f"At most {BULK_DELETE_MAX_IDS} ids per request"), 400
+    if month is not None and not (isinstance(month, str) and re.fullmatch(r"\d{4}-\d{2}", month)):
+        return jsonify(error="Invalid month format. Use YYYY-MM"), 400
+    if category is not None and (not isinstance(category, str) or category not in category_index().valid):
+        return invalid_category()
+    if ids is None and not month and not category:
+        return jsonify(error="Provide ids, month or category"), 400
+
+    deleted = delete_transactions(ids=ids, month=month, category=category) if ids != [] else []
+    return jsonify(success=True, deleted=len(deleted))
+
+
 # ── Summary ────────────────────────────────────────────────────────────────────
 
 @api.get("/summary")
+@replica_read
 def get_summary():
     month = request.args.get("month")
     return jsonify(fetch_summary(month=month))
@@ -178,21 +279,22 @@ def update_profile():
 # ── Export ───────────────────────────────────────────────────────────────────
 
 @api.get("/export")
+@replica_read
 def export_csv():
     import csv
     import io
     from flask import Response
-    from .models import Transaction
     
-    user_id = g.user["id"]
-    transactions = Transaction.query.filter_by(user_id=user_id).order_by(Transaction.date.desc()).all()
+    # All time, hot and archived, as plain rows
+    transactions = fetch_transaction_rows()
+    names = category_index().names
     
     output = io.StringIO()
     writer = csv.writer(output)
     writer.writerow(['Date', 'Type', 'Category', 'Amount', 'Note'])
     
     for tx in transactions:
-        writer.writerow([tx.date, tx.type, tx.category, tx.amount, tx.note])
+        writer.writerow([tx.date, tx.type, names[tx.category_id], f"{to_rupees(tx.amount_paise):.2f}", tx.note])
     
     response = Response(output.getvalue(), mimetype="text/csv")
     response.headers["Content-Disposition"] = "attachment; filename=transactions.csv"
@@ -201,6 +303,7 @@ def export_csv():
 # ── AI Insights ────────────────────────────────────────────────────────────────
 
 @api.get("/ai_insights")
+@llm_admission("insights")
 def ai_insights():
     month = request.args.get("month")
     from .ai_agent import get_ai_insights
@@ -209,9 +312,16 @@ def ai_insights():
 # ── Meta ───────────────────────────────────────────────────────────────────────
 
 @api.get("/months")
+@replica_read
 def get_months():
     return jsonify(fetch_available_months())
 
+@api.get("/categories")
+def get_categories():
+    """The category whitelist in id order; the dashboard merges it into its CATEGORIES."""
+    index = category_index()
+    return jsonify([{"id": cid, "name": name, "kind": index.kinds[name]} for cid, name in index.names.items()])
+
 # ── Limits ────────────────────────────────────────────────────────────────────
 
 @api.get("/limits")
@@ -226,51 +336,60 @@ def set_api_limit():
     data = request.get_json(silent=True) or {}
     category = data.get("category")
     try:
-        limit = float(data.get("limit", 0))
-        if limit <= 0:
+        limit_paise = to_paise(data.get("limit", 0))
+        if limit_paise <= 0:
             raise ValueError
-        if limit > 10000000:  # 10 million max
-            return jsonify(error="Limit exceeds maximum allowed value"), 400
+    except AmountOutOfRange:
+        return jsonify(error="Limit exceeds maximum allowed value"), 400
     except (TypeError, ValueError):
         return jsonify(error="Limit must be a positive number"), 400
 
     if not category:
         return jsonify(error="Category is required"), 400
-    if category not in VALID_CATEGORIES:
-        return jsonify(error=f"Invalid category. Valid categories: {', '.join(VALID_CATEGORIES)}"), 400
+    if not isinstance(category, str) or category not in category_index().valid:
+        return invalid_category()
 
-    set_limit(category, limit)
+    set_limit(category, limit_paise)
     return jsonify(success=True)
 
 
 # ── Analytics ──────────────────────────────────────────────────────────────────
 
 @api.get("/analytics/detailed")
+@replica_read
 def get_detailed_analytics_api():
     """Get comprehensive spending analytics with daily/weekly breakdown."""
     month = request.args.get("month")
     try:
         analytics = get_detailed_analytics(month=month)
         return jsonify(analytics)
+    except OperationalError:
+        raise  # replica_read retries on the primary
     except Exception as e:
-        print(f"Analytics error: {e}")
+        db.session.rollback()
+        sys.stderr.write(f"[Analytics] detailed failed: {str(e)}\n")
         return jsonify(error=str(e)), 500
 
 
 @api.get("/analytics/warnings")
+@replica_read
 def get_warnings_api():
     """Get all active expense warnings and alerts."""
     try:
         warnings = get_expense_warnings()
         return jsonify(warnings=warnings)
+    except OperationalError:
+        raise  # replica_read retries on the primary
     except Exception as e:
-        print(f"Warnings error: {e}")
+        db.session.rollback()
+        sys.stderr.write(f"[Analytics] warnings failed: {str(e)}\n")
         return jsonify(error=str(e)), 500
 
 
 # ── Expense Timeline (Daily aggregation) ────────────────────────────────────────
 
 @api.get("/expenses/daily")
+@replica_read
 def get_daily_expenses():
     """
     Returns per-day income/expense aggregates for the timeline graph.
@@ -278,25 +397,36 @@ def get_daily_expenses():
       - from  (YYYY-MM-DD) : start date inclusive
       - to    (YYYY-MM-DD) : end date inclusive
     """
-    from .models import Transaction
     from flask import g
 
     user_id = g.user["id"]
     from_date = request.args.get("from", "")
     to_date   = request.args.get("to", "")
 
-    query = db.session.query(Transaction).filter_by(user_id=user_id)
-
-    if from_date:
-        query = query.filter(Transaction.date >= from_date)
-    if to_date:
-        query = query.filter(Transaction.date <= to_date)
-
-    transactions = query.order_by(Transaction.date.asc()).all()
-
     from datetime import datetime, timedelta
 
-    # Aggregate per day using Python
+    cols = txcache.user_columns(from_date)
+    span = cols.span(from_date, to_date) if cols is not None else None
+    if span is not None:
+        rows = [(datetime.fromordinal(d).strftime("%Y-%m-%d"), income, expense)
+                for d, (income, expense) in cols.by_day(*span).items()]
+    else:
+        T = tx_source(from_date or None)
+        day = func.substr(T.date, 1, 10)
+        query = db.session.query(
+            day.label("date"),
+            func.sum(case((T.type == "income", T.amount_paise), else_=0)).label("income"),
+            func.sum(case((T.type == "expense", T.amount_paise), else_=0)).label("expense"),
+        ).filter(T.user_id == user_id)
+
+        if from_date:
+            query = query.filter(T.date >= from_date)
+        if to_date:
+            query = query.filter(T.date <= to_date)
+
+        rows = query.group_by(day).all()
+
+    # Per-day sums in paise, aggregated in SQL
     day_map = {}
 
     # Pre-populate day_map with the entire date range to avoid missing days
@@ -307,27 +437,17 @@ def get_daily_expenses():
             curr_dt = start_dt
             while curr_dt <= end_dt:
                 d_str = curr_dt.strftime("%Y-%m-%d")
-                day_map[d_str] = {"date": d_str, "income": 0.0, "expense": 0.0}
+                day_map[d_str] = (0, 0)
                 curr_dt += timedelta(days=1)
         except ValueError:
             pass
 
-    for tx in transactions:
-        # the format is YYYY-MM-DD
-        d = tx.date[:10]
-        if d not in day_map:
-            day_map[d] = {"date": d, "income": 0.0, "expense": 0.0}
-        
-        if tx.type == "income":
-            day_map[d]["income"] += tx.amount
-        else:
-            day_map[d]["expense"] += tx.amount
+    for d, income, expense in rows:
+        day_map[d] = (int(income or 0), int(expense or 0))
 
-    result = sorted(day_map.values(), key=lambda x: x["date"])
-    for row in result:
-        row["net"] = round(row["income"] - row["expense"], 2)
-        row["income"]  = round(row["income"], 2)
-        row["expense"] = round(row["expense"], 2)
+    result = [{"date": d, "income": to_rupees(income), "expense": to_rupees(expense),
+               "net": to_rupees(income - expense)}
+              for d, (income, expense) in sorted(day_map.items())]
 
     return jsonify(result)
 
@@ -335,12 +455,12 @@ def get_daily_expenses():
 @api.get("/user/created_at")
 def get_user_created_at():
     """Returns the date of the user's first transaction as the account creation date."""
-    from .models import Transaction
     from flask import g
     from datetime import datetime
 
     user_id = g.user["id"]
-    earliest_tx = db.session.query(Transaction.date).filter_by(user_id=user_id).order_by(Transaction.date.asc()).first()
+    T = tx_source()
+    earliest_tx = db.session.query(T.date).filter(T.user_id == user_id).order_by(T.date.asc()).first()
     
     if earliest_tx and earliest_tx.date:
         return jsonify(created_at=earliest_tx.date[:10])
@@ -0,0 +1,188 @@
+"""
+Transaction search
+==================
+`/api/transactions/search` combines a full-text query on `Transaction.note`
+with category, type, amount and date filters, newest first, paged with an
+opaque keyset cursor (date, id) so page N costs the same as page 1.
+
+The note index depends on the database:
+
+- SQLite:   FTS5 table `transactions_fts` kept in sync by insert/update/delete
+            triggers; rows carry an owner token (u<user_id>) so a match only
+            walks the current user's postings. Archived months have their own
+            `transactions_archive_fts` mirror.
+- Postgres: generated `note_search` tsvector column with a GIN index
+- anything else (or SQLite built without FTS5): case-insensitive LIKE
+
+`ensure_fts` is shared with the AI memory index (see memory.py).
+"""
+import re
+import sys
+import base64
+from flask import current_app, g
+from sqlalchemy import text, column, tuple_
+
+from .extensions import db
+from .migrations import target_engine
+from .models import Transaction, category_index, tx_columns, tx_source
+from .columnar import TX_FIELDS
+from .money import to_rupees
+
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 200
+
+
+# ── Index maintenance ─────────────────────────────────────────────────────────
+
+def ensure_fts(conn, fts_table: str, source_table: str, owner_sql: str, body_sql: str):
+    """Create an FTS5 mirror of `source_table` kept in sync by triggers (idempotent).
+
+    `owner_sql` / `body_sql` are SQL expressions over `{row}` (the source row).
+    The mirror is rebuilt whenever its triggers are missing, e.g. after the
+    source table was dropped and recreated.
+    """
+    def row(name):
+        return {"owner": owner_sql.format(row=name), "body": body_sql.format(row=name)}
+
+    has_trigger = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"
+    ), {"name": f"{fts_table}_ai"}).first()
+    if has_trigger:
+        return
+
+    conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} "
+                      "USING fts5(owner, body, tokenize='porter unicode61')"))
+    conn.execute(text(f"DELETE FROM {fts_table}"))
+    src = row(source_table)
+    conn.execute(text(f"INSERT INTO {fts_table}(rowid, owner, body) "
+                      f"SELECT id, {src['owner']}, {src['body']} FROM {source_table}"))
+    new, old = row("new"), row("old")
+    conn.execute(text(f"""CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {source_table} BEGIN
+        INSERT INTO {fts_table}(rowid, owner, body) VALUES (new.id, {new['owner']}, {new['body']});
+    END"""))
+    conn.execute(text(f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source_table} BEGIN
+        DELETE FROM {fts_table} WHERE rowid = old.id;
+    END"""))
+    conn.execute(text(f"""CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {source_table} BEGIN
+        DELETE FROM {fts_table} WHERE rowid = old.id;
+        INSERT INTO {fts_table}(rowid, owner, body) VALUES (new.id, {new['owner']}, {new['body']});
+    END"""))
+
+
+_POSTGRES_DDL = [
+    "ALTER TABLE transactions ADD COLUMN IF NOT EXISTS note_search tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(note, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_transactions_note_search ON transactions USING GIN (note_search)",
+]
+
+
+def init_transaction_search(app):
+    """Create the note index for the current database (idempotent). Call after create_all."""
+    mode = "like"
+    try:
+        with target_engine().begin() as conn:
+            dialect = target_engine().dialect.name
+            if dialect == "sqlite":
+                for source in ("transactions", "transactions_archive"):
+                    ensure_fts(conn, f"{source}_fts", source,
+                               "'u' || {row}.user_id", "coalesce({row}.note, '')")
+                mode = "fts5"
+            elif dialect == "postgresql":
+                for stmt in _POSTGRES_DDL:
+                    conn.execute(text(stmt))
+                mode = "tsvector"
+    except Exception as e:
+        sys.stderr.write(f"[Search] full-text index unavailable, using LIKE: {str(e)}\n")
+    app.extensions["transaction_search"] = mode
+    return mode
+
+
+# ── Cursor ────────────────────────────────────────────────────────────────────
+
+def encode_cursor(date: str, tx_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{date}|{tx_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(date, id) from an encoded cursor; raises ValueError on junk."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, tx_id = raw.split("|")
+        return date, int(tx_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+# ── Query ─────────────────────────────────────────────────────────────────────
+
+def _terms(q: str) -> list:
+    return re.findall(r"\w+", (q or "").lower())[:8]
+
+
+def _fts_ids(fts_table: str, match: str):
+    return text(f"SELECT rowid FROM {fts_table} WHERE {fts_table} MATCH :match")\
+        .bindparams(match=match).columns(column("rowid"))
+
+
+def _note_filter(q: str, user_id, T=Transaction):
+    terms = _terms(q)
+    if not terms:
+        return None
+    mode = current_app.extensions.get("transaction_search", "like")
+    if mode == "fts5":
+        match = f"owner:u{int(user_id)} AND body:(" + " AND ".join(f'"{t}"*' for t in terms) + ")"
+        if T is Transaction:
+            return T.id.in_(_fts_ids("transactions_fts", match))
+        # hot+archive view: archived rows are indexed by their own mirror
+        return db.or_(T.id.in_(_fts_ids("transactions_fts", match)),
+                      T.id.in_(_fts_ids("transactions_archive_fts", match)))
+    if mode == "tsvector":
+        return text("transactions.note_search @@ to_tsquery('english', :tsq)")\
+            .bindparams(tsq=" & ".join(f"{t}:*" for t in terms))
+    return db.and_(*[T.note.ilike(f"%{t}%") for t in terms])
+
+
+def search_transactions(q=None, category=None, tx_type=None, min_amount=None, max_amount=None,
+                        date_from=None, date_to=None, limit=SEARCH_PAGE_SIZE, cursor=None, columnar=False):
+    """One page of the current user's matching transactions, newest first.
+
+    `min_amount` / `max_amount` are in paise.
+    Returns {"items": [...], "next_cursor": str | None}; with `columnar`,
+    "items" uses the columnar encoding (see columnar.py).
+    """
+    user_id = g.user["id"]
+    names = category_index().names
+    T = tx_source(date_from)
+    query = db.select(T.id, T.type, T.category_id, T.amount_paise, T.note, T.date).where(T.user_id == user_id)
+
+    note_filter = _note_filter(q, user_id, T) if q else None
+    if note_filter is not None:
+        query = query.where(note_filter)
+    if category:
+        query = query.where(T.category_id == category_index().ids.get(category))
+    if tx_type:
+        query = query.where(T.type == tx_type)
+    if min_amount is not None:
+        query = query.where(T.amount_paise >= min_amount)
+    if max_amount is not None:
+        query = query.where(T.amount_paise <= max_amount)
+    if date_from:
+        query = query.where(T.date >= date_from)
+    if date_to:
+        query = query.where(T.date <= date_to)
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        query = query.where(tuple_(T.date, T.id) < (after_date, after_id))
+
+    limit = max(1, min(int(limit or SEARCH_PAGE_SIZE), SEARCH_MAX_PAGE_SIZE))
+    rows = db.session.execute(
+        query.order_by(T.date.desc(), T.id.desc()).limit(limit + 1)
+    ).all()
+
+    page = rows[:limit]
+    return {
+        "items": tx_columns(page) if columnar
+                 else [dict(zip(TX_FIELDS, r), category=names[r.category_id], amount=to_rupees(r.amount_paise))
+                       for r in page],
+        "next_cursor": encode_cursor(page[-1].date, page[-1].id) if len(rows) > limit else None,
+    }
@@ -0,0 +1,237 @@
+"""
+User shards
+===========
+Optional. DATABASE_SHARD_URLS (comma-separated) adds shards 1..N next to
+DATABASE_URL, which is shard 0 and also the directory: `users` (logins,
+profiles) and the schema_* bookkeeping stay there for everyone, and
+`users.shard` records where each user's own rows live (NULL: shard 0).
+Transactions and their archive, limits, ai_memory, change_log and the
+full-text indexes over them live on that one shard.
+
+Routing: load_logged_in_user (auth.py) sets `g.db_shard` from the directory
+row it already loads, and RoutingSession (extensions.py) sends every
+statement that does not touch a directory table there, so the per-user
+helpers in models.py take no shard argument.
+
+Placement: a new user goes to `user id % shard count`, recorded once in the
+directory, so adding a shard never remaps anyone; `rebalance_shards.py`
+moves existing users. Every shard gets the full schema and migrations on
+boot, a copy of `categories`, and a key-only `users` row per resident for
+the foreign keys. On Postgres shard k's id sequences start at
+k * SHARD_ID_SPAN, so ids are unique across shards and a moved user keeps
+theirs. SQLite numbers every shard from 1, so a move there can collide on
+ids and abort: SQLite shards are for development.
+
+Every shard must use the primary's database (all SQLite or all Postgres).
+"""
+import os
+import time
+
+from flask import current_app
+from sqlalchemy import delete, select, text, update
+
+from . import metrics
+from .extensions import db
+from .migrations import BACKFILL_CHUNK, PROGRESS_EVERY, on_engine
+from .models import AIMemory, Category, ChangeLog, Limit, SyncSequence, Transaction, User, archived_transactions
+
+SHARD_ID_SPAN = 100_000_000  # ids per shard; int4 ids leave room for 21 shards
+MOVE_GRACE_SECONDS = float(os.environ.get("SHARD_MOVE_GRACE", "2"))  # longest request still in flight
+
+_SERIAL_TABLES = ("transactions", "limits", "ai_memory", "change_log")
+_MUTABLE_TABLES = [Limit.__table__, AIMemory.__table__]  # small and upserted in place: recopied whole
+
+metrics.describe("trackex_shard_users", "gauge", "Users per shard, from the shard directory")
+
+
+def shard_count():
+    return 1 + len(current_app.config.get("SHARD_URLS") or [])
+
+
+def shard_engine(shard):
+    """Engine holding `shard`'s rows; shard 0 (or NULL) is the primary."""
+    return db.engines[f"shard{shard}"] if shard else db.engine
+
+
+def _tx_storage(engine):
+    return [Transaction.__table__, archived_transactions] if engine.dialect.name == "sqlite" \
+        else [Transaction.__table__]
+
+
+# ── Directory ─────────────────────────────────────────────────────────────────
+
+def _ensure_user_row(engine, user_id):
+    """A key-only `users` row on a shard for the foreign keys; the real one stays on shard 0."""
+    if engine is db.engine:
+        return
+    users = User.__table__
+    with engine.begin() as conn:
+        if conn.execute(select(users.c.id).where(users.c.id == user_id)).first() is None:
+            conn.execute(users.insert().values(id=user_id, username=f"#{user_id}"))
+
+
+def _set_directory(user_id, **values):
+    with db.engine.begin() as conn:
+        conn.execute(update(User.__table__).where(User.__table__.c.id == user_id).values(**values))
+
+
+def place_user(user):
+    """Assign a just-committed new user to its shard."""
+    count = shard_count()
+    if count == 1:
+        return
+    shard = user.id % count
+    _ensure_user_row(shard_engine(shard), user.id)
+    user.shard = shard
+    db.session.commit()
+
+
+def update_shard_gauges():
+    """Users per shard for /metrics: one GROUP BY on the directory."""
+    if shard_count() == 1:
+        return
+    counts = dict(db.session.query(User.shard, db.func.count(User.id)).group_by(User.shard).all())
+    counts[0] = counts.get(0, 0) + counts.pop(None, 0)
+    for shard in range(shard_count()):
+        metrics.set_gauge("trackex_shard_users", counts.get(shard, 0), shard=str(shard))
+
+
+# ── Schema ────────────────────────────────────────────────────────────────────
+
+def sync_categories(engine):
+    """Copy categories the shard is missing from the primary, ids included."""
+    categories = Category.__table__
+    with db.engine.connect() as conn:
+        rows = [dict(r._mapping) for r in conn.execute(select(categories))]
+    with engine.begin() as conn:
+        have = set(conn.execute(select(categories.c.id)).scalars())
+        missing = [r for r in rows if r["id"] not in have]
+        if missing:
+            conn.execute(categories.insert(), missing)
+
+
+def _reserve_ids(engine, shard):
+    """Start the shard's id sequences at shard * SHARD_ID_SPAN (Postgres)."""
+    if engine.dialect.name != "postgresql":
+        return
+    start = shard * SHARD_ID_SPAN
+    with engine.begin() as conn:
+        for table in _SERIAL_TABLES:
+            seq = conn.execute(text("SELECT pg_get_serial_sequence(:t, 'id')"), {"t": table}).scalar()
+            if seq and conn.execute(text(f"SELECT last_value FROM {seq}")).scalar() < start:
+                conn.execute(text("SELECT setval(CAST(:seq AS regclass), :start, false)"),
+                             {"seq": seq, "start": start})
+
+
+def init_shards(app):
+    """Create, migrate and seed every shard beyond the primary (called by init_db)."""
+    from .database import upgrade_schema
+    for shard in range(1, shard_count()):
+        engine = shard_engine(shard)
+        with on_engine(engine):
+            db.metadata.create_all(engine)
+            sync_categories(engine)
+            upgrade_schema(app)
+        _reserve_ids(engine, shard)
+
+
+# ── Rebalancing ───────────────────────────────────────────────────────────────
+
+def _ids(engine, table, user_id):
+    with engine.connect() as conn:
+        return set(conn.execute(select(table.c.id).where(table.c.user_id == user_id)).scalars())
+
+
+def _insert_rows(conn, table, rows):
+    if rows:
+        conn.execute(table.insert(), [{c.key: r._mapping[c] for c in table.columns} for r in rows])
+
+
+def _sync_rows(src, dst, table, user_id, chunk_size):
+    """Make `dst` hold exactly the user's `table` rows that `src` has; returns rows copied.
+
+    Compares ids only: these rows are inserted and deleted, never updated.
+    """
+    want, have = _ids(src, table, user_id), _ids(dst, table, user_id)
+    missing, stale = sorted(want - have), sorted(have - want)
+    for batch, i in enumerate(range(0, len(missing), chunk_size), 1):
+        ids = missing[i:i + chunk_size]
+        with src.connect() as conn:
+            rows = conn.execute(select(table).where(table.c.id.in_(ids))).all()
+        with dst.begin() as conn:
+            _insert_rows(conn, table, rows)
+        if batch % PROGRESS_EVERY == 0:
+            print(f"Copying {table.name} of user {user_id}: {i + len(ids)} of {len(missing)} rows.")
+    for i in range(0, len(stale), chunk_size):
+        with dst.begin() as conn:
+            conn.execute(delete(table).where(table.c.id.in_(stale[i:i + chunk_size])))
+    return len(missing)
+
+
+def _replace_rows(src, dst, table, user_id):
+    with src.connect() as conn:
+        rows = conn.execute(select(table).where(table.c.user_id == user_id)).all()
+    with dst.begin() as conn:
+        conn.execute(delete(table).where(table.c.user_id == user_id))
+        _insert_rows(conn, table, rows)
+
+
+def _purge(engine, tables, user_id, chunk_size):
+    """Delete the user's rows from `tables` in batches of `chunk_size`."""
+    for table in tables:
+        while True:
+            with engine.begin() as conn:
+                batch = select(table.c.id).where(table.c.user_id == user_id).limit(chunk_size)
+                if not conn.execute(delete(table).where(table.c.id.in_(batch))).rowcount:
+                    break
+
+
+def move_user(user_id, target, chunk_size=None):
+    """Move one user's rows to shard `target` while they keep using the app; returns rows copied.
+
+    1. Copy the transaction history in batches; the user can still write.
+    2. Freeze: `users.shard_target` makes auth.py answer their writes with 503.
+       Wait MOVE_GRACE_SECONDS for writes already past that check, bring the
+       history level (rows added or deleted since step 1) and recopy limits
+       and memories.
+    3. Point the directory at `target` and lift the freeze.
+    4. Wait again for reads still running against the source, then delete the
+       user's rows there. The change log and its sequence are not copied: the
+       sync cursor names the move count, so clients resync in full once.
+    Until step 3 the source stays authoritative, so a failure lifts the freeze,
+    removes the partial copy and re-raises.
+    """
+    chunk_size = chunk_size or BACKFILL_CHUNK
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise ValueError(f"no user {user_id}")
+    if not 0 <= target < shard_count():
+        raise ValueError(f"no shard {target}")
+    source = user.shard or 0
+    if target == source:
+        return 0
+    src, dst = shard_engine(source), shard_engine(target)
+    history = _tx_storage(src)
+    sync_categories(dst)
+    _ensure_user_row(dst, user_id)
+
+    try:
+        copied = sum(_sync_rows(src, dst, table, user_id, chunk_size) for table in history)
+        _set_directory(user_id, shard_target=target)
+        time.sleep(MOVE_GRACE_SECONDS)
+        copied += sum(_sync_rows(src, dst, table, user_id, chunk_size) for table in history)
+        for table in _MUTABLE_TABLES:
+            _replace_rows(src, dst, table, user_id)
+    except Exception:
+        _set_directory(user_id, shard_target=None)
+        _purge(dst, history + _MUTABLE_TABLES, user_id, chunk_size)
+        raise
+    _set_directory(user_id, shard=target, shard_target=None, shard_moves=(user.shard_moves or 0) + 1)
+
+    time.sleep(MOVE_GRACE_SECONDS)
+    _purge(src, history + _MUTABLE_TABLES + [ChangeLog.__table__], user_id, chunk_size)
+    with src.begin() as conn:
+        conn.execute(delete(SyncSequence.__table__).where(SyncSequence.__table__.c.user_id == user_id))
+        if source:
+            conn.execute(delete(User.__table__).where(User.__table__.c.id == user_id))
+    return copied
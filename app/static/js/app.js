@@ -10,7 +10,7 @@ const CATEGORIES = {
         { value: 'Rent Income', label: '🏠 Rent Income', color: '#10b981' }, // Emerald 500
         { value: 'Business', label: '🤝 Business', color: '#f59e0b' },
         { value: 'Bonus', label: '🏆 Bonus', color: '#fbbf24' },
-        { value: 'Other', label: '💡 Other', color: '#64748b' }, // Slate 500
+        { value: 'Other Income', label: '💡 Other Income', color: '#64748b' }, // Slate 500
     ],
     expense: [
         { value: 'Groceries', label: '🛒 Groceries', color: '#f43f5e' }, // Rose 500
@@ -31,10 +31,29 @@ const CATEGORIES = {
 
 const CAT_ICON = {};
 const CAT_COLOR = {};
-[...CATEGORIES.income, ...CATEGORIES.expense].forEach(c => {
+function indexCategory(c) {
     CAT_ICON[c.value] = c.label.split(' ')[0];
     CAT_COLOR[c.value] = c.color;
-});
+}
+[...CATEGORIES.income, ...CATEGORIES.expense].forEach(indexCategory);
+
+/**
+ * Take the category lists from the server whitelist (/api/categories). The
+ * table above only supplies icons and colours; unknown categories get a default.
+ */
+async function loadCategories() {
+    const rows = await api('/api/categories', {}, null);
+    if (!Array.isArray(rows) || !rows.length) return;  // keep the built-in lists
+    const styles = {};
+    [...CATEGORIES.income, ...CATEGORIES.expense].forEach(c => { styles[c.value] = c; });
+    CATEGORIES.income = [];
+    CATEGORIES.expense = [];
+    rows.forEach(r => {
+        const c = styles[r.name] || { value: r.name, label: `🏷️ ${r.name}`, color: '#64748b' };
+        (CATEGORIES[r.kind] || CATEGORIES.expense).push(c);
+        indexCategory(c);
+    });
+}
 
 // ── State ──────────────────────────────────────────────────────────────────────
 const state = {
@@ -58,6 +77,7 @@ const $ = id => document.getElementById(id);
 document.addEventListener('DOMContentLoaded', async () => {
     setTodayDate();
     populateCats('income');
+    loadCategories().then(() => populateCats(state.type));
     await loadMonths();
     await refreshAll();
     await initTimelineChart();
@@ -144,21 +164,135 @@ async function loadMonths() {
     sel.innerHTML = opts.join('');
 }
 
+// ── Local transaction cache ────────────────────────────────────────────────────
+// Transactions and limits are kept in IndexedDB and brought up to date with
+// /api/sync deltas (upserts + tombstones), so a refresh with no changes moves
+// a few bytes instead of the whole list. Without IndexedDB it is memory-only.
+const txCache = {
+    db: null,
+    cursor: '',
+    rows: new Map(),   // id -> transaction
+    limits: {},
+    loaded: false,
+};
+
+function idbRequest(req) {
+    return new Promise((resolve, reject) => {
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+    });
+}
+
+async function openTxCache() {
+    if (txCache.loaded) return;
+    txCache.loaded = true;
+    if (!window.indexedDB) return;
+    try {
+        const open = indexedDB.open('trackex-cache', 1);
+        open.onupgradeneeded = () => {
+            open.result.createObjectStore('transactions', { keyPath: 'id' });
+            open.result.createObjectStore('meta');
+        };
+        txCache.db = await idbRequest(open);
+        const tx = txCache.db.transaction(['transactions', 'meta'], 'readonly');
+        const [rows, cursor, limits] = await Promise.all([
+            idbRequest(tx.objectStore('transactions').getAll()),
+            idbRequest(tx.objectStore('meta').get('cursor')),
+            idbRequest(tx.objectStore('meta').get('limits')),
+        ]);
+        rows.forEach(r => txCache.rows.set(r.id, r));
+        txCache.cursor = cursor || '';
+        txCache.limits = limits || {};
+    } catch (err) {
+        console.warn('[Cache] IndexedDB unavailable, using memory only:', err);
+        txCache.db = null;
+    }
+}
+
+async function persistTxCache(delta) {
+    if (!txCache.db) return;
+    try {
+        const tx = txCache.db.transaction(['transactions', 'meta'], 'readwrite');
+        const store = tx.objectStore('transactions');
+        if (delta.full) store.clear();
+        delta.transactions.upserts.forEach(r => store.put(r));
+        delta.transactions.deletes.forEach(id => store.delete(id));
+        tx.objectStore('meta').put(txCache.cursor, 'cursor');
+        tx.objectStore('meta').put(txCache.limits, 'limits');
+        await new Promise((resolve, reject) => {
+            tx.oncomplete = resolve;
+            tx.onerror = () => reject(tx.error);
+        });
+    } catch (err) {
+        console.warn('[Cache] could not persist sync delta:', err);
+    }
+}
+
+/**
+ * Rows from a `format=columnar` payload (parallel arrays, dictionary-encoded
+ * strings, integer paise amounts; see app/columnar.py). Plain arrays pass through unchanged.
+ */
+function decodeColumnar(block) {
+    if (!block || block.format !== 'columnar') return block;
+    const fields = Object.keys(block.columns);
+    const scale = block.scale || {};
+    const rows = new Array(block.count);
+    for (let i = 0; i < block.count; i++) {
+        const row = {};
+        for (const f of fields) {
+            const v = block.columns[f][i];
+            row[f] = block.dicts[f] ? block.dicts[f][v] : scale[f] ? v / scale[f] : v;
+        }
+        rows[i] = row;
+    }
+    return rows;
+}
+
+async function syncTransactions() {
+    await openTxCache();
+    const delta = await api(`/api/sync?format=columnar&since=${encodeURIComponent(txCache.cursor)}`, {}, null);
+    if (!delta || !delta.transactions) return;  // offline: keep serving the cache
+    delta.transactions.upserts = decodeColumnar(delta.transactions.upserts);
+
+    if (delta.full) {
+        txCache.rows.clear();
+        txCache.limits = {};
+    }
+    delta.transactions.upserts.forEach(r => txCache.rows.set(r.id, r));
+    delta.transactions.deletes.forEach(id => txCache.rows.delete(id));
+    Object.assign(txCache.limits, delta.limits.upserts);
+    delta.limits.deletes.forEach(cat => delete txCache.limits[cat]);
+    txCache.cursor = delta.cursor;
+
+    if (delta.full || delta.transactions.upserts.length || delta.transactions.deletes.length
+        || Object.keys(delta.limits.upserts).length || delta.limits.deletes.length) {
+        await persistTxCache(delta);
+    }
+}
+
+function cachedTransactions(month) {
+    const rows = [];
+    txCache.rows.forEach(r => {
+        if (!month || r.date.startsWith(month)) rows.push(r);
+    });
+    // Same order as /api/transactions: newest date first, then newest id
+    return rows.sort((a, b) => (a.date < b.date ? 1 : a.date > b.date ? -1 : b.id - a.id));
+}
+
 // ── Refresh all data ───────────────────────────────────────────────────────────
 async function refreshAll() {
-    const [txs, summary, aiInsights, limits, analytics, warnings] = await Promise.all([
-        api(`/api/transactions${state.month ? `?month=${state.month}` : ''}`, {}, []),
+    const [, summary, aiInsights, analytics, warnings] = await Promise.all([
+        syncTransactions(),
         api(`/api/summary${state.month ? `?month=${state.month}` : ''}`, {},
             { income: 0, expense: 0, balance: 0, categories: [], trend: [] }),
         api(`/api/ai_insights${state.month ? `?month=${state.month}` : ''}`, {}, { insight: "Unable to load AI insights.", source: "" }),
-        api('/api/limits', {}, {}),
         api(`/api/analytics/detailed${state.month ? `?month=${state.month}` : ''}`, {}, {}),
         api('/api/analytics/warnings', {}, { warnings: [] }),
     ]);
 
     // Guard: ensure data shapes are correct before rendering
-    state.transactions = Array.isArray(txs) ? txs : [];
-    state.limits = limits || {};
+    state.transactions = cachedTransactions(state.month);
+    state.limits = { ...txCache.limits };
     state.summary = {
         income: typeof summary.income === 'number' ? summary.income : 0,
         expense: typeof summary.expense === 'number' ? summary.expense : 0,
@@ -168,10 +302,13 @@ async function refreshAll() {
     };
 
     // Reset animated counter baselines when month changes
-    ['stat-balance', 'stat-income', 'stat-expense'].forEach(id => {
-        const el = $(id);
-        if (el) el.dataset.val = '0';
-    });
+    if (state.renderedMonth !== state.month) {
+        state.renderedMonth = state.month;
+        ['stat-balance', 'stat-income', 'stat-expense'].forEach(id => {
+            const el = $(id);
+            if (el) el.dataset.val = '0';
+        });
+    }
 
     renderStats();
     renderTxList();
@@ -265,7 +402,9 @@ function renderTopCategory() {
 }
 
 function animateValue(el, target) {
+    if (!el) return;
     const start = parseFloat(el.dataset.val || '0');
+    if (start === target && el.textContent === fmt(target)) return;  // unchanged since last refresh
     const diff = target - start;
     const dur = 600;
     const t0 = performance.now();
@@ -339,11 +478,52 @@ function renderAnalyticsCards() {
 }
 
 // ── Transaction list ───────────────────────────────────────────────────────────
+// Virtualized: only the rows in view exist in the DOM, patched by id (see render.js)
+const TX_ROW_HEIGHT = 70;
+let txList = null;
+let txEmptyEl = null;
+
+function createTxRow() {
+    const row = document.createElement('div');
+    row.className = 'tx-item';
+    row.setAttribute('role', 'listitem');
+    row.innerHTML = `
+      <div class="tx-avatar"></div>
+      <div class="tx-body">
+        <div class="tx-cat"></div>
+        <div class="tx-note"></div>
+      </div>
+      <div class="tx-right">
+        <div class="tx-amount"></div>
+        <div class="tx-date"></div>
+      </div>
+      <button class="btn-del" title="Delete" aria-label="Delete record">🗑</button>`;
+    row.querySelector('.btn-del').addEventListener('click', () => deleteTx(row.__key));
+    return row;
+}
+
+function updateTxRow(row, tx) {
+    const avatar = row.querySelector('.tx-avatar');
+    const amount = row.querySelector('.tx-amount');
+    row.id = `tx-${tx.id}`;
+    row.style.opacity = '';
+    row.style.pointerEvents = '';
+    avatar.className = `tx-avatar ${tx.type}`;
+    setText(avatar, CAT_ICON[tx.category] || '💡');
+    setText(row.querySelector('.tx-cat'), tx.category);
+    const noteEl = row.querySelector('.tx-note');
+    setText(noteEl, tx.note || 'No note');
+    noteEl.classList.toggle('tx-note-empty', !tx.note);
+    amount.className = `tx-amount ${tx.type}`;
+    setText(amount, `${tx.type === 'income' ? '+' : '-'}${fmt(tx.amount)}`);
+    setText(row.querySelector('.tx-date'), fmtDate(tx.date));
+}
+
 function renderTxList() {
     const listEl = $('tx-list');
     const countEl = $('tx-count');
 
-    let items = [...state.transactions];
+    let items = state.transactions;
 
     // Type filter
     if (state.filter !== 'all') items = items.filter(t => t.type === state.filter);
@@ -356,31 +536,27 @@ function renderTxList() {
         );
     }
 
-    countEl.textContent = `${items.length} record${items.length !== 1 ? 's' : ''}`;
-
-    if (items.length === 0) {
-        listEl.innerHTML = `
-      <div class="empty">
-        <span class="empty-icon">🗂️</span>
-        <p>${state.search ? 'No results found.' : 'No transactions yet.'}</p>
-      </div>`;
-        return;
+    setText(countEl, `${items.length} record${items.length !== 1 ? 's' : ''}`);
+
+    if (!txList) {
+        listEl.innerHTML = '';
+        listEl.classList.add('tx-virtual');
+        txEmptyEl = document.createElement('div');
+        txEmptyEl.className = 'empty';
+        txEmptyEl.innerHTML = '<span class="empty-icon">🗂️</span><p></p>';
+        listEl.appendChild(txEmptyEl);
+        txList = new VirtualList(listEl, {
+            rowHeight: TX_ROW_HEIGHT,
+            keyOf: tx => tx.id,
+            sigOf: tx => `${tx.type}|${tx.category}|${tx.amount}|${tx.date}|${tx.note || ''}`,
+            create: createTxRow,
+            update: updateTxRow,
+        });
     }
 
-    listEl.innerHTML = items.map((tx, i) => `
-    <div class="tx-item" id="tx-${tx.id}" style="animation-delay:${Math.min(i * 30, 200)}ms">
-      <div class="tx-avatar ${tx.type}">${CAT_ICON[tx.category] || '💡'}</div>
-      <div class="tx-body">
-        <div class="tx-cat">${tx.category}</div>
-        <div class="tx-note">${tx.note || '<span style="opacity:.4">No note</span>'}</div>
-      </div>
-      <div class="tx-right">
-        <div class="tx-amount ${tx.type}">${tx.type === 'income' ? '+' : '-'}${fmt(tx.amount)}</div>
-        <div class="tx-date">${fmtDate(tx.date)}</div>
-      </div>
-      <button class="btn-del" onclick="deleteTx(${tx.id})" title="Delete" aria-label="Delete record">🗑</button>
-    </div>
-  `).join('');
+    txEmptyEl.style.display = items.length ? 'none' : '';
+    setText(txEmptyEl.lastChild, state.search ? 'No results found.' : 'No transactions yet.');
+    txList.setItems(items);
 }
 
 // ── Delete ─────────────────────────────────────────────────────────────────────
@@ -453,62 +629,96 @@ function renderDonut() {
         return;
     }
 
-    wrap.innerHTML = `
-    <div class="donut-wrap">
-      <div class="donut-canvas-wrap">
-        <canvas id="donut-chart" width="160" height="160"></canvas>
-        <div class="donut-center">
-          <span class="donut-center-pct" id="donut-label">100%</span>
-          <span class="donut-center-label">Spent</span>
-        </div>
-      </div>
-      <div class="legend" id="donut-legend"></div>
-    </div>`;
-
     const total = cats.reduce((a, c) => a + c.total, 0);
     const top5 = cats.slice(0, 5);
     const rest = cats.slice(5).reduce((a, c) => a + c.total, 0);
     const data = rest > 0 ? [...top5, { category: 'Other', total: rest }] : top5;
     const colors = data.map(d => CAT_COLOR[d.category] || '#8b93b8');
 
-    if (donutChart) donutChart.destroy();
-    donutChart = new Chart($('donut-chart'), {
-        type: 'doughnut',
-        data: {
-            labels: data.map(d => d.category),
-            datasets: [{ data: data.map(d => d.total), backgroundColor: colors, borderWidth: 0, hoverOffset: 8 }],
-        },
-        options: {
-            cutout: '68%',
-            plugins: {
-                legend: { display: false },
-                tooltip: {
-                    callbacks: {
-                        label: ctx => ` ${fmt(ctx.raw)} (${((ctx.raw / total) * 100).toFixed(1)}%)`,
+    if (donutChart) {
+        // Patch the existing chart: same canvas, new series, animate only when it changed
+        donutChart.$data = data;
+        donutChart.$total = total;
+        if (updateSeries(donutChart, data.map(d => d.category), [data.map(d => d.total)])) {
+            donutChart.data.datasets[0].backgroundColor = colors;
+            donutChart.update();
+        }
+    } else {
+        wrap.innerHTML = `
+        <div class="donut-wrap">
+          <div class="donut-canvas-wrap">
+            <canvas id="donut-chart" width="160" height="160"></canvas>
+            <div class="donut-center">
+              <span class="donut-center-pct" id="donut-label">100%</span>
+              <span class="donut-center-label">Spent</span>
+            </div>
+          </div>
+          <div class="legend" id="donut-legend"></div>
+        </div>`;
+
+        donutChart = new Chart($('donut-chart'), {
+            type: 'doughnut',
+            data: {
+                labels: data.map(d => d.category),
+                datasets: [{ data: data.map(d => d.total), backgroundColor: colors, borderWidth: 0, hoverOffset: 8 }],
+            },
+            options: {
+                cutout: '68%',
+                plugins: {
+                    legend: { display: false },
+                    tooltip: {
+                        callbacks: {
+                            label: ctx => ` ${fmt(ctx.raw)} (${((ctx.raw / donutChart.$total) * 100).toFixed(1)}%)`,
+                        },
                     },
                 },
+                onHover: (e, els) => {
+                    const labelEl = $('donut-label');
+                    if (!labelEl) return;
+                    if (els.length) {
+                        const idx = els[0].index;
+                        const pct = ((donutChart.$data[idx].total / donutChart.$total) * 100).toFixed(0);
+                        labelEl.textContent = pct + '%';
+                    } else {
+                        labelEl.textContent = '100%';
+                    }
+                },
             },
-            onHover: (e, els) => {
-                const labelEl = $('donut-label');
-                if (!labelEl) return;
-                if (els.length) {
-                    const idx = els[0].index;
-                    const pct = ((data[idx].total / total) * 100).toFixed(0);
-                    labelEl.textContent = pct + '%';
-                } else {
-                    labelEl.textContent = '100%';
-                }
-            },
+        });
+        donutChart.$data = data;
+        donutChart.$total = total;
+        updateSeries(donutChart, data.map(d => d.category), [data.map(d => d.total)]);
+    }
+
+    // Legend
+    patchKeyed($('donut-legend'), data.map((d, i) => ({ ...d, color: colors[i] })), {
+        keyOf: d => d.category,
+        sigOf: d => `${d.total}|${d.color}`,
+        create: () => {
+            const item = document.createElement('div');
+            item.className = 'legend-item';
+            item.innerHTML = '<span class="legend-dot"></span><span class="legend-name"></span><span class="legend-val"></span>';
+            return item;
+        },
+        update: (item, d) => {
+            item.children[0].style.background = d.color;
+            setText(item.children[1], d.category);
+            setText(item.children[2], fmt(d.total));
         },
     });
+}
 
-    // Legend
-    $('donut-legend').innerHTML = data.map((d, i) => `
-    <div class="legend-item">
-      <span class="legend-dot" style="background:${colors[i]}"></span>
-      <span class="legend-name">${d.category}</span>
-      <span class="legend-val">${fmt(d.total)}</span>
-    </div>`).join('');
+/**
+ * Replace a chart's labels/series in place; returns false when nothing changed
+ * so the caller can skip chart.update() and its redraw.
+ */
+function updateSeries(chart, labels, series) {
+    const next = JSON.stringify([labels, series]);
+    if (chart.$series === next) return false;
+    chart.$series = next;
+    chart.data.labels = labels;
+    series.forEach((values, i) => { chart.data.datasets[i].data = values; });
+    return true;
 }
 
 // ── Trend Chart ────────────────────────────────────────────────────────────────
@@ -526,7 +736,13 @@ function renderTrend() {
         return new Date(y, m - 1).toLocaleString('default', { month: 'short' });
     });
 
-    if (trendChart) trendChart.destroy();
+    if (trendChart) {
+        if (updateSeries(trendChart, labels, [trend.map(t => t.income), trend.map(t => t.expense)])) {
+            trendChart.update();
+        }
+        return;
+    }
+
     trendChart = new Chart($('trend-chart'), {
         type: 'bar',
         data: {
@@ -569,6 +785,7 @@ function renderTrend() {
             },
         },
     });
+    updateSeries(trendChart, labels, [trend.map(t => t.income), trend.map(t => t.expense)]);
 }
 
 // ── Category bars ──────────────────────────────────────────────────────────────
@@ -584,44 +801,52 @@ function renderCatBars() {
     }
     wrap.style.display = '';
 
+    // Rows are keyed by category; only rows whose numbers changed are re-rendered
     const max = cats[0].total;
-    el.innerHTML = cats.slice(0, 10).map(c => {
-        const limit = limits[c.category];
-        const pct = limit ? (c.total / limit) * 100 : (c.total / max) * 100;
-        const isOver = limit && c.total > limit;
-        const isWarning = limit && c.total > limit * 0.75 && !isOver;
-
-        let statusClass = '';
-        let statusIcon = '';
-
-        if (isOver) {
-            statusClass = 'over-limit';
-            statusIcon = '🔴 EXCEEDED';
-        } else if (isWarning) {
-            statusClass = 'warning-limit';
-            statusIcon = '🟡 WARNING';
-        } else if (limit && c.total > limit * 0.5) {
-            statusIcon = '🟢';
-        }
+    const rows = cats.slice(0, 10).map(c => ({ ...c, limit: limits[c.category], max }));
+    patchKeyed(el, rows, {
+        keyOf: c => c.category,
+        sigOf: c => `${c.total}|${c.limit}|${c.max}`,
+        create: () => document.createElement('div'),
+        update: (row, c) => renderCatRow(row, c),
+    });
+}
 
-        return `
-        <div class="cat-row ${statusClass}">
-          <div class="cat-row-top">
-            <span class="cat-row-name">
-              ${CAT_ICON[c.category] || '💡'} ${c.category}
-              ${limit ? `<span class="cat-row-limit">${statusIcon}</span>` : ''}
-            </span>
-            <span class="cat-row-amt" style="color:${isOver ? 'var(--red)' : (CAT_COLOR[c.category] || '#ff4d6d')}">${fmt(c.total)}</span>
-          </div>
-          <div class="cat-track ${limit ? 'limit-set' : ''}" style="position:relative">
-            <div class="cat-fill ${isOver ? 'over-limit' : (isWarning ? 'warning-limit' : '')}" 
-                 style="width:${Math.min(pct, 100).toFixed(1)}%; background:${CAT_COLOR[c.category] || '#ff4d6d'}">
-            </div>
-            ${limit ? `<div class="cat-limit-mark" style="left:${Math.min(100, (limit / max) * 100).toFixed(1)}%; background:${isOver ? 'var(--red)' : '#cbd5e1'}"></div>` : ''}
-          </div>
-          ${limit ? `<div class="cat-row-limit-info">${fmt(limit - c.total >= 0 ? limit - c.total : 0)} remaining of ${fmt(limit)}</div>` : ''}
-        </div>`;
-    }).join('');
+function renderCatRow(row, c) {
+    const { limit, max } = c;
+    const pct = limit ? (c.total / limit) * 100 : (c.total / max) * 100;
+    const isOver = limit && c.total > limit;
+    const isWarning = limit && c.total > limit * 0.75 && !isOver;
+
+    let statusClass = '';
+    let statusIcon = '';
+
+    if (isOver) {
+        statusClass = 'over-limit';
+        statusIcon = '🔴 EXCEEDED';
+    } else if (isWarning) {
+        statusClass = 'warning-limit';
+        statusIcon = '🟡 WARNING';
+    } else if (limit && c.total > limit * 0.5) {
+        statusIcon = '🟢';
+    }
+
+    row.className = `cat-row ${statusClass}`;
+    row.innerHTML = `
+      <div class="cat-row-top">
+        <span class="cat-row-name">
+          ${CAT_ICON[c.category] || '💡'} ${c.category}
+          ${limit ? `<span class="cat-row-limit">${statusIcon}</span>` : ''}
+        </span>
+        <span class="cat-row-amt" style="color:${isOver ? 'var(--red)' : (CAT_COLOR[c.category] || '#ff4d6d')}">${fmt(c.total)}</span>
+      </div>
+      <div class="cat-track ${limit ? 'limit-set' : ''}" style="position:relative">
+        <div class="cat-fill ${isOver ? 'over-limit' : (isWarning ? 'warning-limit' : '')}" 
+             style="width:${Math.min(pct, 100).toFixed(1)}%; background:${CAT_COLOR[c.category] || '#ff4d6d'}">
+        </div>
+        ${limit ? `<div class="cat-limit-mark" style="left:${Math.min(100, (limit / max) * 100).toFixed(1)}%; background:${isOver ? 'var(--red)' : '#cbd5e1'}"></div>` : ''}
+      </div>
+      ${limit ? `<div class="cat-row-limit-info">${fmt(limit - c.total >= 0 ? limit - c.total : 0)} remaining of ${fmt(limit)}</div>` : ''}`;
 }
 
 // ── Limit Modal ──────────────────────────────────────────────────────────────
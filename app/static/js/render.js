@@ -0,0 +1,135 @@
+/* ═══════════════════════════════════════════════════
+   TrackEx — Incremental rendering helpers
+   Keyed DOM patching and a fixed-row-height virtual list.
+   Loaded before app.js; also require()-able from Node for
+   benchmarks/render_bench.js.
+   ═══════════════════════════════════════════════════ */
+
+/**
+ * Write text only when it changed (avoids layout work on refresh).
+ * @returns {boolean} whether the node was touched
+ */
+function setText(el, value) {
+    const text = String(value);
+    if (el.textContent === text) return false;
+    el.textContent = text;
+    return true;
+}
+
+/**
+ * Reconcile `container`'s children with `items` by key.
+ * Existing nodes are reused; `update` runs only when sigOf(item) changed,
+ * `create` only for new keys; nodes for vanished keys are removed.
+ *
+ * @param {Element} container
+ * @param {Array} items
+ * @param {{keyOf: Function, sigOf: Function, create: Function, update: Function}} spec
+ * @returns {{created: number, updated: number, removed: number, moved: number}}
+ */
+function patchKeyed(container, items, spec) {
+    const stats = { created: 0, updated: 0, removed: 0, moved: 0 };
+    const existing = new Map();
+    for (const node of Array.from(container.children)) {
+        if (node.__key !== undefined) existing.set(node.__key, node);
+        else { container.removeChild(node); stats.removed++; }
+    }
+
+    let cursor = container.firstChild;
+    for (const item of items) {
+        const key = spec.keyOf(item);
+        const sig = spec.sigOf(item);
+        let node = existing.get(key);
+        const reused = Boolean(node);
+        if (node) {
+            existing.delete(key);
+            if (node.__sig !== sig) {
+                spec.update(node, item);
+                node.__sig = sig;
+                stats.updated++;
+            }
+        } else {
+            node = spec.create(item);
+            spec.update(node, item);
+            node.__key = key;
+            node.__sig = sig;
+            stats.created++;
+        }
+        if (node !== cursor) {
+            container.insertBefore(node, cursor);
+            if (reused) stats.moved++;
+        } else {
+            cursor = cursor.nextSibling;
+        }
+    }
+
+    existing.forEach(node => { container.removeChild(node); stats.removed++; });
+    return stats;
+}
+
+/**
+ * Fixed-row-height virtual list: only rows in (or near) the viewport exist in
+ * the DOM. `setItems` re-renders the window with keyed patching, so a refresh
+ * that changed one visible row touches one row.
+ */
+class VirtualList {
+    constructor(viewport, spec) {
+        this.viewport = viewport;
+        this.spec = spec;
+        this.rowHeight = spec.rowHeight;
+        this.overscan = spec.overscan || 6;
+        this.items = [];
+        this.scheduled = false;
+        this.lastStats = null;
+
+        const doc = viewport.ownerDocument || document;
+        this.spacer = doc.createElement('div');
+        this.spacer.style.position = 'relative';
+        this.window = doc.createElement('div');
+        this.window.style.position = 'absolute';
+        this.window.style.left = '0';
+        this.window.style.right = '0';
+        this.spacer.appendChild(this.window);
+        viewport.appendChild(this.spacer);
+
+        viewport.addEventListener('scroll', () => this.schedule());
+    }
+
+    setItems(items) {
+        this.items = items;
+        this.spacer.style.height = `${items.length * this.rowHeight}px`;
+        return this.render();
+    }
+
+    schedule() {
+        if (this.scheduled) return;
+        this.scheduled = true;
+        const raf = typeof requestAnimationFrame === 'function' ? requestAnimationFrame : fn => setTimeout(fn, 16);
+        raf(() => { this.scheduled = false; this.render(); });
+    }
+
+    range() {
+        const height = this.viewport.clientHeight || this.rowHeight * 10;
+        // Clamp: the list may have shrunk below the current scroll offset
+        const first = Math.min(Math.floor((this.viewport.scrollTop || 0) / this.rowHeight),
+                                Math.max(0, this.items.length - 1));
+        const start = Math.max(0, first - this.overscan);
+        const end = Math.min(this.items.length, first + Math.ceil(height / this.rowHeight) + this.overscan);
+        return [start, end];
+    }
+
+    render() {
+        const [start, end] = this.range();
+        this.window.style.transform = `translateY(${start * this.rowHeight}px)`;
+        this.lastStats = patchKeyed(this.window, this.items.slice(start, end), this.spec);
+        return this.lastStats;
+    }
+
+    scrollToKey(key) {
+        const index = this.items.findIndex(item => this.spec.keyOf(item) === key);
+        if (index >= 0) this.viewport.scrollTop = index * this.rowHeight;
+    }
+}
+
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = { setText, patchKeyed, VirtualList };
+}
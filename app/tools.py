@@ -0,0 +1,111 @@
+"""
+Local read tools for the AI agent
+=================================
+Instead of packing every number into the system prompt, the model can ask
+for a small computed result:
+
+    [[TOOL]]{"name": "category_total", "args": {"category": "Transport", "month": "2026-03"}}[[TOOL]]
+
+`handle_chat` runs the requested tools against indexed queries on
+`transactions` and sends only their compact JSON results back for one
+follow-up completion.
+"""
+import sys
+import json
+from datetime import datetime
+
+from .models import (
+    category_index, fetch_category_total, fetch_top_expenses,
+    compare_months, fetch_limit_status,
+)
+
+TOOL_MARKER = "[[TOOL]]"
+MAX_TOOL_CALLS = 3
+
+
+def _month(value=None) -> str:
+    value = str(value or datetime.now().strftime("%Y-%m"))[:7]
+    datetime.strptime(value, "%Y-%m")  # raises ValueError on junk
+    return value
+
+
+def _range(args: dict) -> tuple:
+    """Date range from explicit from/to, a month, or the current month."""
+    if args.get("from") or args.get("to"):
+        start = str(args.get("from") or "0000-01-01")[:10]
+        end = str(args.get("to") or "9999-12-31")[:10]
+        return start, end
+    month = _month(args.get("month"))
+    return f"{month}-01", f"{month}-31"
+
+
+def _category(value) -> str:
+    category = category_index().by_lower.get(str(value or "").strip().lower())
+    if not category:
+        raise ValueError(f"unknown category '{value}'")
+    return category
+
+
+def _tool_category_total(args):
+    return fetch_category_total(_category(args.get("category")), *_range(args))
+
+
+def _tool_top_expenses(args):
+    n = max(1, min(int(args.get("n", 5)), 20))
+    return fetch_top_expenses(n, *_range(args))
+
+
+def _tool_compare_months(args):
+    this_month = _month(args.get("month_b"))
+    y, m = map(int, this_month.split("-"))
+    prev = f"{y - 1}-12" if m == 1 else f"{y}-{m - 1:02d}"
+    return compare_months(_month(args.get("month_a") or prev), this_month)
+
+
+def _tool_limit_status(args):
+    return fetch_limit_status(_month(args.get("month")))
+
+
+TOOLS = {
+    "category_total": (_tool_category_total,
+                       'args: category, and month "YYYY-MM" or from/to "YYYY-MM-DD" — total spent/earned in a category'),
+    "top_expenses": (_tool_top_expenses,
+                     'args: n (max 20), and month or from/to — the largest expenses'),
+    "compare_months": (_tool_compare_months,
+                       'args: month_a, month_b ("YYYY-MM", default last vs this month) — income, expense and per-category change'),
+    "limit_status": (_tool_limit_status,
+                     'args: month — spend vs every budget limit with status'),
+}
+
+
+def tool_prompt() -> str:
+    lines = [f'- {name}: {desc}' for name, (_, desc) in TOOLS.items()]
+    return "\n".join(lines)
+
+
+def extract_tool_calls(reply: str) -> list:
+    """All {"name", "args"} payloads between [[TOOL]] markers (at most MAX_TOOL_CALLS)."""
+    parts = reply.split(TOOL_MARKER)
+    calls = []
+    for payload in parts[1::2][:MAX_TOOL_CALLS]:
+        try:
+            call = json.loads(payload.strip())
+            if isinstance(call, dict) and call.get("name"):
+                calls.append(call)
+        except json.JSONDecodeError as je:
+            sys.stderr.write(f"[Tools] JSON parse error: {str(je)} in '{payload[:100]}'\n")
+    return calls
+
+
+def run_tool(call: dict) -> dict:
+    name = call.get("name")
+    args = call.get("args") or {}
+    if name not in TOOLS:
+        return {"tool": name, "error": f"unknown tool. Valid tools: {', '.join(TOOLS)}"}
+    try:
+        return {"tool": name, "args": args, "result": TOOLS[name][0](args)}
+    except (ValueError, TypeError) as e:
+        return {"tool": name, "args": args, "error": str(e)}
+    except Exception as e:
+        sys.stderr.write(f"[Tools] {name} failed: {str(e)}\n")
+        return {"tool": name, "args": args, "error": "tool failed"}
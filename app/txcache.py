@@ -0,0 +1,238 @@
+"""
+Hot-user transaction cache
+==========================
+Optional: TX_CACHE_MAX_BYTES (per process, 0 = off). Each worker keeps, per
+active user, the transactions dated in the last TX_CACHE_MONTHS months as
+four parallel `array` columns sorted by date: date ordinal (`i`), type bit
+(`b`, 1 = income), category id (`h`) and amount in paise (`q`), about 15
+bytes a row. The month-bounded aggregates in models.py (month summary and
+trend, limit spend, daily and weekly breakdowns, month comparisons, category
+totals) and /api/expenses/daily are summed from it instead of in SQL; the
+helpers fall back to SQL when `user_columns` returns None. Listings, search,
+notes and all-time figures always use SQL.
+
+Freshness: an entry is tagged with the user's data version, (shard moves,
+sync sequence), read once per request by primary key. Every transaction
+write bumps the sequence in its own transaction, so a write in any process
+moves the version and the next read here reloads; writes in this process
+also drop the entry straight away (`invalidate`).
+
+Entries share one byte budget and the least recently used users are evicted
+first. Lookups (hit / miss / stale), evictions and the cache size are on
+/metrics. `python -m benchmarks.cache_check` compares every cached helper
+with its SQL path.
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import date, datetime
+
+from flask import current_app, g
+
+from . import metrics
+from .extensions import db
+
+metrics.describe("trackex_tx_cache_lookups_total", "counter", "Transaction cache lookups by outcome (hit, miss, stale)")
+metrics.describe("trackex_tx_cache_evictions_total", "counter", "Users evicted from the transaction cache to stay in budget")
+metrics.describe("trackex_tx_cache_bytes", "gauge", "Bytes held by the transaction cache")
+metrics.describe("trackex_tx_cache_users", "gauge", "Users held by the transaction cache")
+
+
+def _ordinal(day):
+    """'2026-10-05' -> date ordinal; None when it is not a valid date."""
+    try:
+        return date.fromisoformat(day[:10]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _month_bounds(month):
+    y, m = map(int, month.split("-"))
+    y2, m2 = divmod(y * 12 + m, 12)
+    return date(y, m, 1).toordinal(), date(y2, m2 + 1, 1).toordinal()
+
+
+def window_start():
+    """First day of the oldest cached month, e.g. '2026-05-01' in October with 6 months."""
+    now = datetime.now()
+    y, m = divmod(now.year * 12 + now.month - current_app.config["TX_CACHE_MONTHS"], 12)
+    return f"{y:04d}-{m + 1:02d}-01"
+
+
+class UserColumns:
+    """One user's recent transactions as date-sorted columns; read-only once built."""
+
+    __slots__ = ("since", "version", "days", "income", "category", "amount", "nbytes")
+
+    def __init__(self, since, version, rows):
+        self.since, self.version = since, version
+        self.days, self.income, self.category, self.amount = array("i"), array("b"), array("h"), array("q")
+        for day, tx_type, category_id, paise in rows:
+            self.days.append(date.fromisoformat(day[:10]).toordinal())
+            self.income.append(tx_type == "income")
+            self.category.append(category_id)
+            self.amount.append(paise or 0)
+        self.nbytes = sys.getsizeof(self) + sum(sys.getsizeof(c) for c in (self.days, self.income, self.category, self.amount))
+
+    # ── Row ranges ──
+
+    def span(self, date_from, date_to=None):
+        """(lo, hi) row range for date_from <= date <= date_to; None when a bound is not a date."""
+        lo, hi = _ordinal(date_from), _ordinal(date_to) if date_to else None
+        if lo is None or (date_to and hi is None):
+            return None
+        return bisect_left(self.days, lo), (bisect_right(self.days, hi) if hi is not None else len(self.days))
+
+    def month_span(self, month):
+        lo, hi = _month_bounds(month)
+        return bisect_left(self.days, lo), bisect_left(self.days, hi)
+
+    # ── Aggregates (paise) ──
+
+    def totals(self, lo, hi):
+        """(income, expense)"""
+        income = expense = 0
+        for i in range(lo, hi):
+            if self.income[i]:
+                income += self.amount[i]
+            else:
+                expense += self.amount[i]
+        return income, expense
+
+    def expense_by_category(self, lo, hi):
+        totals = {}
+        for i in range(lo, hi):
+            if not self.income[i]:
+                totals[self.category[i]] = totals.get(self.category[i], 0) + self.amount[i]
+        return totals
+
+    def category_total(self, category_id, lo, hi):
+        """(total or None, count) for one category, income and expense alike."""
+        total = count = 0
+        for i in range(lo, hi):
+            if self.category[i] == category_id:
+                total += self.amount[i]
+                count += 1
+        return (total if count else None), count
+
+    def by_day(self, lo, hi):
+        """{ordinal: [income, expense]} in date order."""
+        days = {}
+        for i in range(lo, hi):
+            day = days.setdefault(self.days[i], [0, 0])
+            day[0 if self.income[i] else 1] += self.amount[i]
+        return days
+
+    def by_month(self):
+        """{'YYYY-MM': [income, expense]} over every cached row."""
+        months = {}
+        for ordinal, (income, expense) in self.by_day(0, len(self.days)).items():
+            d = date.fromordinal(ordinal)
+            month = months.setdefault(f"{d.year:04d}-{d.month:02d}", [0, 0])
+            month[0] += income
+            month[1] += expense
+        return months
+
+
+class TxCache:
+    """user id -> UserColumns, least recently used first, within `max_bytes`."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id, entry):
+        if entry.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+            self._entries[user_id] = entry
+            self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                metrics.inc("trackex_tx_cache_evictions_total")
+            self._gauges()
+
+    def discard(self, user_id):
+        with self._lock:
+            old = self._entries.pop(user_id, None)
+            if old is not None:
+                self.nbytes -= old.nbytes
+                self._gauges()
+
+    def _gauges(self):
+        metrics.set_gauge("trackex_tx_cache_bytes", self.nbytes)
+        metrics.set_gauge("trackex_tx_cache_users", len(self._entries))
+
+
+def _cache():
+    """The current app's TxCache, or None when disabled."""
+    max_bytes = current_app.config.get("TX_CACHE_MAX_BYTES") or 0
+    if max_bytes <= 0:
+        return None
+    cache = current_app.extensions.get("tx_cache")
+    if cache is None or cache.max_bytes != max_bytes:
+        cache = current_app.extensions["tx_cache"] = TxCache(max_bytes)
+    return cache
+
+
+def _data_version():
+    from .models import SyncSequence
+    if "tx_version" not in g:
+        g.tx_version = (g.user.get("shard_moves") or 0,
+                        db.session.query(SyncSequence.seq).filter(SyncSequence.user_id == g.user["id"]).scalar())
+    return g.tx_version
+
+
+def _load(since, version):
+    from .models import tx_source
+    T = tx_source(since)
+    rows = db.session.query(T.date, T.type, T.category_id, T.amount_paise)\
+        .filter(T.user_id == g.user["id"], T.date >= since).order_by(T.date).all()
+    try:
+        return UserColumns(since, version, rows)
+    except (TypeError, ValueError) as e:  # a date that is not YYYY-MM-DD: leave this user to SQL
+        sys.stderr.write(f"[TxCache] not caching user {g.user['id']}: {str(e)}\n")
+        return None
+
+
+def user_columns(date_from):
+    """The current user's cached columns if they cover `date_from` onwards, else None (use SQL)."""
+    cache = _cache()
+    if cache is None or _ordinal(date_from) is None:
+        return None
+    since = window_start()
+    if date_from < since:
+        return None
+    user_id, version = g.user["id"], _data_version()
+    entry = cache.get(user_id)
+    if entry is not None and entry.version == version and entry.since == since:
+        metrics.inc("trackex_tx_cache_lookups_total", outcome="hit")
+        return entry
+    metrics.inc("trackex_tx_cache_lookups_total", outcome="miss" if entry is None else "stale")
+    entry = _load(since, version)
+    if entry is not None:
+        cache.put(user_id, entry)
+    return entry
+
+
+def invalidate():
+    """Drop the current user's entry after a write in this process."""
+    g.pop("tx_version", None)
+    cache = current_app.extensions.get("tx_cache")
+    if cache is not None:
+        cache.discard(g.user["id"])
@@ -0,0 +1,34 @@
+"""Move closed months of transactions to cold storage; schedule daily (cron etc.).
+
+    python archive_transactions.py
+
+Postgres: creates the upcoming month partitions and, with COLD_TABLESPACE
+set, moves closed-month partitions onto it. SQLite: moves rows older than
+HOT_MONTHS into transactions_archive in batches. Runs on every user shard
+(DATABASE_SHARD_URLS) as well as the primary. See app/partitions.py.
+"""
+import argparse
+import os
+import sys
+
+from migrate_db import make_app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--env", default=os.environ.get("FLASK_ENV", "development"))
+    args = parser.parse_args(argv)
+
+    app = make_app(args.env)
+    with app.app_context():
+        from app.migrations import on_engine
+        from app.partitions import archive_closed_months
+        from app.shards import shard_count, shard_engine
+        for shard in range(shard_count()):
+            with on_engine(shard_engine(shard)):
+                archive_closed_months()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,20 @@
+"""
+TrackEx benchmark suite
+=======================
+Generates deterministic multi-user datasets into a throwaway SQLite file and
+drives every /api endpoint through the Flask test client with the LLM served
+by the offline `local` provider (or `replay` for recorded completions).
+
+    python -m benchmarks --sizes 10x200,50x1000 --out bench.json
+    python -m benchmarks --baseline bench.json
+
+benchmarks.load replays the dashboard traffic mix against a real waitress
+server and a fake LLM with configurable latency:
+
+    python -m benchmarks.load --stages 10,25,50 --llm-latency 5
+
+benchmarks/render_bench.js measures DOM work for the dashboard's transaction
+list (full rebuild vs keyed vs virtualized) without a browser:
+
+    node benchmarks/render_bench.js --sizes 1000,10000,50000
+"""
@@ -0,0 +1,152 @@
+"""Check the hot-user transaction cache (app/txcache.py) against the SQL path.
+
+    python -m benchmarks.cache_check [--users 4] [--tx-per-user 3000]
+
+Generates a dataset ending this month, then for every user requests each
+cached endpoint and calls each cached agent tool with the cache off and on,
+comparing the answers. Then checks that a write is visible on the next read
+and that a budget smaller than the dataset evicts. Exits 1 on any mismatch.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+from datetime import date
+
+from .runner import _build_app
+
+CACHE_BYTES = 64 * 1024 * 1024
+
+
+def _months_back(count):
+    y, m = date.today().year, date.today().month
+    months = []
+    for _ in range(count):
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y, m - 1) if m > 1 else (y - 1, 12)
+    return months
+
+
+def _endpoints(months):
+    this_month, last_month = months[0], months[1]
+    paths = ["/api/summary", "/api/analytics/warnings", "/api/expenses/daily",
+             f"/api/expenses/daily?from={last_month}-01", f"/api/expenses/daily?from={last_month}-03&to={this_month}-02",
+             f"/api/expenses/daily?from={last_month}-01&to={last_month}-31"]
+    for month in months:
+        paths += [f"/api/summary?month={month}", f"/api/analytics/detailed?month={month}"]
+    return paths
+
+
+def _tools(months):
+    from app.models import compare_months, fetch_category_total
+    this_month, last_month, oldest = months[0], months[1], months[-1]
+    return [
+        (f"compare_months {last_month} {this_month}", lambda: compare_months(last_month, this_month)),
+        (f"compare_months {oldest} {this_month}", lambda: compare_months(oldest, this_month)),
+        ("fetch_category_total Groceries", lambda: fetch_category_total("Groceries", f"{last_month}-01", f"{this_month}-31")),
+        ("fetch_category_total Salary", lambda: fetch_category_total("Salary", f"{last_month}-05", f"{last_month}-20")),
+        ("fetch_category_total invalid end", lambda: fetch_category_total("Rent", f"{last_month}-01", f"{last_month}-32")),
+    ]
+
+
+def check(flask_app, users, tx_per_user):
+    from flask import g
+    from app import metrics
+    from app.extensions import db
+    from app.database import init_search_indexes
+    from app.models import insert_transaction, set_limits
+    from .dataset import generate
+
+    with flask_app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        init_search_indexes(flask_app)
+        user_ids = generate(users, tx_per_user, years=1)
+
+    months = _months_back(flask_app.config["TX_CACHE_MONTHS"] + 1)  # one month past the window
+    client = flask_app.test_client()
+    mismatches, compared = [], 0
+
+    def both(label, read):
+        nonlocal compared
+        flask_app.config["TX_CACHE_MAX_BYTES"] = 0
+        expected = read()
+        flask_app.config["TX_CACHE_MAX_BYTES"] = CACHE_BYTES
+        got = [read(), read()]  # a miss, then a hit
+        compared += 1
+        if any(r != expected for r in got):
+            mismatches.append(label)
+
+    for uid in user_ids:
+        with client.session_transaction() as sess:
+            sess["user_id"] = uid
+        with flask_app.test_request_context():
+            g.user = {"id": uid}
+            set_limits({"Groceries": 200000, "Food & Dining": 100000, "Rent": 5000000})
+        for path in _endpoints(months):
+            both(f"user {uid} GET {path}", lambda: client.get(path).get_json())
+        for name, tool in _tools(months):
+            with flask_app.test_request_context():
+                g.user = {"id": uid}
+                both(f"user {uid} {name}", tool)
+
+        # a write is seen by the next cached read, in this process and (only the
+        # data version changes there) in one that still holds the old entry
+        summary = f"/api/summary?month={months[0]}"
+        for where in ("this process", "another process"):
+            before = client.get(summary).get_json()["expense"]
+            held = flask_app.extensions["tx_cache"].get(uid)
+            with flask_app.test_request_context():
+                g.user = {"id": uid}
+                insert_transaction("expense", "Groceries", 12345, "cache check", date.today().isoformat())
+            if where == "another process":
+                flask_app.extensions["tx_cache"].put(uid, held)
+            after = client.get(summary).get_json()["expense"]
+            compared += 1
+            if round(after - before, 2) != 123.45:
+                mismatches.append(f"user {uid} write in {where} not visible: {before} -> {after}")
+
+    cache = flask_app.extensions["tx_cache"]
+    entry = cache.get(user_ids[0])
+    flask_app.config["TX_CACHE_MAX_BYTES"] = entry.nbytes * 2  # room for about two users
+    for uid in user_ids:
+        with client.session_transaction() as sess:
+            sess["user_id"] = uid
+        client.get(f"/api/summary?month={months[0]}")
+    cache = flask_app.extensions["tx_cache"]
+    compared += 1
+    if len(user_ids) > 2 and (cache.nbytes > cache.max_bytes or user_ids[0] in cache._entries):
+        mismatches.append(f"budget not kept: {cache.nbytes} bytes of {cache.max_bytes}")
+
+    lookups = {series.split('"')[1]: int(n) for series, n in metrics.snapshot().items()
+               if series.startswith("trackex_tx_cache_lookups_total")}
+    if not lookups.get("hit"):
+        mismatches.append("the cache was never used")
+    return {
+        "users": users,
+        "tx_per_user": tx_per_user,
+        "comparisons": compared,
+        "lookups": lookups,
+        "bytes_per_user": entry.nbytes,
+        "rows_per_user": len(entry.days),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the transaction cache with the SQL path")
+    parser.add_argument("--users", type=int, default=4)
+    parser.add_argument("--tx-per-user", type=int, default=3000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="trackex-cache-")
+    flask_app = _build_app(os.path.join(workdir, "cache.db"))
+    result = check(flask_app, args.users, args.tx_per_user)
+    print(json.dumps(result, indent=2))
+    if result["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Deterministic synthetic dataset generator for benchmarks."""
+import random
+import calendar
+from datetime import date
+
+from werkzeug.security import generate_password_hash
+
+from app.extensions import db
+from app.models import User, Transaction, Limit, VALID_CATEGORIES, category_index, seed_categories
+from app.money import to_paise
+
+BENCH_PASSWORD = "Bench1234"
+
+# category -> (weight, min amount, max amount)
+INCOME_MIX = {
+    "Salary":       (50, 25000, 120000),
+    "Freelance":    (15, 2000, 40000),
+    "Investment":   (10, 500, 20000),
+    "Bonus":        (5, 5000, 50000),
+    "Gift":         (8, 200, 5000),
+    "Rent Income":  (5, 8000, 25000),
+    "Business":     (4, 3000, 60000),
+    "Other Income": (3, 100, 3000),
+}
+EXPENSE_MIX = {
+    "Groceries":     (22, 150, 4000),
+    "Food & Dining": (20, 80, 2500),
+    "Transport":     (15, 30, 1500),
+    "Utilities":     (6, 300, 4000),
+    "Shopping":      (8, 300, 8000),
+    "Entertainment": (6, 100, 3000),
+    "Health":        (4, 200, 10000),
+    "Subscriptions": (5, 99, 1499),
+    "Rent":          (3, 8000, 35000),
+    "Education":     (2, 500, 20000),
+    "Travel":        (3, 1000, 30000),
+    "EMI / Loan":    (3, 2000, 25000),
+    "Other":         (3, 50, 2000),
+}
+INCOME_SHARE = 0.12
+NOTES = ["", "", "", "weekly", "card", "upi", "cash", "with friends", "monthly", "online order"]
+
+assert set(INCOME_MIX) | set(EXPENSE_MIX) <= set(VALID_CATEGORIES), "bench mix drifted from VALID_CATEGORIES"
+
+
+def _months_back(end_month: str, count: int) -> list:
+    y, m = map(int, end_month.split("-"))
+    months = []
+    for _ in range(count):
+        months.append((y, m))
+        m -= 1
+        if m == 0:
+            y, m = y - 1, 12
+    return months[::-1]
+
+
+def _pick(rng, mix):
+    names = list(mix)
+    name = rng.choices(names, weights=[mix[n][0] for n in names])[0]
+    _, lo, hi = mix[name]
+    return name, round(rng.uniform(lo, hi), 2)
+
+
+def generate(users: int, tx_per_user: int, years: int = 2, seed: int = 42,
+             end_month: str | None = None, batch_size: int = 5000) -> list:
+    """Populate the bound database and return the generated user ids.
+
+    Must be called inside an app context. The same arguments always produce
+    the same rows.
+    """
+    rng = random.Random(seed)
+    end_month = end_month or date.today().strftime("%Y-%m")
+    months = _months_back(end_month, years * 12)
+    password = generate_password_hash(BENCH_PASSWORD)
+    seed_categories()
+    category_ids = category_index().ids
+
+    user_rows = [User(username=f"bench_{seed}_{i}", password=password, email=f"bench_{seed}_{i}@example.com")
+                 for i in range(users)]
+    db.session.add_all(user_rows)
+    db.session.flush()
+    user_ids = [u.id for u in user_rows]
+
+    batch = []
+    for uid in user_ids:
+        for _ in range(tx_per_user):
+            y, m = rng.choice(months)
+            day = rng.randint(1, calendar.monthrange(y, m)[1])
+            if rng.random() < INCOME_SHARE:
+                tx_type, (category, amount) = "income", _pick(rng, INCOME_MIX)
+            else:
+                tx_type, (category, amount) = "expense", _pick(rng, EXPENSE_MIX)
+            batch.append({
+                "user_id": uid, "type": tx_type,
+                "category_id": category_ids[category], "legacy_category": category,
+                "amount_paise": to_paise(amount), "legacy_amount": amount,
+                "note": rng.choice(NOTES), "date": f"{y:04d}-{m:02d}-{day:02d}",
+            })
+            if len(batch) >= batch_size:
+                db.session.bulk_insert_mappings(Transaction, batch)
+                batch = []
+
+        # 3-6 monthly limits per user on the common expense categories
+        for category in rng.sample(list(EXPENSE_MIX)[:8], rng.randint(3, 6)):
+            lo, hi = EXPENSE_MIX[category][1:]
+            limit = round(rng.uniform(hi, hi * 6), -2)
+            db.session.add(Limit(user_id=uid, category_id=category_ids[category], legacy_category=category,
+                                 monthly_limit_paise=to_paise(limit), legacy_monthly_limit=limit))
+
+    if batch:
+        db.session.bulk_insert_mappings(Transaction, batch)
+    db.session.commit()
+    return user_ids
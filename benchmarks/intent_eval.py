@@ -0,0 +1,71 @@
+"""Measure the local intent parser against the labeled chat corpus.
+
+    python -m benchmarks.intent_eval [--corpus benchmarks/intent_corpus.jsonl] [-v]
+
+Each corpus line is {"text": ..., "expect": <action dict> | [actions] | null}.
+A null expectation means the message must be left to the LLM. Dates in the corpus
+are relative to REFERENCE_DAY.
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+from app.intent import parse_intents
+
+REFERENCE_DAY = datetime(2026, 3, 18)
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_corpus.jsonl")
+COMPARED_FIELDS = ("type", "tx_type", "amount", "category", "date", "id")
+
+
+def _matches(got: list, expect) -> bool:
+    expect = expect if isinstance(expect, list) else [expect]
+    if len(got) != len(expect):
+        return False
+    return all(g.get(k) == e.get(k) for g, e in zip(got, expect) for k in COMPARED_FIELDS if k in e)
+
+
+def evaluate(path: str, verbose: bool = False) -> dict:
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    parseable = sum(1 for r in rows if r["expect"])
+    hits = correct = false_positives = 0
+    started = time.perf_counter()
+    for row in rows:
+        got = parse_intents(row["text"], today=REFERENCE_DAY)
+        expect = row["expect"]
+        if got:
+            hits += 1
+            if expect and _matches(got, expect):
+                correct += 1
+            elif not expect:
+                false_positives += 1
+        ok = (got is None and expect is None) or (got and expect and _matches(got, expect))
+        if verbose and not ok:
+            print(f"  ✗ {row['text']!r}\n      expected {expect}\n      got      {got}")
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "messages": len(rows),
+        "hit_rate": round(hits / len(rows), 3) if rows else 0,
+        "recall": round(correct / parseable, 3) if parseable else 0,
+        "precision": round(correct / hits, 3) if hits else 0,
+        "false_positives": false_positives,
+        "avg_parse_us": round(elapsed_ms * 1000 / len(rows), 1) if rows else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the chat fast-path intent parser")
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every mismatch")
+    args = parser.parse_args()
+
+    result = evaluate(args.corpus, args.verbose)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+End-to-end load harness
+=======================
+Starts a fake OpenAI-compatible LLM server with configurable latency, starts
+the app under waitress in a subprocess, logs in simulated users and replays
+the dashboard traffic mix while ramping concurrency:
+
+  - refreshAll(): /api/sync (delta since the user's cursor) and four parallel GETs,
+    then /api/months and /api/expenses/daily
+  - chat messages (POST /api/chat) at a Poisson rate per user, a share of them
+    answered by the intent fast path (chat_fast) and the rest by the LLM (chat_llm)
+  - inserts (POST /api/transactions), each followed by refreshAll() like the browser
+
+    python -m benchmarks.load --stages 10,25,50 --stage-seconds 60 --llm-latency 5
+    python -m benchmarks.load serve --port 5055 --threads 4   (server only)
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+import subprocess
+from datetime import date
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests as http
+
+from .runner import _percentile, _build_app
+
+REQUEST_TIMEOUT = 90
+# the intent fast path answers the first locally; the second always reaches the (fake) LLM
+FAST_CHAT_MESSAGE = "spent 90 on transport"
+LLM_CHAT_MESSAGE = "give me tips to save money"
+
+
+# ── Fake LLM server ──────────────────────────────────────────────────────────
+
+def _make_llm_handler(latency: float, jitter: float, error_rate: float):
+    class FakeLLMHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+
+            if random.random() < error_rate:
+                self.send_response(429)
+                self.send_header("Retry-After", "5")
+                self.end_headers()
+                return
+
+            system = next((m["content"] for m in body.get("messages", []) if m["role"] == "system"), "")
+            if "[[ACTION]]" in system:
+                content = ('Done. [[ACTION]]{"type": "add", "tx_type": "expense", "amount": 90, '
+                           '"category": "Transport", "note": "load"}[[ACTION]]')
+            else:
+                content = "- 📊 Spending is steady\n- 💡 Review your top categories"
+            payload = json.dumps({
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(json.dumps(body)) // 4, "completion_tokens": len(content) // 4},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return FakeLLMHandler
+
+
+def start_fake_llm(port: int, latency: float, jitter: float = 0.0, error_rate: float = 0.0):
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_llm_handler(latency, jitter, error_rate))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ── App server (subprocess) ──────────────────────────────────────────────────
+
+def serve(args):
+    from waitress import serve as waitress_serve
+    from .dataset import generate
+    from app.extensions import db
+
+    flask_app = _build_app(args.db, llm_provider=None)
+    with flask_app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        generate(args.users, args.tx, seed=args.seed)
+    print(f"[load] serving on :{args.port} with {args.threads} waitress threads", flush=True)
+    waitress_serve(flask_app, host="127.0.0.1", port=args.port, threads=args.threads, _quiet=True)
+
+
+def _start_app_server(args, llm_port: int):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="trackex-load-"), "load.db")
+    env = dict(os.environ,
+               LLM_PROVIDER="openai",
+               LLM_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+               LLM_API_KEY="fake-key")
+    cmd = [sys.executable, "-m", "benchmarks.load", "serve",
+           "--db", db_path, "--port", str(args.port), "--threads", str(args.threads),
+           "--users", str(max(args.stages)), "--tx", str(args.tx), "--seed", str(args.seed)]
+    proc = subprocess.Popen(cmd, env=env)
+
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        try:
+            if http.get(f"http://127.0.0.1:{args.port}/health", timeout=2).ok:
+                return proc
+        except http.exceptions.RequestException:
+            pass
+        if proc.poll() is not None:
+            raise RuntimeError("App server exited during startup")
+        time.sleep(0.5)
+    proc.terminate()
+    raise RuntimeError("App server did not become healthy")
+
+
+# ── Simulated browser ────────────────────────────────────────────────────────
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = []  # (stage, kind, ms, ok)
+        self.stage = 0
+
+    def add(self, stage, kind, ms, ok):
+        with self.lock:
+            self.samples.append((stage, kind, ms, ok))
+
+
+class VirtualUser(threading.Thread):
+    REFRESH_PATHS = [
+        ("summary", "/api/summary?month={month}"),
+        ("ai_insights", "/api/ai_insights?month={month}"),
+        ("analytics", "/api/analytics/detailed?month={month}"),
+        ("warnings", "/api/analytics/warnings"),
+    ]
+
+    def __init__(self, index, base_url, recorder, stop, args):
+        super().__init__(daemon=True)
+        self.username = f"bench_{args.seed}_{index}"
+        self.base = base_url
+        self.recorder = recorder
+        self.stop = stop
+        self.args = args
+        self.rng = random.Random(index)
+        self.session = http.Session()
+        self.pool = ThreadPoolExecutor(max_workers=len(self.REFRESH_PATHS) + 1)
+        self.cursor = ""  # the browser keeps this in IndexedDB
+        today = date.today()
+        self.month = today.strftime("%Y-%m")
+        self.today = today.strftime("%Y-%m-%d")
+        self.first = today.replace(day=1).strftime("%Y-%m-%d")
+
+    def _request(self, kind, method, path, **kw):
+        stage = self.recorder.stage
+        t0 = time.perf_counter()
+        ok = False
+        resp = None
+        try:
+            resp = self.session.request(method, self.base + path, timeout=REQUEST_TIMEOUT, **kw)
+            ok = resp.status_code < 400
+        except http.exceptions.RequestException:
+            pass
+        self.recorder.add(stage, kind, (time.perf_counter() - t0) * 1000, ok)
+        return resp
+
+    def sync(self):
+        resp = self._request("sync", "GET", "/api/sync", params={"since": self.cursor})
+        if resp is not None and resp.ok:
+            self.cursor = resp.json().get("cursor", self.cursor)
+
+    def login(self):
+        from .dataset import BENCH_PASSWORD
+        resp = self.session.post(f"{self.base}/auth/login", timeout=REQUEST_TIMEOUT, allow_redirects=False,
+                                 data={"username": self.username, "password": BENCH_PASSWORD})
+        return resp.status_code in (302, 303)
+
+    def refresh_all(self):
+        futures = [self.pool.submit(self.sync)]
+        futures += [self.pool.submit(self._request, kind, "GET", path.format(month=self.month))
+                    for kind, path in self.REFRESH_PATHS]
+        for f in futures:
+            f.result()
+        self._request("months", "GET", "/api/months")
+        self._request("daily", "GET", f"/api/expenses/daily?from={self.first}&to={self.today}")
+
+    def _next(self, per_minute):
+        return time.time() + (self.rng.expovariate(per_minute / 60) if per_minute > 0 else 1e9)
+
+    def run(self):
+        if not self.login():
+            self.recorder.add(self.recorder.stage, "login", 0, False)
+            return
+        next_refresh = time.time()
+        next_chat = self._next(self.args.chat_rate)
+        next_insert = self._next(self.args.insert_rate)
+
+        while not self.stop.is_set():
+            now = time.time()
+            if now >= next_refresh:
+                self.refresh_all()
+                next_refresh = now + self.args.refresh_interval
+            elif now >= next_chat:
+                if self.rng.random() < self.args.fast_chat_share:
+                    self._request("chat_fast", "POST", "/api/chat", json={"message": FAST_CHAT_MESSAGE})
+                else:
+                    self._request("chat_llm", "POST", "/api/chat", json={"message": LLM_CHAT_MESSAGE})
+                next_chat = self._next(self.args.chat_rate)
+            elif now >= next_insert:
+                self._request("insert", "POST", "/api/transactions", json={
+                    "type": "expense", "category": "Groceries", "amount": self.rng.randint(50, 900),
+                    "note": "load", "date": self.today})
+                self.refresh_all()
+                next_insert = self._next(self.args.insert_rate)
+            else:
+                self.stop.wait(min(next_refresh, next_chat, next_insert) - now)
+        self.pool.shutdown(wait=False)
+
+
+# ── Reporting ────────────────────────────────────────────────────────────────
+
+def summarize(recorder, stages, stage_seconds):
+    report = []
+    for idx, users in enumerate(stages):
+        rows = [s for s in recorder.samples if s[0] == idx]
+        stage = {"users": users, "requests": len(rows),
+                 "throughput_rps": round(len(rows) / stage_seconds, 2),
+                 "error_rate": round(sum(1 for r in rows if not r[3]) / len(rows), 4) if rows else 0,
+                 "kinds": {}}
+        for kind in sorted({r[1] for r in rows}):
+            ms = [r[2] for r in rows if r[1] == kind]
+            stage["kinds"][kind] = {
+                "count": len(ms),
+                "p50_ms": round(_percentile(ms, 50), 1),
+                "p95_ms": round(_percentile(ms, 95), 1),
+                "p99_ms": round(_percentile(ms, 99), 1),
+                "errors": sum(1 for r in rows if r[1] == kind and not r[3]),
+            }
+        report.append(stage)
+    return report
+
+
+def _print_report(report):
+    for stage in report:
+        print(f"\n══ {stage['users']} users — {stage['throughput_rps']} req/s, "
+              f"error rate {stage['error_rate'] * 100:.2f}% ══")
+        print(f"  {'kind':14} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err':>5}")
+        for kind, k in stage["kinds"].items():
+            print(f"  {kind:14} {k['count']:7d} {k['p50_ms']:9.1f} {k['p95_ms']:9.1f} {k['p99_ms']:9.1f} {k['errors']:5d}")
+
+
+def run(args):
+    llm = start_fake_llm(args.llm_port, args.llm_latency, args.llm_jitter, args.llm_error_rate)
+    proc = _start_app_server(args, args.llm_port)
+    base_url = f"http://127.0.0.1:{args.port}"
+    recorder, stop, users = Recorder(), threading.Event(), []
+
+    try:
+        for idx, target in enumerate(args.stages):
+            recorder.stage = idx
+            while len(users) < target:
+                user = VirtualUser(len(users), base_url, recorder, stop, args)
+                user.start()
+                users.append(user)
+            print(f"[load] stage {idx + 1}/{len(args.stages)}: {target} users", flush=True)
+            time.sleep(args.stage_seconds)
+    finally:
+        stop.set()
+        for user in users:
+            user.join(timeout=REQUEST_TIMEOUT)
+        proc.terminate()
+        proc.wait(timeout=30)
+        llm.shutdown()
+
+    report = summarize(recorder, args.stages, args.stage_seconds)
+    _print_report(report)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"config": {k: v for k, v in vars(args).items() if k != "func"}, "stages": report}, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrackEx concurrent load harness")
+    sub = parser.add_subparsers(dest="command")
+
+    srv = sub.add_parser("serve", help="seed a database and serve the app under waitress")
+    srv.add_argument("--db", required=True)
+    srv.add_argument("--port", type=int, default=5055)
+    srv.add_argument("--threads", type=int, default=4)
+    srv.add_argument("--users", type=int, default=50)
+    srv.add_argument("--tx", type=int, default=1000)
+    srv.add_argument("--seed", type=int, default=42)
+    srv.set_defaults(func=serve)
+
+    parser.add_argument("--stages", type=lambda s: [int(x) for x in s.split(",")], default=[5, 20, 50],
+                        help="comma separated concurrent user counts to ramp through")
+    parser.add_argument("--stage-seconds", type=int, default=60)
+    parser.add_argument("--refresh-interval", type=float, default=120, help="seconds between refreshAll() calls")
+    parser.add_argument("--chat-rate", type=float, default=0.5, help="chat messages per user per minute")
+    parser.add_argument("--fast-chat-share", type=float, default=0.3,
+                        help="fraction of chat messages the intent fast path answers without the LLM")
+    parser.add_argument("--insert-rate", type=float, default=0.3, help="inserts per user per minute")
+    parser.add_argument("--llm-latency", type=float, default=2.0, help="fake LLM response time in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="fraction of LLM calls answered with 429")
+    parser.add_argument("--llm-port", type=int, default=5066)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--threads", type=int, default=4, help="waitress worker threads")
+    parser.add_argument("--tx", type=int, default=1000, help="seeded transactions per user")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.set_defaults(func=run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
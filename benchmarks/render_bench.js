@@ -0,0 +1,168 @@
+/*
+ * Browser-free benchmark for the transaction list renderer.
+ *
+ *     node benchmarks/render_bench.js [--sizes 1000,10000,50000] [--json]
+ *
+ * Drives app/static/js/render.js against a counting fake DOM and compares it
+ * with the old full rebuild (every row recreated on every refresh). Reports
+ * DOM operations (nodes created, inserts/removes, text writes) and wall time
+ * for the initial render, an unchanged refresh, a refresh with one edited
+ * and one new row, and a scroll by one screen.
+ */
+const path = require('path');
+const { patchKeyed, VirtualList, setText } = require(path.join(__dirname, '..', 'app', 'static', 'js', 'render.js'));
+
+// ── Counting fake DOM ─────────────────────────────────────────────────────────
+const ops = { created: 0, inserted: 0, removed: 0, text: 0 };
+
+class FakeElement {
+    constructor(tag) {
+        ops.created++;
+        this.tagName = tag;
+        this.children = [];
+        this.parent = null;
+        this.style = {};
+        this.className = '';
+        this._text = '';
+        this.scrollTop = 0;
+        this.clientHeight = 440;
+        this.ownerDocument = fakeDocument;
+    }
+    get firstChild() { return this.children[0] || null; }
+    get nextSibling() { return this._next || null; }
+    get textContent() { return this._text; }
+    set textContent(v) { ops.text++; this._text = v; }
+    appendChild(node) { return this.insertBefore(node, null); }
+    insertBefore(node, ref) {
+        ops.inserted++;
+        if (node.parent) { node.parent.removeChild(node); ops.removed--; }  // a move, not a removal
+        const at = ref ? this.children.indexOf(ref) : this.children.length;
+        this.children.splice(at, 0, node);
+        node.parent = this;
+        const before = this.children[at - 1];
+        if (before) before._next = node;
+        node._next = this.children[at + 1] || null;
+        return node;
+    }
+    removeChild(node) {
+        ops.removed++;
+        const at = this.children.indexOf(node);
+        this.children.splice(at, 1);
+        if (at > 0) this.children[at - 1]._next = this.children[at] || null;
+        node.parent = null;
+        return node;
+    }
+    addEventListener() {}
+}
+
+const fakeDocument = { createElement: tag => new FakeElement(tag) };
+
+// Mirrors createTxRow/updateTxRow in app.js: five text fields and a delete button
+function createRow() {
+    const row = fakeDocument.createElement('div');
+    for (let i = 0; i < 6; i++) row.appendChild(fakeDocument.createElement('div'));
+    return row;
+}
+
+function updateRow(row, tx) {
+    const [avatar, cat, note, amount, date] = row.children;
+    avatar.className = `tx-avatar ${tx.type}`;
+    setText(avatar, tx.type === 'income' ? '+' : '-');
+    setText(cat, tx.category);
+    setText(note, tx.note || 'No note');
+    setText(amount, tx.amount.toFixed(2));
+    setText(date, tx.date);
+}
+
+const spec = {
+    rowHeight: 70,
+    keyOf: tx => tx.id,
+    sigOf: tx => `${tx.type}|${tx.category}|${tx.amount}|${tx.date}|${tx.note}`,
+    create: createRow,
+    update: updateRow,
+};
+
+function makeTransactions(n) {
+    const cats = ['Groceries', 'Food & Dining', 'Transport', 'Rent', 'Salary', 'Shopping'];
+    const txs = [];
+    for (let i = n; i > 0; i--) {
+        const day = new Date(Date.UTC(2026, 0, 1) - (n - i) * 3600e3 * 6);
+        txs.push({
+            id: i, type: i % 7 ? 'expense' : 'income', category: cats[i % cats.length],
+            amount: (i * 37) % 5000 + 10, note: i % 3 ? 'upi' : '', date: day.toISOString().slice(0, 10),
+        });
+    }
+    return txs;
+}
+
+// ── Renderers under test ──────────────────────────────────────────────────────
+function fullRebuild(container, items) {
+    while (container.children.length) container.removeChild(container.children[0]);
+    for (const tx of items) {
+        const row = createRow();
+        updateRow(row, tx);
+        container.appendChild(row);
+    }
+}
+
+function measure(label, fn) {
+    Object.keys(ops).forEach(k => { ops[k] = 0; });
+    const t0 = process.hrtime.bigint();
+    fn();
+    const ms = Number(process.hrtime.bigint() - t0) / 1e6;
+    return { step: label, ms: +ms.toFixed(3), ...ops };
+}
+
+function run(n) {
+    const base = makeTransactions(n);
+    const edited = base.map((tx, i) => (i === 2 ? { ...tx, amount: tx.amount + 1 } : tx));
+    const refreshed = [{ id: n + 1, type: 'expense', category: 'Transport', amount: 90, note: 'cab', date: '2026-01-02' }, ...edited];
+
+    const naiveBox = new FakeElement('div');
+    const naive = [
+        measure('initial', () => fullRebuild(naiveBox, base)),
+        measure('refresh (no change)', () => fullRebuild(naiveBox, base)),
+        measure('refresh (1 edit + 1 new)', () => fullRebuild(naiveBox, refreshed)),
+    ];
+
+    const viewport = new FakeElement('div');
+    let list;
+    const virtual = [
+        measure('initial', () => { list = new VirtualList(viewport, spec); list.setItems(base); }),
+        measure('refresh (no change)', () => list.setItems(base)),
+        measure('refresh (1 edit + 1 new)', () => list.setItems(refreshed)),
+        measure('scroll one screen', () => { viewport.scrollTop += viewport.clientHeight; list.render(); }),
+    ];
+
+    const keyedBox = new FakeElement('div');
+    const keyed = [
+        measure('initial', () => patchKeyed(keyedBox, base, spec)),
+        measure('refresh (no change)', () => patchKeyed(keyedBox, base, spec)),
+        measure('refresh (1 edit + 1 new)', () => patchKeyed(keyedBox, refreshed, spec)),
+    ];
+
+    return { rows: n, full_rebuild: naive, keyed_only: keyed, virtual_keyed: virtual };
+}
+
+function main() {
+    const args = process.argv.slice(2);
+    const sizesArg = args.includes('--sizes') ? args[args.indexOf('--sizes') + 1] : '1000,10000,50000';
+    const results = sizesArg.split(',').map(s => run(parseInt(s, 10)));
+
+    if (args.includes('--json')) {
+        console.log(JSON.stringify(results, null, 2));
+        return;
+    }
+    for (const r of results) {
+        console.log(`\n══ ${r.rows} rows ══`);
+        console.log(`  ${'renderer'.padEnd(14)} ${'step'.padEnd(26)} ${'ms'.padStart(9)} ${'created'.padStart(8)} ${'inserted'.padStart(9)} ${'removed'.padStart(8)} ${'text'.padStart(7)}`);
+        for (const name of ['full_rebuild', 'keyed_only', 'virtual_keyed']) {
+            for (const m of r[name]) {
+                console.log(`  ${name.padEnd(14)} ${m.step.padEnd(26)} ${m.ms.toFixed(2).padStart(9)} ${String(m.created).padStart(8)} `
+                    + `${String(m.inserted).padStart(9)} ${String(m.removed).padStart(8)} ${String(m.text).padStart(7)}`);
+            }
+        }
+    }
+}
+
+main();
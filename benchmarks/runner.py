@@ -0,0 +1,301 @@
+"""Drive every /api endpoint at several data sizes and report latency, queries and memory."""
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import date
+
+DEFAULT_SIZES = "5x200,20x1000,50x5000"
+
+
+# (name, method, path(ctx), json body(ctx) or None)
+ENDPOINTS = [
+    ("GET /api/transactions",            "GET",    lambda c: "/api/transactions", None),
+    ("GET /api/transactions?month",      "GET",    lambda c: f"/api/transactions?month={c['month']}", None),
+    ("GET /api/transactions?limit=15",   "GET",    lambda c: "/api/transactions?limit=15", None),
+    ("GET /api/transactions (columnar)", "GET",    lambda c: "/api/transactions?format=columnar", None),
+    ("GET /api/sync (full)",             "GET",    lambda c: "/api/sync", None),
+    ("GET /api/sync (full, columnar)",   "GET",    lambda c: "/api/sync?format=columnar", None),
+    ("GET /api/sync (delta)",            "GET",    lambda c: f"/api/sync?since={c['user_id']}:{c['seq']}", None),
+    ("GET /api/transactions/search?q",   "GET",    lambda c: "/api/transactions/search?q=upi", None),
+    ("GET /api/transactions/search?q+filters", "GET",
+        lambda c: f"/api/transactions/search?q=online%20order&type=expense&min_amount=100&from={c['year_ago']}", None),
+    ("GET /api/transactions/search?filters", "GET",
+        lambda c: "/api/transactions/search?category=Food%20%26%20Dining&max_amount=500&limit=20", None),
+    ("GET /api/summary",                 "GET",    lambda c: "/api/summary", None),
+    ("GET /api/summary?month",           "GET",    lambda c: f"/api/summary?month={c['month']}", None),
+    ("GET /api/months",                  "GET",    lambda c: "/api/months", None),
+    ("GET /api/categories",              "GET",    lambda c: "/api/categories", None),
+    ("GET /api/limits",                  "GET",    lambda c: "/api/limits", None),
+    ("GET /api/analytics/detailed",      "GET",    lambda c: f"/api/analytics/detailed?month={c['month']}", None),
+    ("GET /api/analytics/warnings",      "GET",    lambda c: "/api/analytics/warnings", None),
+    ("GET /api/expenses/daily",          "GET",    lambda c: f"/api/expenses/daily?from={c['from']}&to={c['to']}", None),
+    ("GET /api/expenses/daily (all)",    "GET",    lambda c: "/api/expenses/daily", None),
+    ("GET /api/export",                  "GET",    lambda c: "/api/export", None),
+    ("GET /api/ai_insights",             "GET",    lambda c: f"/api/ai_insights?month={c['month']}", None),
+    ("GET /api/user/profile",            "GET",    lambda c: "/api/user/profile", None),
+    ("GET /api/user/created_at",         "GET",    lambda c: "/api/user/created_at", None),
+    ("POST /api/user/profile",           "POST",   lambda c: "/api/user/profile",
+        lambda c: {"full_name": "Bench User", "currency": "INR"}),
+    ("POST /api/limits",                 "POST",   lambda c: "/api/limits",
+        lambda c: {"category": "Groceries", "limit": 9000}),
+    ("POST /api/transactions",           "POST",   lambda c: "/api/transactions",
+        lambda c: {"type": "expense", "category": "Food & Dining", "amount": 240, "note": "bench", "date": c["today"]}),
+    ("POST /api/chat (fast path)",       "POST",   lambda c: "/api/chat",
+        lambda c: {"message": "spent 120 on transport"}),
+    ("POST /api/chat (llm)",             "POST",   lambda c: "/api/chat",
+        lambda c: {"message": "give me tips to save money"}),
+    ("POST /api/chat (tool)",            "POST",   lambda c: "/api/chat",
+        lambda c: {"message": "how much did I spend on food?"}),
+    ("DELETE /api/transactions/<id>",    "DELETE", lambda c: f"/api/transactions/{_take(c['victim_ids'], 0)}", None),
+    ("DELETE /api/transactions (bulk)",  "DELETE", lambda c: "/api/transactions",
+        lambda c: {"ids": _take(c["bulk_ids"], [])}),
+]
+
+BULK_DELETE_BATCH = 20  # ids per bulk DELETE request
+
+
+# p95 budgets (ms) at the largest default size; main() fails when one is missed
+LATENCY_TARGETS_MS = {
+    "GET /api/transactions/search?q": 25,
+    "GET /api/transactions/search?q+filters": 25,
+    "GET /api/transactions/search?filters": 20,
+}
+
+
+def _percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _parse_sizes(spec: str) -> list:
+    sizes = []
+    for part in spec.split(","):
+        users, txs = part.lower().split("x")
+        sizes.append((int(users), int(txs)))
+    return sizes
+
+
+def _build_app(db_path: str, llm_provider: str | None = "local"):
+    # Config reads DATABASE_URL at import time, so set it before importing the app
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    if llm_provider:
+        os.environ["LLM_PROVIDER"] = llm_provider
+    from app import create_app
+    return create_app("benchmark")
+
+
+def _take(reserved: list, default):
+    """Next reserved id (or id batch) for a DELETE; `default` once they run out."""
+    return reserved.pop() if reserved else default
+
+
+def _context(user_id: int, victim_ids: dict, seq: int = 0, bulk_ids: dict | None = None) -> dict:
+    today = date.today()
+    return {
+        "user_id": user_id,
+        "today": today.strftime("%Y-%m-%d"),
+        "month": today.strftime("%Y-%m"),
+        "from": today.replace(day=1).strftime("%Y-%m-%d"),
+        "to": today.strftime("%Y-%m-%d"),
+        "year_ago": today.replace(year=today.year - 1, day=1).strftime("%Y-%m-%d"),
+        "seq": seq,
+        "victim_ids": victim_ids.get(user_id, []),
+        "bulk_ids": (bulk_ids or {}).get(user_id, []),
+    }
+
+
+def _run_size(flask_app, users: int, tx_per_user: int, args) -> dict:
+    from sqlalchemy import event
+    from app.extensions import db
+    from app.database import init_search_indexes
+    from app.models import Transaction, ChangeLog, SyncSequence
+    from .dataset import generate
+
+    with flask_app.app_context():
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+        init_search_indexes(flask_app)
+        flask_app.extensions.pop("tx_cache", None)  # user ids repeat across sizes
+        started = time.perf_counter()
+        user_ids = generate(users, tx_per_user, years=args.years, seed=args.seed)
+        gen_seconds = time.perf_counter() - started
+
+        # ids for the DELETE endpoints, enough for every pass that lands on a
+        # user: one each for the single delete, a batch each for the bulk delete
+        passes = math.ceil((args.iterations + args.memory_iterations) / len(user_ids))
+        victim_ids, bulk_ids = {}, {}
+        for uid in user_ids:
+            rows = db.session.query(Transaction.id).filter_by(user_id=uid)\
+                .order_by(Transaction.id).limit(passes * (1 + BULK_DELETE_BATCH)).all()
+            ids = [r.id for r in rows]
+            victim_ids[uid] = ids[:passes]
+            bulk_ids[uid] = [ids[i:i + BULK_DELETE_BATCH] for i in range(passes, len(ids), BULK_DELETE_BATCH)]
+
+        # bulk-generated rows bypass the change log; log one write per user so
+        # "/api/sync (delta)" resumes from a real cursor with nothing new, like a steady-state refresh
+        seq = 1
+        for uid in user_ids:
+            db.session.add(SyncSequence(user_id=uid, seq=seq))
+            db.session.add(ChangeLog(user_id=uid, seq=seq, entity="transaction",
+                                     entity_key=str(victim_ids[uid][-1]), op="upsert"))
+        db.session.commit()
+
+        query_count = [0]
+
+        def _count(*_a, **_k):
+            query_count[0] += 1
+
+        event.listen(db.engine, "before_cursor_execute", _count)
+
+    client = flask_app.test_client()
+    results = {}
+
+    try:
+        for name, method, path_fn, body_fn in ENDPOINTS:
+            timings, queries, errors, peaks, sizes = [], [], 0, [], []
+            for i in range(args.iterations + args.memory_iterations):
+                uid = user_ids[i % len(user_ids)]
+                ctx = _context(uid, victim_ids, seq, bulk_ids)
+                with client.session_transaction() as sess:
+                    sess["user_id"] = uid
+
+                measure_memory = i >= args.iterations
+                if measure_memory:
+                    tracemalloc.start()
+                query_count[0] = 0
+                t0 = time.perf_counter()
+                resp = client.open(path_fn(ctx), method=method, json=body_fn(ctx) if body_fn else None)
+                elapsed = (time.perf_counter() - t0) * 1000
+                sizes.append(len(resp.get_data()))
+                if measure_memory:
+                    peaks.append(tracemalloc.get_traced_memory()[1])
+                    tracemalloc.stop()
+                else:
+                    timings.append(elapsed)
+                    queries.append(query_count[0])
+                if resp.status_code >= 400:
+                    errors += 1
+
+            results[name] = {
+                "p50_ms": round(_percentile(timings, 50), 3),
+                "p95_ms": round(_percentile(timings, 95), 3),
+                "p99_ms": round(_percentile(timings, 99), 3),
+                "queries_per_request": round(sum(queries) / len(queries), 2) if queries else 0,
+                "peak_kib": round(max(peaks) / 1024, 1) if peaks else 0,
+                "resp_kib": round(sum(sizes) / len(sizes) / 1024, 1) if sizes else 0,
+                "errors": errors,
+            }
+    finally:
+        with flask_app.app_context():
+            event.remove(db.engine, "before_cursor_execute", _count)
+
+    return {"generate_seconds": round(gen_seconds, 2), "endpoints": results}
+
+
+def _print_table(label: str, size_result: dict):
+    print(f"\n══ {label} (generated in {size_result['generate_seconds']}s) ══")
+    print(f"  {'endpoint':38} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9} "
+          f"{'resp KiB':>9} {'err':>4}")
+    for name, r in size_result["endpoints"].items():
+        print(f"  {name:38} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} {r['p99_ms']:9.2f} "
+              f"{r['queries_per_request']:8.1f} {r['peak_kib']:9.1f} {r.get('resp_kib', 0):9.1f} {r['errors']:4d}")
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return regressions where p95 or queries grew by more than `threshold` (a ratio)."""
+    regressions = []
+    for label, size_result in current["results"].items():
+        base_size = baseline.get("results", {}).get(label)
+        if not base_size:
+            continue
+        for name, r in size_result["endpoints"].items():
+            b = base_size["endpoints"].get(name)
+            if not b:
+                continue
+            for metric in ("p95_ms", "queries_per_request"):
+                if b[metric] and r[metric] > b[metric] * (1 + threshold):
+                    regressions.append(f"{label} {name}: {metric} {b[metric]} -> {r[metric]}")
+    return regressions
+
+
+def check_targets(current: dict) -> list:
+    """Endpoints whose p95 misses LATENCY_TARGETS_MS at the largest measured size."""
+    if not current["results"]:
+        return []
+    label = max(current["results"], key=lambda l: _parse_sizes(l)[0][0] * _parse_sizes(l)[0][1])
+    misses = []
+    for name, target in LATENCY_TARGETS_MS.items():
+        r = current["results"][label]["endpoints"].get(name)
+        if r and r["p95_ms"] > target:
+            misses.append(f"{label} {name}: p95 {r['p95_ms']} ms > target {target} ms")
+    return misses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrackEx API benchmark suite")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated USERSxTRANSACTIONS, e.g. 10x500")
+    parser.add_argument("--iterations", type=int, default=30, help="timed requests per endpoint")
+    parser.add_argument("--memory-iterations", type=int, default=3, help="extra requests traced with tracemalloc")
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--llm-provider", default="local", help="LLM provider for chat/insights (local, replay, ...)")
+    parser.add_argument("--tx-cache-bytes", type=int, default=0, help="per-process transaction cache budget (0 = off)")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against a saved results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed regression ratio (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="trackex-bench-")
+    flask_app = _build_app(os.path.join(workdir, "bench.db"), args.llm_provider)
+    flask_app.config["TX_CACHE_MAX_BYTES"] = args.tx_cache_bytes
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "years": args.years,
+            "iterations": args.iterations,
+            "llm_provider": args.llm_provider,
+            "tx_cache_bytes": args.tx_cache_bytes,
+            "date": date.today().isoformat(),
+        },
+        "results": {},
+    }
+    for users, txs in _parse_sizes(args.sizes):
+        label = f"{users}x{txs}"
+        report["results"][label] = _run_size(flask_app, users, txs, args)
+        _print_table(label, report["results"][label])
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    misses = check_targets(report)
+    if misses:
+        print("\nLatency targets missed:")
+        for line in misses:
+            print(f"  ✗ {line}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for line in regressions:
+                print(f"  ✗ {line}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+    if misses:
+        sys.exit(1)
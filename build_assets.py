@@ -0,0 +1,132 @@
+"""Build fingerprinted, minified and precompressed static assets.
+
+Usage:
+    python build_assets.py [--no-minify] [--clean]
+
+Every .js and .css file under app/static (outside dist/) is minified, written
+to app/static/dist/<dir>/<name>.<hash>.<ext> together with .gz (and .br when
+the `brotli` package is installed) variants, and recorded in
+app/static/dist/manifest.json. app/assets.py reads the manifest so templates
+get the hashed URLs, which are served with immutable far-future caching.
+
+Minification uses rjsmin/rcssmin when installed, otherwise a conservative
+comment and whitespace stripper.
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import shutil
+import hashlib
+import argparse
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app", "static")
+DIST_DIR = os.path.join(STATIC_DIR, "dist")
+EXTENSIONS = (".js", ".css")
+
+try:
+    import rjsmin
+except ImportError:  # optional dependency
+    rjsmin = None
+try:
+    import rcssmin
+except ImportError:  # optional dependency
+    rcssmin = None
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+
+def minify_css(source: str) -> str:
+    if rcssmin:
+        return rcssmin.cssmin(source)
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};,>])\s*", r"\1", source)
+    source = re.sub(r"\s*:\s*(?=[^{}]*;|[^{}]*})", ":", source)  # only inside declarations
+    return source.replace(";}", "}").strip()
+
+
+def minify_js(source: str) -> str:
+    if rjsmin:
+        return rjsmin.jsmin(source)
+    # Line-level only, so strings, regexes and template literals stay intact
+    out = []
+    in_block_comment = False
+    for line in source.splitlines():
+        stripped = line.strip()
+        if in_block_comment:
+            if "*/" in stripped:
+                in_block_comment = False
+            continue
+        if stripped.startswith("/*") and "`" not in stripped:
+            in_block_comment = "*/" not in stripped
+            continue
+        if not stripped or stripped.startswith("//"):
+            continue
+        out.append(stripped)
+    return "\n".join(out) + "\n"
+
+
+def _sources():
+    for root, dirs, files in os.walk(STATIC_DIR):
+        if os.path.abspath(root).startswith(DIST_DIR):
+            continue
+        for name in sorted(files):
+            if name.endswith(EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def build(minify: bool = True) -> dict:
+    manifest = {}
+    for path in _sources():
+        rel = os.path.relpath(path, STATIC_DIR).replace(os.sep, "/")
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        original_size = len(source.encode("utf-8"))
+        if minify:
+            source = minify_css(source) if rel.endswith(".css") else minify_js(source)
+        data = source.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        stem, ext = os.path.splitext(rel)
+        hashed = f"dist/{stem}.{digest}{ext}"
+        out_path = os.path.join(STATIC_DIR, hashed)
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+        with open(out_path, "wb") as f:
+            f.write(data)
+        with open(out_path + ".gz", "wb") as f:
+            # mtime=0 keeps the .gz byte-identical across builds
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            with open(out_path + ".br", "wb") as f:
+                f.write(brotli.compress(data))
+
+        manifest[rel] = hashed
+        gz_size = os.path.getsize(out_path + ".gz")
+        print(f"  {rel:24} {original_size:>7} B -> {len(data):>7} B, gzip {gz_size:>6} B  {hashed}")
+
+    with open(os.path.join(DIST_DIR, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build fingerprinted static assets")
+    parser.add_argument("--no-minify", action="store_true", help="hash and compress without minifying")
+    parser.add_argument("--clean", action="store_true", help="remove app/static/dist first")
+    args = parser.parse_args()
+
+    if args.clean and os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+    os.makedirs(DIST_DIR, exist_ok=True)
+    manifest = build(minify=not args.no_minify)
+    print(f"\n{len(manifest)} assets written to {DIST_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,19 @@ class Config:
         SQLALCHEMY_DATABASE_URI = "sqlite:///local_fallback.db"
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Optional read replicas, comma-separated; one bind each (replica0, replica1, ...), see app/replicas.py
+    REPLICA_URLS = [url.strip().replace("postgres://", "postgresql://", 1)
+                    for url in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+    SQLALCHEMY_BINDS = {f"replica{i}": url for i, url in enumerate(REPLICA_URLS)}
+    # Optional user shards beyond DATABASE_URL (shard 0), comma-separated; binds shard1, shard2, ..., see app/shards.py
+    SHARD_URLS = [url.strip().replace("postgres://", "postgresql://", 1)
+                  for url in os.environ.get("DATABASE_SHARD_URLS", "").split(",") if url.strip()]
+    SQLALCHEMY_BINDS.update({f"shard{i}": url for i, url in enumerate(SHARD_URLS, 1)})
+    REPLICA_STICKY_SECONDS = float(os.environ.get("REPLICA_STICKY_SECONDS", "5"))  # read-your-writes window
+    # Optional per-process cache of active users' recent months (app/txcache.py); 0 disables
+    TX_CACHE_MAX_BYTES = int(os.environ.get("TX_CACHE_MAX_BYTES", "0"))
+    TX_CACHE_MONTHS = int(os.environ.get("TX_CACHE_MONTHS", "6"))
     DATABASE   = None
     DEBUG      = False
     GOOGLE_CLIENT_ID = os.environ.get("GOOGLE_CLIENT_ID", "YOUR_GOOGLE_CLIENT_ID")
@@ -51,6 +64,18 @@ class Config:
     GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
     GOOGLE_REDIRECT_URI = os.environ.get("GOOGLE_REDIRECT_URI", "http://127.0.0.1:5001/auth/google/callback")
 
+    # /metrics is open unless a bearer token is configured
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+    # Sampled request profiling (cProfile + tracemalloc), off by default
+    PROFILER_ENABLED = os.environ.get("PROFILER_ENABLED", "").lower() in ("1", "true", "yes")
+    PROFILER_SAMPLE_RATE = float(os.environ.get("PROFILER_SAMPLE_RATE", "0.01"))
+    PROFILER_HEADER = "X-TrackEx-Profile"
+    PROFILER_TOKEN = os.environ.get("PROFILER_TOKEN")  # header value that forces a capture
+    PROFILER_DIR = os.environ.get("PROFILER_DIR", os.path.join(BASE_DIR, "instance", "profiles"))
+    PROFILER_KEEP = int(os.environ.get("PROFILER_KEEP", "50"))  # captures kept per endpoint
+    PROFILER_TOP_ALLOCS = 25
+
 class DevelopmentConfig(Config):
     DEBUG = True
     # Relax cookie security for local development (HTTP)
@@ -60,8 +85,14 @@ class ProductionConfig(Config):
     DEBUG = False
     # All security settings inherited from base Config
 
+class BenchmarkConfig(DevelopmentConfig):
+    DEBUG = False
+    RATELIMIT_ENABLED = False  # benchmarks hammer endpoints far beyond the per-IP limits
+    WTF_CSRF_ENABLED = False   # load harness logs in through the plain form
+
 config = {
     "development": DevelopmentConfig,
     "production":  ProductionConfig,
+    "benchmark":   BenchmarkConfig,
     "default":     DevelopmentConfig,
 }
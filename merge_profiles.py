@@ -0,0 +1,85 @@
+"""Merge sampled request profiles into one report per endpoint.
+
+Usage:
+    python merge_profiles.py [PROFILE_DIR] [--top N] [--sort cumulative|tottime]
+
+For every endpoint directory written by app/profiler.py this writes
+`merged.prof` (load it with pstats or snakeviz) and `merged.alloc.json`,
+then prints the hottest functions and allocation sites.
+"""
+import os
+import sys
+import json
+import pstats
+import argparse
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "profiles")
+
+
+def merge_endpoint(path, top, sort_key):
+    prof_files = sorted(
+        os.path.join(path, f) for f in os.listdir(path)
+        if f.endswith(".prof") and f != "merged.prof"
+    )
+    if not prof_files:
+        return None
+
+    stats = pstats.Stats(*prof_files, stream=sys.stdout)
+    stats.dump_stats(os.path.join(path, "merged.prof"))
+
+    # Sum allocation sites across captures
+    sites = {}
+    wall, peaks = [], []
+    for f in os.listdir(path):
+        if not f.endswith(".alloc.json") or f == "merged.alloc.json":
+            continue
+        with open(os.path.join(path, f)) as fh:
+            data = json.load(fh)
+        wall.append(data.get("wall_ms", 0))
+        peaks.append(data.get("peak_bytes", 0))
+        for row in data.get("top", []):
+            site = sites.setdefault(row["location"], {"location": row["location"], "size": 0, "count": 0})
+            site["size"] += row["size"]
+            site["count"] += row["count"]
+
+    merged = {
+        "captures": len(prof_files),
+        "avg_wall_ms": round(sum(wall) / len(wall), 3) if wall else 0,
+        "max_peak_bytes": max(peaks) if peaks else 0,
+        "top": sorted(sites.values(), key=lambda s: s["size"], reverse=True)[:top],
+    }
+    with open(os.path.join(path, "merged.alloc.json"), "w") as fh:
+        json.dump(merged, fh, indent=2)
+
+    return stats.sort_stats(sort_key), merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merge TrackEx request profiles per endpoint.")
+    parser.add_argument("directory", nargs="?", default=DEFAULT_DIR)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--sort", default="cumulative", choices=["cumulative", "tottime", "ncalls"])
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        print(f"Profile directory {args.directory} not found.")
+        return
+
+    for endpoint in sorted(os.listdir(args.directory)):
+        path = os.path.join(args.directory, endpoint)
+        if not os.path.isdir(path):
+            continue
+        result = merge_endpoint(path, args.top, args.sort)
+        if not result:
+            continue
+        stats, merged = result
+        print(f"\n══ {endpoint} — {merged['captures']} captures, "
+              f"avg {merged['avg_wall_ms']} ms, peak {merged['max_peak_bytes'] / 1024:.1f} KiB ══")
+        stats.print_stats(args.top)
+        print("  Top allocation sites:")
+        for site in merged["top"]:
+            print(f"    {site['size'] / 1024:10.1f} KiB  {site['count']:8d}  {site['location']}")
+
+
+if __name__ == "__main__":
+    main()
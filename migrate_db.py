@@ -1,42 +1,80 @@
-import sqlite3
+"""Apply pending schema migrations to the configured database (DATABASE_URL).
+
+    python migrate_db.py             # create missing tables, apply all pending migrations
+    python migrate_db.py --status    # list migrations and any unfinished backfill
+    python migrate_db.py --target 2  # apply migrations up to version 2 only
+
+The app also migrates on boot; run this as a deploy step to do the work
+(and any long backfill) before the new code starts serving. With
+DATABASE_SHARD_URLS set, every shard is migrated (and listed) after the primary.
+"""
+import argparse
 import os
+import sys
+
+from dotenv import load_dotenv
+from flask import Flask
+
+load_dotenv()
+
+from config import config
+from app.extensions import db
+
+
+def make_app(env):
+    """A bare app bound to the database: no blueprints, no boot-time init_db."""
+    app = Flask(__name__)
+    app.config.from_object(config.get(env, config["default"]))
+    db.init_app(app)
+    from app import models  # noqa: F401  (register the tables)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--env", default=os.environ.get("FLASK_ENV", "development"))
+    parser.add_argument("--status", action="store_true", help="show applied and pending migrations")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args(argv)
+
+    app = make_app(args.env)
+    with app.app_context():
+        from app.migrations import (migration_status, on_engine, run_migrations,
+                                    schema_backfills, schema_migrations)
+        from app.shards import shard_count, shard_engine
+        if args.status:
+            for shard in range(shard_count()):
+                engine = shard_engine(shard)
+                if shard_count() > 1:
+                    print(f"── shard {shard}")
+                # a database that predates versioning has no bookkeeping tables yet
+                schema_migrations.create(engine, checkfirst=True)
+                schema_backfills.create(engine, checkfirst=True)
+                with on_engine(engine):
+                    versions, backfills = migration_status()
+                for version, name, applied_at in versions:
+                    print(f"{version:04d}  {'applied ' + str(applied_at) if applied_at else 'pending'}  {name}")
+                for name, last_id, rows_done, updated_at in backfills:
+                    print(f"backfill {name}: {rows_done} rows done, resumes after id {last_id} (at {updated_at})")
+            return 0
 
-DB_PATH = 'instance/local_fallback.db'
-
-def migrate():
-    if not os.path.exists(DB_PATH):
-        print(f"Database {DB_PATH} not found.")
-        return
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Get existing columns
-    cursor.execute("PRAGMA table_info(users)")
-    columns = [row[1] for row in cursor.fetchall()]
-
-    new_columns = [
-        ('full_name', 'TEXT'),
-        ('bio', 'TEXT'),
-        ('phone', 'TEXT'),
-        ('avatar_url', 'TEXT'),
-        ('currency', 'TEXT DEFAULT "INR"'),
-        ('created_at', 'DATETIME')
-    ]
-
-    for col_name, col_type in new_columns:
-        if col_name not in columns:
-            try:
-                print(f"Adding column {col_name}...")
-                cursor.execute(f"ALTER TABLE users ADD COLUMN {col_name} {col_type}")
-                conn.commit()
-            except Exception as e:
-                print(f"Error adding {col_name}: {e}")
+        if args.target is None:
+            from app.database import init_db
+            init_db(app)  # create_all + every migration + indexes, exactly as on boot
         else:
-            print(f"Column {col_name} already exists.")
+            db.create_all(bind_key=None)
+            from app.models import seed_categories
+            from app.shards import sync_categories
+            seed_categories()
+            for shard in range(shard_count()):
+                engine = shard_engine(shard)
+                if shard:
+                    db.metadata.create_all(engine)
+                    sync_categories(engine)
+                with on_engine(engine):
+                    print(f"Applied on shard {shard}: {run_migrations(target=args.target) or 'nothing'}")
+    return 0
 
-    conn.close()
-    print("Migration completed.")
 
 if __name__ == "__main__":
-    migrate()
+    sys.exit(main())
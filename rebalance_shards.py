@@ -0,0 +1,49 @@
+"""Move users' rows between shards while they stay online (see app/shards.py).
+
+    python rebalance_shards.py --counts            # users per shard, from the directory
+    python rebalance_shards.py --user 42 --to 2    # move user 42 to shard 2
+    python rebalance_shards.py --drain 1 --to 2    # move every user on shard 1 to shard 2
+
+Each user's writes are refused (503) for a few seconds near the end of their
+move; reads keep working throughout.
+"""
+import argparse
+import os
+import sys
+
+from migrate_db import make_app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--env", default=os.environ.get("FLASK_ENV", "development"))
+    parser.add_argument("--counts", action="store_true", help="show users per shard")
+    parser.add_argument("--user", type=int, action="append", default=[], help="user id to move (repeatable)")
+    parser.add_argument("--drain", type=int, help="move every user on this shard")
+    parser.add_argument("--to", type=int, help="target shard")
+    args = parser.parse_args(argv)
+
+    app = make_app(args.env)
+    with app.app_context():
+        from app.extensions import db
+        from app.models import User
+        from app.shards import move_user, shard_count
+        if args.counts or args.to is None:
+            counts = dict(db.session.query(User.shard, db.func.count(User.id)).group_by(User.shard).all())
+            counts[0] = counts.get(0, 0) + counts.pop(None, 0)
+            for shard in range(shard_count()):
+                print(f"shard {shard}: {counts.get(shard, 0)} users")
+            return 0
+
+        users = list(args.user)
+        if args.drain is not None:
+            on_shard = User.shard.is_(None) | (User.shard == 0) if args.drain == 0 else User.shard == args.drain
+            users += [uid for (uid,) in db.session.query(User.id).filter(on_shard).order_by(User.id)]
+        for user_id in users:
+            copied = move_user(user_id, args.to)
+            print(f"Moved user {user_id} to shard {args.to}: {copied} rows copied.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
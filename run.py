@@ -29,8 +29,10 @@ if __name__ == "__main__":
     
     if env == "production":
         from waitress import serve
+        # Keep this above LLM_MAX_CONCURRENCY + LLM_QUEUE_SIZE so AI calls can't starve the API
+        threads = int(os.environ.get("WAITRESS_THREADS", 8))
         print(f"\n  TrackEx (Production)  ->  http://0.0.0.0:{port}\n")
-        serve(app, host="0.0.0.0", port=port)
+        serve(app, host="0.0.0.0", port=port, threads=threads)
     else:
         print(f"\n  TrackEx (Development)  ->  http://127.0.0.1:{port}\n")
         app.run(host="0.0.0.0", port=port, debug=True, use_reloader=True)